@@ -0,0 +1,64 @@
+"""
+Non-blocking, level-filtered logging for the API.
+
+Records below LOG_LEVEL are dropped before any formatting. Records that pass
+go onto an in-memory queue via QueueHandler, and a QueueListener thread
+writes them to stdout. A request handler therefore never blocks on
+terminal or pipe I/O.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import Optional
+
+from settings import get_settings
+
+settings = get_settings()
+LOG_LEVEL = settings.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = settings.get("LOG_FORMAT", "%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+_ROOT = "techzolo"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def configure_logging(level: str = LOG_LEVEL):
+    """Route the application's loggers through a queue to stdout (idempotent)."""
+    global _listener
+    with _listener_lock:
+        root = logging.getLogger(_ROOT)
+        root.setLevel(level)
+        if _listener is not None:
+            return
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(logging.handlers.QueueHandler(records))
+        root.propagate = False
+        atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the application's namespace. Importing a module that asks for one starts
+    nothing; records are written once configure_logging() has run (create_app() calls it)."""
+    return logging.getLogger(f"{_ROOT}.{name}")
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            root = logging.getLogger(_ROOT)
+            for handler in list(root.handlers):
+                if isinstance(handler, logging.handlers.QueueHandler):
+                    root.removeHandler(handler)
@@ -0,0 +1,73 @@
+"""
+Async data-access layer for the FastAPI handlers.
+
+psycopg2 is a blocking driver, so every query issued from an ``async def``
+handler used to stall the uvicorn event loop for its full round trip. The
+functions here run the existing pooled, synchronous queries on a dedicated
+thread pool sized to the connection pool; psycopg2 releases the GIL while it
+waits on the socket, so the event loop keeps serving other requests.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from database_manager import DatabaseManager
+from db_pool import DB_POOL_MAX_SIZE
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # One thread per pooled connection: more threads would only queue on the pool.
+                _executor = ThreadPoolExecutor(max_workers=DB_POOL_MAX_SIZE, thread_name_prefix="db")
+    return _executor
+
+
+async def run_sync(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking database function off the event loop and await its result."""
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context across so the work is charged to the current request trace.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_get_executor(), context.run, functools.partial(func, *args, **kwargs))
+
+
+def shutdown():
+    """Stop the database thread pool (called on application shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+async def get_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
+    """Retrieve a user by their ID without blocking the event loop."""
+    return await run_sync(DatabaseManager().get_user_by_id, user_id)
+
+
+async def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+    """Retrieve a user by their email address without blocking the event loop."""
+    return await run_sync(DatabaseManager().get_user_by_email, email)
+
+
+async def create_user(email, password, full_name, company=None, phone=None, is_admin=False) -> Optional[int]:
+    """Create a new user without blocking the event loop; returns the new id."""
+    return await run_sync(DatabaseManager().create_user, email, password, full_name, company, phone, is_admin)
+
+
+async def create_user_with_session(email, password_hash, full_name, company=None, phone=None, is_admin=False,
+                                   device_info=None, ip_address=None):
+    """Create a user and their first session in one statement; returns (user, session id, refresh token)."""
+    return await run_sync(DatabaseManager().create_user_with_session, email, password_hash, full_name, company,
+                          phone, is_admin, device_info, ip_address)
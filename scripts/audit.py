@@ -0,0 +1,275 @@
+"""
+Asynchronous audit trail for activity_logs.
+
+record() appends an event to a bounded in-memory ring buffer and returns
+without touching the database, so auditing adds no round trip to the request.
+A background thread flushes the buffer with COPY, AUDIT_BATCH_SIZE events at
+a time. It runs every AUDIT_FLUSH_SECONDS, or sooner once a full batch is
+waiting.
+
+Backpressure never reaches the request path. When the buffer is full, the
+oldest event is discarded to make room and counted in ``dropped``. If a flush
+fails, its events go back to the front of the buffer for the next cycle,
+subject to the same bound. A batch rejected AUDIT_MAX_ATTEMPTS times in a row
+(bad data, say) is split in half, and failing halves are split again, until
+the offending event is alone. Once that event has also failed
+AUDIT_MAX_ATTEMPTS times it is discarded, logged and counted in ``dropped``
+and ``rejected``, so it cannot hold back every later event.
+Connection failures and pool timeouts do not count as attempts: during an
+outage events wait, subject to the bound, rather than being bisected away.
+Events still buffered when a process dies are lost: this is a best-effort
+trail, not a ledger.
+
+activity_logs is partitioned by month (see migrations/0004). The flusher
+creates the partitions for the current month and AUDIT_PARTITION_MONTHS_AHEAD
+months after it, plus any month a batch needs. On SQLite there are no
+partitions or COPY, and a batch is one executemany() INSERT in one transaction.
+"""
+
+import csv
+import io
+import json
+import threading
+from collections import deque
+from datetime import date, datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import psycopg2
+
+from app_logging import get_logger
+from db_pool import PoolTimeoutError, dialect, get_connection
+from settings import get_settings
+
+settings = get_settings()
+AUDIT_BUFFER_SIZE = settings.get_int("AUDIT_BUFFER_SIZE", 10000)
+AUDIT_BATCH_SIZE = settings.get_int("AUDIT_BATCH_SIZE", 500)
+AUDIT_FLUSH_SECONDS = settings.get_float("AUDIT_FLUSH_SECONDS", 1.0)
+AUDIT_PARTITION_MONTHS_AHEAD = settings.get_int("AUDIT_PARTITION_MONTHS_AHEAD", 2)
+AUDIT_MAX_ATTEMPTS = settings.get_int("AUDIT_MAX_ATTEMPTS", 3)
+
+logger = get_logger("audit")
+
+_COLUMNS = ("user_id", "action", "resource_type", "resource_id", "details", "ip_address", "user_agent", "created_at")
+Event = Tuple[Any, ...]
+# The database could not be reached: retrying the same batch later may succeed.
+_UNAVAILABLE = (psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeoutError)
+
+
+def _month(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class AuditLog:
+    """Bounded buffer of audit events drained to activity_logs by a background thread."""
+
+    def __init__(self, capacity: int = AUDIT_BUFFER_SIZE, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_seconds: float = AUDIT_FLUSH_SECONDS, months_ahead: int = AUDIT_PARTITION_MONTHS_AHEAD,
+                 max_attempts: int = AUDIT_MAX_ATTEMPTS):
+        self.capacity = max(1, capacity)
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.months_ahead = months_ahead
+        self.max_attempts = max(1, max_attempts)
+
+        self._buffer: Deque[Event] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._partitions: Set[date] = set()
+        # Failures of the batch at the front of the buffer. While a rejected batch is being
+        # bisected, batches are _take events and the first _suspect events hold a bad one.
+        self._attempts = 0
+        self._take = self.batch_size
+        self._suspect = 0
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.batches = 0
+        self.failed_flushes = 0
+
+    def record(self, action: str, user_id: Optional[int] = None, resource_type: Optional[str] = None,
+               resource_id: Optional[int] = None, details: Optional[Dict[str, Any]] = None,
+               ip_address: Optional[str] = None, user_agent: Optional[str] = None):
+        """Queue one event; never blocks on the database."""
+        event = (
+            user_id, action, resource_type, resource_id,
+            json.dumps(details, separators=(",", ":"), default=str) if details is not None else None,
+            ip_address, user_agent,
+            datetime.now(timezone.utc).replace(tzinfo=None),  # activity_logs holds naive UTC
+        )
+        with self._lock:
+            if len(self._buffer) >= self.capacity:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(event)
+            self.recorded += 1
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+
+    def _ensure_partitions(self, cursor, months: Set[date]):
+        for month in sorted(months - self._partitions):
+            cursor.execute("SELECT ensure_activity_log_partition(%s)", (month,))
+
+    def ensure_partitions(self):
+        """Create partitions for this month and the next months_ahead months."""
+        current = _month(datetime.now(timezone.utc))
+        months = {_add_months(current, offset) for offset in range(self.months_ahead + 1)}
+        if dialect() == "sqlite":
+            return
+        conn = get_connection()
+        try:
+            self._ensure_partitions(conn.cursor(), months)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self._partitions |= months
+
+    def _insert_batch(self, events: List[Event]):
+        conn = get_connection()
+        try:
+            conn.cursor().executemany(
+                f"INSERT INTO activity_logs ({', '.join(_COLUMNS)}) VALUES ({', '.join(['%s'] * len(_COLUMNS))})",
+                events,
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _write_batch(self, events: List[Event]):
+        if dialect() == "sqlite":
+            self._insert_batch(events)
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for event in events:
+            writer.writerow([r"\N" if value is None else value for value in event])
+        buffer.seek(0)
+
+        months = {_month(event[-1]) for event in events}
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            self._ensure_partitions(cursor, months)
+            cursor.copy_expert(
+                f"COPY activity_logs ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self._partitions |= months
+
+    def flush(self) -> int:
+        """Write every buffered event; returns how many were written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self._take, len(self._buffer)))]
+                if not batch:
+                    return written
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    self.failed_flushes += 1
+                    if not isinstance(e, _UNAVAILABLE):
+                        self._attempts += 1
+                    # Within a bisected batch the failure is known not to be transient: split right away.
+                    limit = 1 if self._suspect and len(batch) > 1 else self.max_attempts
+                    if self._attempts < limit:
+                        logger.error("Error writing %d audit events: %s", len(batch), e)
+                        self._requeue(batch)
+                        return written
+                    self._attempts = 0
+                    if len(batch) > 1:
+                        logger.warning("%d audit events could not be written, retrying in halves: %s", len(batch), e)
+                        self._take, self._suspect = len(batch) // 2, len(batch)
+                        self._requeue(batch)
+                        continue
+                    logger.error("Discarding audit event %r after %d failed writes: %s", batch[0], self.max_attempts, e)
+                    with self._lock:
+                        self.dropped += 1
+                        self.rejected += 1
+                    self._settled(1)
+                    continue
+                self._attempts = 0
+                self._settled(len(batch))
+                written += len(batch)
+                with self._lock:
+                    self.written += len(batch)
+                    self.batches += 1
+
+    def _settled(self, count: int):
+        """count events left the front of the buffer; back to full batches once past the bad one."""
+        self._suspect -= count
+        if self._suspect <= 0:
+            self._take, self._suspect = self.batch_size, 0
+
+    def _requeue(self, batch: List[Event]):
+        """Put a failed batch back in front of newer events, dropping the oldest past capacity."""
+        with self._lock:
+            room = self.capacity - len(self._buffer)
+            kept = batch[-room:] if room > 0 else []
+            self.dropped += len(batch) - len(kept)
+            self._buffer.extendleft(reversed(kept))
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        """Create upcoming partitions and start the background flusher."""
+        try:
+            self.ensure_partitions()
+        except Exception as e:
+            logger.error("Error creating activity_logs partitions: %s", e)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write out whatever is still buffered."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._buffer.clear()
+            self._partitions.clear()
+            self._attempts, self._take, self._suspect = 0, self.batch_size, 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": len(self._buffer),
+                "capacity": self.capacity,
+                "recorded": self.recorded,
+                "written": self.written,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "failed_flushes": self.failed_flushes,
+            }
+
+
+audit_log = AuditLog()
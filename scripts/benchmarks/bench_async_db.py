@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: request latency under concurrent load, blocking vs async data layer.
+
+Simulates a burst of concurrent requests on one event loop. In "blocking" mode
+each request calls the synchronous DatabaseManager query directly, the way the
+handlers used to; in "async" mode it awaits the async_db equivalent. Latency is
+measured from the moment the burst arrives until each request completes, which
+is what a client waiting on a uvicorn worker observes.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/benchmarks/bench_async_db.py --concurrency 50 --slow-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import async_db
+from bench_utils import summarize_latencies
+from database_manager import DatabaseManager
+from db_pool import get_connection
+
+
+def slow_query(delay_ms: float):
+    """Stand-in for a slow query: a server-side sleep over a pooled connection."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_sleep(%s)", (delay_ms / 1000.0,))
+        cursor.fetchone()
+    finally:
+        conn.close()
+
+
+async def run_burst(mode: str, concurrency: int, slow_ms: float, email: str):
+    db_manager = DatabaseManager()
+    arrived = time.perf_counter()
+    latencies = []
+
+    async def request():
+        if mode == "blocking":
+            if slow_ms:
+                slow_query(slow_ms)
+            else:
+                db_manager.get_user_by_email(email)
+        else:
+            if slow_ms:
+                await async_db.run_sync(slow_query, slow_ms)
+            else:
+                await async_db.get_user_by_email(email)
+        latencies.append((time.perf_counter() - arrived) * 1000)
+
+    await asyncio.gather(*(request() for _ in range(concurrency)))
+    return latencies
+
+
+async def main_async(args):
+    results = {}
+    for mode in ("blocking", "async"):
+        # Warm the pool and the executor so both modes start from the same state.
+        await run_burst(mode, min(args.concurrency, 4), args.slow_ms, args.email)
+        samples = []
+        for _ in range(args.rounds):
+            samples.extend(await run_burst(mode, args.concurrency, args.slow_ms, args.email))
+        results[mode] = {"requests": len(samples), **summarize_latencies(samples)}
+    async_db.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent requests per burst")
+    parser.add_argument("--rounds", type=int, default=5, help="bursts per mode")
+    parser.add_argument("--slow-ms", type=float, default=20.0, help="simulated query time; 0 runs a real user lookup")
+    parser.add_argument("--email", default="admin@techzolo.com", help="email used for the user lookup workload")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print(json.dumps({"concurrency": args.concurrency, "slow_ms": args.slow_ms, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold-start import time of backend_api, from python -X importtime.
+
+Every run imports the module in a fresh interpreter. The cumulative time
+Python reports for it is the cost a worker or a test run pays before it can
+do anything. Reported: min/median of that time, the slowest direct imports
+of the last run, and which of DEFERRED_MODULES were imported anyway. Those
+modules are only needed by some requests or by __main__, so importing them
+eagerly is a regression even when it fits in the time budget.
+
+test_startup.py runs measure() with a budget in the test suite.
+
+Usage:
+    python scripts/benchmarks/bench_startup.py --runs 5 --budget-ms 1000
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DEFERRED_MODULES = ("uvicorn", "jwt", "cryptography", "sqlite_pool")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self µs, cumulative µs, depth) for every line -X importtime wrote."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def import_once(module: str) -> List[Tuple[str, int, int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True,
+    )
+    if result.stdout:
+        raise RuntimeError(f"importing {module} printed to stdout: {result.stdout!r}")
+    return parse_importtime(result.stderr)
+
+
+def measure(module: str = "backend_api", runs: int = 5, top: int = 10) -> Dict[str, Any]:
+    """Import module in runs fresh interpreters; summarise the cost and the eager heavy imports."""
+    totals = []
+    for _ in range(runs):
+        entries = import_once(module)
+        end = next(i for i, (name, _, _, depth) in enumerate(entries) if name == module and depth == 0)
+        totals.append(entries[end][2])
+    # Children are printed before their parent: module's own imports follow the previous top-level line.
+    start = max((i for i in range(end) if entries[i][3] == 0), default=-1) + 1
+    own = entries[start:end]
+    children = [(name, cumulative) for name, _, cumulative, depth in own if depth == 1]
+    imported = {name.split(".")[0] for name, _, _, _ in own}
+    return {
+        "module": module,
+        "runs": runs,
+        "min_ms": round(min(totals) / 1000, 1),
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in sorted(children, key=lambda c: -c[1])[:top]},
+        "eager_deferred_modules": sorted(imported.intersection(DEFERRED_MODULES)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend_api", help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--budget-ms", type=float, help="exit 1 if the fastest run is slower than this")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.runs)
+    print(json.dumps(result, indent=2))
+    if result["eager_deferred_modules"] or (args.budget_ms is not None and result["min_ms"] > args.budget_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
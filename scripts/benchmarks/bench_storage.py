@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the same data-access calls on PostgreSQL and on embedded SQLite.
+
+Each backend runs signups (create_user_with_session), user lookups by id,
+contact submissions, contact list pages and dashboards from --threads
+threads at once, the way a threaded server would drive them. The user
+cache is cleared before every lookup so it really reaches the database.
+Rows written to PostgreSQL are deleted afterwards; the SQLite file is
+recreated for every run.
+
+Usage:
+    python scripts/benchmarks/bench_storage.py \\
+        --postgres-url postgresql://... --sqlite-path /tmp/bench.sqlite3 --threads 8 --iterations 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import contacts
+import db_pool
+import projects
+from bench_utils import summarize_latencies
+from database_manager import DatabaseManager
+from db_pool import get_connection
+from user_cache import user_cache
+
+# A fixed, valid bcrypt hash: the benchmark measures database work only.
+PASSWORD_HASH = "$2b$04$" + "a" * 53
+
+
+def timed(threads: int, calls):
+    """Run the calls on a thread pool; return per-call latencies and overall throughput."""
+    def run(call):
+        started = time.perf_counter()
+        call()
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(run, calls))
+    elapsed = time.perf_counter() - started
+    return {"ops_per_second": round(len(latencies) / elapsed, 1), **summarize_latencies(latencies)}
+
+
+def lookup(manager: DatabaseManager, user_id: int):
+    user_cache.invalidate(user_id=user_id)
+    manager.get_user_by_id(user_id)
+
+
+def cleanup(prefix: str):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM users WHERE email LIKE %s", (f"{prefix}%",))
+        cursor.execute("DELETE FROM contact_submissions WHERE email LIKE %s", (f"{prefix}%",))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_backend(database_url: str, threads: int, iterations: int):
+    pool = db_pool.create_pool(database_url)
+    previous = db_pool.set_pool(pool)
+    manager = DatabaseManager()
+    prefix = f"bench-storage-{uuid.uuid4().hex[:8]}-"
+    results = {}
+    try:
+        user_ids = []
+        results["signup"] = timed(threads, [
+            lambda i=i: user_ids.append(manager.create_user_with_session(
+                f"{prefix}{i}@example.com", PASSWORD_HASH, "Bench User", device_info="bench", ip_address="127.0.0.1"
+            )[0]["id"])
+            for i in range(iterations)
+        ])
+        results["get_user_by_id"] = timed(threads, [
+            lambda user_id=user_id: lookup(manager, user_id) for user_id in user_ids
+        ])
+        results["insert_submission"] = timed(threads, [
+            lambda i=i: contacts.insert_submission("Bench", f"{prefix}{i}@example.com", "Subject", "Message")
+            for i in range(iterations)
+        ])
+        results["fetch_page"] = timed(threads, [lambda: contacts.fetch_page(20)] * iterations)
+        for user_id in user_ids[:threads]:
+            projects.create_project(user_id, {"title": "Bench", "project_type": "website"})
+        results["dashboard"] = timed(threads, [
+            lambda user_id=user_id: projects.dashboard(user_id) for user_id in user_ids
+        ])
+        results["pool"] = pool.stats()
+    finally:
+        cleanup(prefix)
+        db_pool.set_pool(previous)
+        pool.close()
+        user_cache.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--postgres-url", default=os.getenv("DATABASE_URL"),
+                        help="PostgreSQL database to use (default: DATABASE_URL)")
+    parser.add_argument("--sqlite-path", default="bench_storage.sqlite3", help="SQLite file to create")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent callers")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per operation")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.sqlite_path + suffix):
+            os.remove(args.sqlite_path + suffix)
+
+    results = {}
+    if args.postgres_url:
+        results["postgresql"] = run_backend(args.postgres_url, args.threads, args.iterations)
+    results["sqlite"] = run_backend(f"sqlite:///{os.path.abspath(args.sqlite_path)}", args.threads, args.iterations)
+    print(json.dumps({"threads": args.threads, "iterations": args.iterations, "results": results},
+                     indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pool checkouts, statements and latency of the signup and profile write paths.
+
+"legacy" replays the sequence the handlers used to run: for signup, an email
+lookup, the INSERT, a re-read by id, a second re-read for the token claims and
+the session INSERT; for a profile update, the UPDATE followed by a re-read of
+the row. "single" runs what the handlers run now: one CTE that inserts the
+user and their session, and one UPDATE ... RETURNING. The user cache is
+cleared before every operation so re-reads really reach the database, as they
+do on a cold worker or after an invalidation.
+
+Password hashing is left out; it costs the same in both modes.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/benchmarks/bench_write_paths.py --iterations 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import db_pool
+import sessions
+from backend_api import _update_user_profile
+from bench_utils import summarize_latencies
+from database_manager import DatabaseManager
+from db_pool import get_connection
+from user_cache import user_cache
+
+# A fixed, valid bcrypt hash: the benchmark measures database work only.
+PASSWORD_HASH = "$2b$04$" + "a" * 53
+
+
+class Counter:
+    """Counts pool checkouts and statements by wrapping the pool's proxies."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.statements = 0
+        self._getconn = db_pool.ConnectionPool.getconn
+        self._execute = db_pool._TimedCursor.execute
+
+    def __enter__(self):
+        counter = self
+
+        def getconn(pool):
+            counter.checkouts += 1
+            return counter._getconn(pool)
+
+        def execute(cursor, *args, **kwargs):
+            counter.statements += 1
+            return counter._execute(cursor, *args, **kwargs)
+
+        db_pool.ConnectionPool.getconn = getconn
+        db_pool._TimedCursor.execute = execute
+        return self
+
+    def __exit__(self, *exc):
+        db_pool.ConnectionPool.getconn = self._getconn
+        db_pool._TimedCursor.execute = self._execute
+
+
+def legacy_signup(manager: DatabaseManager, email: str) -> int:
+    if manager.get_user_by_email(email):
+        raise RuntimeError("duplicate")
+    user_id = manager.create_user(email, PASSWORD_HASH, "Bench User")
+    manager.get_user_by_id(user_id)
+    user_cache.clear()  # create_access_token looked the user up again
+    manager.get_user_by_id(user_id)
+    sessions.create_session(user_id, "bench", "127.0.0.1")
+    return user_id
+
+
+def single_signup(manager: DatabaseManager, email: str) -> int:
+    user, _, _ = manager.create_user_with_session(email, PASSWORD_HASH, "Bench User", device_info="bench",
+                                                  ip_address="127.0.0.1")
+    return user["id"]
+
+
+def legacy_profile_update(user_id: int):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET company = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                       ("LegacyCo", user_id))
+        conn.commit()
+    finally:
+        conn.close()
+    user_cache.invalidate(user_id=user_id)
+    DatabaseManager().get_user_by_id(user_id)
+
+
+def single_profile_update(user_id: int):
+    _update_user_profile(user_id, {"company": "SingleCo"})
+
+
+def cleanup(prefix: str):
+    conn = get_connection()
+    try:
+        conn.cursor().execute("DELETE FROM users WHERE email LIKE %s", (f"{prefix}%",))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_mode(mode: str, iterations: int):
+    manager = DatabaseManager()
+    prefix = f"bench-write-{mode}-{uuid.uuid4().hex[:8]}-"
+    signup = legacy_signup if mode == "legacy" else single_signup
+    update = legacy_profile_update if mode == "legacy" else single_profile_update
+    results = {}
+    try:
+        user_ids = []
+        latencies = []
+        with Counter() as counter:
+            for i in range(iterations):
+                user_cache.clear()
+                started = time.perf_counter()
+                user_ids.append(signup(manager, f"{prefix}{i}@example.com"))
+                latencies.append((time.perf_counter() - started) * 1000)
+        results["signup"] = {
+            "checkouts_per_op": counter.checkouts / iterations,
+            "statements_per_op": counter.statements / iterations,
+            **summarize_latencies(latencies),
+        }
+
+        latencies = []
+        with Counter() as counter:
+            for user_id in user_ids:
+                user_cache.clear()
+                started = time.perf_counter()
+                update(user_id)
+                latencies.append((time.perf_counter() - started) * 1000)
+        results["profile_update"] = {
+            "checkouts_per_op": counter.checkouts / iterations,
+            "statements_per_op": counter.statements / iterations,
+            **summarize_latencies(latencies),
+        }
+    finally:
+        cleanup(prefix)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="signups (and profile updates) per mode")
+    args = parser.parse_args()
+
+    results = {mode: run_mode(mode, args.iterations) for mode in ("legacy", "single")}
+    print(json.dumps({"iterations": args.iterations, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Load-testing harness for the Tech Zolo API.
+
+Drives /auth/signup, /auth/login, /auth/me, /contact and /admin/contacts at
+a fixed concurrency for a fixed duration each. It reports throughput,
+p50/p95/p99 latency, status codes and the number of PostgreSQL backends
+connected to the database during the run. Results are written as JSON so
+runs from different commits can be compared with --compare.
+
+Run against a live server (start it with scripts/start_backend.py):
+    DATABASE_URL=postgresql://... python scripts/benchmarks/load_test.py --base-url http://localhost:8000
+
+Or drive the app in-process, without a server:
+    DATABASE_URL=postgresql://... python scripts/benchmarks/load_test.py --in-process
+
+The login scenario repeats one account from one address, so start the server
+with LOGIN_RATE_LIMIT_ENABLED=false or it measures 429s (--in-process does this).
+
+Compare two runs:
+    python scripts/benchmarks/load_test.py --compare results/old.json results/new.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_utils import summarize_latencies
+from db_pool import DATABASE_URL, build_dsn
+
+SCENARIOS = ("signup", "login", "me", "contact", "admin_contacts")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+PASSWORD = "benchmark-password"
+
+
+class ConnectionSampler:
+    """Samples the number of backends connected to the target database in a background thread."""
+
+    def __init__(self, database_url: str, interval: float = 0.25):
+        self.database_url = database_url
+        self.interval = interval
+        self.samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        conn = psycopg2.connect(build_dsn(self.database_url))
+        conn.autocommit = True
+        try:
+            cursor = conn.cursor()
+            while not self._stop.is_set():
+                cursor.execute(
+                    "SELECT COUNT(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()"
+                )
+                self.samples.append(cursor.fetchone()[0])
+                self._stop.wait(self.interval)
+        finally:
+            conn.close()
+
+    def __enter__(self):
+        self.samples = []
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {"max": 0, "avg": 0.0}
+        return {"max": max(self.samples), "avg": round(sum(self.samples) / len(self.samples), 2)}
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, concurrency: int, duration: float):
+        self.client = client
+        self.concurrency = concurrency
+        self.duration = duration
+        self.run_id = uuid.uuid4().hex[:8]
+        self._counter = itertools.count()
+        self.user_headers: Dict[str, str] = {}
+        self.admin_headers: Dict[str, str] = {}
+
+    def _email(self, kind: str) -> str:
+        return f"bench-{self.run_id}-{kind}-{next(self._counter)}@example.com"
+
+    async def setup(self):
+        """Create the regular and admin users the read scenarios authenticate as."""
+        self.login_email = self._email("login")
+        user = await self.client.post("/auth/signup", json={
+            "email": self.login_email, "password": PASSWORD, "full_name": "Benchmark User"})
+        user.raise_for_status()
+        self.user_headers = {"Authorization": f"Bearer {user.json()['access_token']}"}
+
+        admin = await self.client.post("/auth/signup", json={
+            "email": self._email("admin"), "password": PASSWORD, "full_name": "Benchmark Admin", "is_admin": True})
+        admin.raise_for_status()
+        self.admin_headers = {"Authorization": f"Bearer {admin.json()['access_token']}"}
+
+    async def request(self, scenario: str) -> httpx.Response:
+        if scenario == "signup":
+            return await self.client.post("/auth/signup", json={
+                "email": self._email("signup"), "password": PASSWORD, "full_name": "Benchmark Signup"})
+        if scenario == "login":
+            return await self.client.post("/auth/login", data={"username": self.login_email, "password": PASSWORD})
+        if scenario == "me":
+            return await self.client.get("/auth/me", headers=self.user_headers)
+        if scenario == "contact":
+            return await self.client.post("/contact", json={
+                "name": "Benchmark", "email": "bench@example.com", "subject": "Load test", "message": "Hello"})
+        if scenario == "admin_contacts":
+            return await self.client.get("/admin/contacts", params={"page_size": 20}, headers=self.admin_headers)
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    async def run_scenario(self, scenario: str) -> Dict[str, Any]:
+        latencies: List[float] = []
+        statuses: Counter = Counter()
+        errors: Counter = Counter()
+        deadline = time.perf_counter() + self.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await self.request(scenario)
+                    statuses[str(response.status_code)] += 1
+                except httpx.HTTPError as e:
+                    errors[type(e).__name__] += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+        return {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            **summarize_latencies(latencies),
+            "status_codes": dict(statuses),
+            "errors": dict(errors),
+        }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> Dict[str, Any]:
+    if args.in_process:
+        os.environ.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+        from backend_api import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://testserver"
+    else:
+        transport = None
+        base_url = args.base_url
+
+    scenarios = args.scenarios.split(",")
+    results: Dict[str, Any] = {}
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=args.timeout) as client:
+        test = LoadTest(client, args.concurrency, args.duration)
+        await test.setup()
+        for scenario in scenarios:
+            sampler = ConnectionSampler(args.database_url)
+            with sampler:
+                results[scenario] = await test.run_scenario(scenario)
+            results[scenario]["db_connections"] = sampler.summary()
+            print(f"{scenario:>15}: {results[scenario]['throughput_rps']:>8} req/s  "
+                  f"p50 {results[scenario]['p50_ms']}ms  p99 {results[scenario]['p99_ms']}ms  "
+                  f"db connections max {results[scenario]['db_connections']['max']}", file=sys.stderr)
+
+    return {
+        "git_commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "target": "in-process" if args.in_process else args.base_url,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "scenarios": scenarios,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(old_path: str, new_path: str) -> List[str]:
+    """Per-scenario deltas between two result files (positive latency change = slower)."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    lines = [f"{old.get('git_commit')} -> {new.get('git_commit')}"]
+    for scenario, after in new["scenarios"].items():
+        before = old["scenarios"].get(scenario)
+        if before is None:
+            lines.append(f"{scenario}: only in {new_path}")
+            continue
+        parts = []
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            was, now = before[metric], after[metric]
+            change = f"{(now - was) / was * 100:+.1f}%" if was else "n/a"
+            parts.append(f"{metric} {was} -> {now} ({change})")
+        lines.append(f"{scenario}: " + ", ".join(parts))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API to load (ignored with --in-process)")
+    parser.add_argument("--in-process", action="store_true", help="drive the ASGI app directly instead of over HTTP")
+    parser.add_argument("--database-url", default=DATABASE_URL, help="database whose connections are sampled")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run each scenario")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        print("\n".join(compare(*args.compare)))
+        return 0
+
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args))
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{results['git_commit'] or 'unknown'}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Buffered ingestion pipeline for contact form submissions.
+
+With CONTACT_INGEST_MODE=buffered, POST /contact acknowledges as soon as the
+submission is appended (and optionally fsync'd) to a local spool segment and
+queued in memory. A background thread flushes the queue to
+contact_submissions in multi-row batches when CONTACT_INGEST_BATCH_SIZE
+records are waiting or CONTACT_INGEST_FLUSH_SECONDS have passed.
+
+Delivery is at-least-once: a spool segment is only deleted after the batch it
+holds has committed, and segments left behind by a failed flush or a crash
+are replayed. Every submission carries a client-side ingest_id, and inserts
+use ON CONFLICT (ingest_id) DO NOTHING, so replays never create duplicates.
+
+CONTACT_INGEST_MAX_BUFFER bounds everything not yet in the database: the
+in-memory queue plus records in sealed segments waiting to be replayed. So
+while the database is down, POST /contact starts answering 503 instead of
+growing the spool without limit.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from psycopg2.extras import execute_values
+
+from app_logging import get_logger
+from db_pool import get_connection, require_postgresql
+from response_cache import response_cache
+from settings import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev setups only, so segments are not locked
+    fcntl = None
+
+settings = get_settings()
+CONTACT_INGEST_MODE = settings.get("CONTACT_INGEST_MODE", "direct").lower()
+CONTACT_INGEST_SPOOL_DIR = settings.get(
+    "CONTACT_INGEST_SPOOL_DIR", os.path.join(os.path.dirname(__file__), "contact_spool")
+)
+CONTACT_INGEST_BATCH_SIZE = settings.get_int("CONTACT_INGEST_BATCH_SIZE", 500)
+CONTACT_INGEST_FLUSH_SECONDS = settings.get_float("CONTACT_INGEST_FLUSH_SECONDS", 1.0)
+CONTACT_INGEST_MAX_BUFFER = settings.get_int("CONTACT_INGEST_MAX_BUFFER", 100000)
+CONTACT_INGEST_FSYNC = settings.get_flag("CONTACT_INGEST_FSYNC", True)
+
+logger = get_logger("contact_ingest")
+
+_FIELDS = ("ingest_id", "name", "email", "subject", "message", "phone")
+
+
+class IngestBacklogFull(Exception):
+    """Raised when too many submissions are waiting to be flushed."""
+
+
+class _Segment:
+    """One append-only spool file, exclusively locked while this process writes to it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def append(self, record: Dict[str, Any], fsync: bool):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+        if fsync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+def _remove_segment(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass  # A replaying worker got there first; the rows are deduplicated either way.
+
+
+class ContactIngestor:
+    """In-memory queue of submissions backed by spool segments on disk."""
+
+    def __init__(self, spool_dir: str = CONTACT_INGEST_SPOOL_DIR, batch_size: int = CONTACT_INGEST_BATCH_SIZE,
+                 flush_seconds: float = CONTACT_INGEST_FLUSH_SECONDS, max_buffer: int = CONTACT_INGEST_MAX_BUFFER,
+                 fsync: bool = CONTACT_INGEST_FSYNC):
+        self.spool_dir = spool_dir
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max_buffer
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._segment: Optional[_Segment] = None
+        self._needs_replay = False
+        # Records per sealed segment whose write failed and that await replay.
+        self._unflushed: Dict[str, int] = {}
+
+        self.accepted = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failed_flushes = 0
+        self.replayed = 0
+
+    def _new_segment(self) -> _Segment:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        name = f"segment-{time.time_ns()}-{os.getpid()}.ndjson"
+        return _Segment(os.path.join(self.spool_dir, name))
+
+    def submit(self, name: str, email: str, subject: str, message: str, phone: Optional[str] = None) -> str:
+        """Durably queue a submission and return its ingest id."""
+        record = {
+            "ingest_id": str(uuid.uuid4()),
+            "name": name,
+            "email": email,
+            "subject": subject,
+            "message": message,
+            "phone": phone,
+        }
+        with self._lock:
+            if len(self._buffer) + sum(self._unflushed.values()) >= self.max_buffer:
+                raise IngestBacklogFull("Contact ingestion backlog is full")
+            if self._segment is None:
+                self._segment = self._new_segment()
+            self._segment.append(record, self.fsync)
+            self._buffer.append(record)
+            self.accepted += 1
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+        return record["ingest_id"]
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> int:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            execute_values(
+                cursor,
+                """
+                INSERT INTO contact_submissions (ingest_id, name, email, subject, message, phone)
+                VALUES %s ON CONFLICT (ingest_id) DO NOTHING
+                """,
+                [tuple(record[field] for field in _FIELDS) for record in records],
+                page_size=self.batch_size,
+            )
+            inserted = cursor.rowcount
+            conn.commit()
+            if inserted:
+                response_cache.invalidate("contacts")
+            return inserted
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _forget_unflushed(self, path: str):
+        with self._lock:
+            self._unflushed.pop(path, None)
+
+    def _replay_segment(self, path: str) -> bool:
+        """Insert every record of a sealed or orphaned segment, then delete it."""
+        try:
+            handle = open(path, "r+", encoding="utf-8")
+        except FileNotFoundError:
+            self._forget_unflushed(path)  # Another worker already replayed it.
+            return True
+        records = []
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return True  # Still being written (or replayed) by a live process.
+            for line in handle:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # Torn final line from a crash mid-write: never acknowledged.
+            for start in range(0, len(records), self.batch_size):
+                self._write_batch(records[start:start + self.batch_size])
+            _remove_segment(path)
+            self._forget_unflushed(path)
+            self.replayed += len(records)
+            return True
+        except Exception as e:
+            self.failed_flushes += 1
+            with self._lock:
+                self._unflushed[path] = max(len(records), self._unflushed.get(path, 0))
+            logger.error("Error replaying contact spool segment %s: %s", path, e)
+            return False
+        finally:
+            handle.close()
+
+    def replay_spool(self) -> bool:
+        """Replay segments left by failed flushes or crashed processes; True if all succeeded."""
+        if not os.path.isdir(self.spool_dir):
+            return True
+        current = self._segment.path if self._segment else None
+        ok = True
+        for entry in sorted(os.listdir(self.spool_dir)):
+            path = os.path.join(self.spool_dir, entry)
+            if path != current and entry.endswith(".ndjson"):
+                ok = self._replay_segment(path) and ok
+        return ok
+
+    def flush(self) -> int:
+        """Seal the current segment and write its records to the database."""
+        with self._flush_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+                segment, self._segment = self._segment, None
+            if segment is None:
+                return 0
+            segment.close()
+            try:
+                for start in range(0, len(records), self.batch_size):
+                    self._write_batch(records[start:start + self.batch_size])
+                    self.batches += 1
+            except Exception as e:
+                # Leave the sealed segment on disk; the next cycle replays it.
+                self.failed_flushes += 1
+                self._needs_replay = True
+                with self._lock:
+                    self._unflushed[segment.path] = len(records)
+                logger.error("Error flushing contact submissions: %s", e)
+                return 0
+            _remove_segment(segment.path)
+            self.flushed += len(records)
+            return len(records)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            if self._needs_replay:
+                with self._flush_lock:
+                    self._needs_replay = not self.replay_spool()
+            self.flush()
+
+    def start(self):
+        """Recover any spooled submissions, then start the background flusher."""
+        require_postgresql("Buffered contact ingestion")
+        with self._flush_lock:
+            self.replay_spool()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="contact-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write out whatever is still queued."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = len(self._buffer)
+            unflushed = sum(self._unflushed.values())
+        return {
+            "mode": CONTACT_INGEST_MODE,
+            "queued": queued,
+            "awaiting_replay": unflushed,
+            "accepted": self.accepted,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failed_flushes": self.failed_flushes,
+            "replayed": self.replayed,
+        }
+
+
+contact_ingestor = ContactIngestor()
@@ -0,0 +1,319 @@
+"""
+Data access for contact form submissions.
+
+Listing uses keyset pagination on (created_at, id) so every page costs the
+same index range scan regardless of depth, and totals are read from the
+trigger-maintained contact_submission_counts table instead of a COUNT(*)
+over contact_submissions. Exports stream from a server-side cursor.
+
+Search matches the generated search_vector column through its GIN index, or
+an email/name prefix through the lower(...) text_pattern_ops indexes, and
+pages by (rank, id) the same way listings page by (created_at, id).
+"""
+
+import base64
+import csv
+import html
+import io
+import json
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from psycopg2.extras import DictCursor
+
+from db_pool import get_connection, require_postgresql
+
+CONTACT_COLUMNS = (
+    "id", "name", "email", "phone", "subject", "message",
+    "user_id", "status", "priority", "created_at", "updated_at",
+)
+CONTACT_STATUSES = ("new", "in_progress", "resolved", "closed")
+CONTACT_PRIORITIES = ("low", "medium", "high", "urgent")
+MAX_PAGE_SIZE = 100
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_FETCH_SIZE = 2000
+SEARCH_MAX_QUERY_LENGTH = 200
+# Sentinels that cannot occur in submitted text; swapped for <mark> after escaping.
+_HIGHLIGHT_START, _HIGHLIGHT_STOP = "\x02", "\x03"
+_HEADLINE_OPTIONS = f"StartSel={_HIGHLIGHT_START}, StopSel={_HIGHLIGHT_STOP}, MaxWords=35, MinWords=15, MaxFragments=2"
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _encode_position(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_position(cursor: str) -> List[Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+
+def encode_cursor(created_at: datetime, submission_id: int) -> str:
+    """Opaque cursor pointing just past the given row."""
+    return _encode_position([created_at.isoformat(), submission_id])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, submission_id = _decode_position(cursor)
+        return datetime.fromisoformat(created_at), int(submission_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+
+def encode_search_cursor(rank: float, submission_id: int) -> str:
+    """Opaque cursor pointing just past the given search result."""
+    return _encode_position([rank, submission_id])
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        rank, submission_id = _decode_position(cursor)
+        return float(rank), int(submission_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+
+def insert_submission(name: str, email: str, subject: str, message: str, phone: Optional[str] = None) -> int:
+    """Insert one contact form submission and return its id."""
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO contact_submissions (name, email, subject, message, phone)
+            VALUES (%s, %s, %s, %s, %s) RETURNING id
+        ''', (name, email, subject, message, phone))
+        submission_id = cursor.fetchone()[0]
+        conn.commit()
+        return submission_id
+    except Exception:
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+
+def _filters(status: Optional[str], priority: Optional[str]) -> Tuple[List[str], List[Any]]:
+    clauses, params = [], []
+    if status is not None:
+        clauses.append("status = %s")
+        params.append(status)
+    if priority is not None:
+        clauses.append("priority = %s")
+        params.append(priority)
+    return clauses, params
+
+
+def count_submissions(cursor, status: Optional[str] = None, priority: Optional[str] = None) -> int:
+    """Total matching submissions, read from the per-(status, priority) counters."""
+    clauses, params = _filters(status, priority)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor.execute(f"SELECT COALESCE(SUM(total), 0) FROM contact_submission_counts {where}", params)
+    return int(cursor.fetchone()[0])
+
+
+def fetch_page(page_size: int, after: Optional[str] = None, offset: int = 0,
+               status: Optional[str] = None, priority: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fetch one page of submissions, newest first.
+
+    ``after`` is a cursor returned by a previous call. ``offset`` is only kept
+    for the legacy ``page`` parameter and is ignored when a cursor is given.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    clauses, params = _filters(status, priority)
+    if after is not None:
+        created_at, submission_id = decode_cursor(after)
+        clauses.append("(created_at, id) < (%s, %s)")
+        params.extend([created_at, submission_id])
+        offset = 0
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(cursor_factory=DictCursor)
+        # Fetch one extra row to learn whether another page exists.
+        cursor.execute(
+            f"SELECT {', '.join(CONTACT_COLUMNS)} FROM contact_submissions {where} "
+            "ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s",
+            params + [page_size + 1, max(0, offset)],
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+        has_more = len(rows) > page_size
+        submissions = rows[:page_size]
+        next_cursor = None
+        if has_more:
+            last = submissions[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+
+        total = count_submissions(cursor, status, priority)
+        return {"submissions": submissions, "total": total, "next_cursor": next_cursor}
+    finally:
+        if conn:
+            conn.close()
+
+
+def _highlight(snippet: Optional[str]) -> Optional[str]:
+    """HTML-escape a ts_headline snippet, marking matches with <mark>."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_HIGHLIGHT_START, "<mark>").replace(_HIGHLIGHT_STOP, "</mark>")
+
+
+def _like_prefix(text: str) -> str:
+    escaped = text.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def search_submissions(query: str, page_size: int, after: Optional[str] = None,
+                       status: Optional[str] = None, priority: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Ranked search over subject, name, email and message, best match first.
+
+    ``query`` uses web search syntax ("quoted phrases", -excluded, or). A
+    submission also matches when its email or name starts with the query;
+    those matches rank above text-only ones. Each result carries ``rank``
+    and HTML-safe ``subject_highlight``/``message_highlight`` snippets with
+    matches wrapped in <mark>.
+    """
+    require_postgresql("Contact search")
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    clauses, params = _filters(status, priority)
+    filters = "".join(f" AND {clause}" for clause in clauses)
+    keyset, keyset_params = "", []
+    if after is not None:
+        keyset = "WHERE (rank, id) < (%s, %s)"
+        keyset_params = list(decode_search_cursor(after))
+    prefix = _like_prefix(query)
+    columns = ", ".join(CONTACT_COLUMNS)
+
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(cursor_factory=DictCursor)
+        # Rank every match, keep one page, and only then build the (costly) headlines.
+        cursor.execute(
+            f"""
+            SELECT {columns}, rank,
+                   ts_headline('english', subject, tsq, %s) AS subject_highlight,
+                   ts_headline('english', message, tsq, %s) AS message_highlight
+            FROM (
+                SELECT * FROM (
+                    SELECT {columns}, tsq,
+                           (ts_rank_cd(search_vector, tsq)
+                            + CASE WHEN lower(email) LIKE %s OR lower(name) LIKE %s THEN 1 ELSE 0 END)::float8 AS rank
+                    FROM contact_submissions, websearch_to_tsquery('english', %s) AS tsq
+                    WHERE (search_vector @@ tsq OR lower(email) LIKE %s OR lower(name) LIKE %s){filters}
+                ) matches
+                {keyset}
+                ORDER BY rank DESC, id DESC
+                LIMIT %s
+            ) page
+            ORDER BY rank DESC, id DESC
+            """,
+            [_HEADLINE_OPTIONS, _HEADLINE_OPTIONS, prefix, prefix, query, prefix, prefix]
+            + params + keyset_params + [page_size + 1],
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+    finally:
+        if conn:
+            conn.close()
+
+    has_more = len(rows) > page_size
+    results = rows[:page_size]
+    for row in results:
+        row["subject_highlight"] = _highlight(row["subject_highlight"])
+        row["message_highlight"] = _highlight(row["message_highlight"])
+    next_cursor = encode_search_cursor(results[-1]["rank"], results[-1]["id"]) if has_more else None
+    return {"results": results, "next_cursor": next_cursor}
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """created_at is a naive UTC TIMESTAMP; an aware bound would be compared in the session time zone."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _export_filters(start: Optional[datetime], end: Optional[datetime],
+                    status: Optional[str]) -> Tuple[str, List[Any]]:
+    clauses, params = _filters(status, None)
+    if start is not None:
+        clauses.append("created_at >= %s")
+        params.append(_naive_utc(start))
+    if end is not None:
+        clauses.append("created_at < %s")
+        params.append(_naive_utc(end))
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def _encode_rows(fmt: str, rows: List[tuple], header: bool) -> str:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(CONTACT_COLUMNS)
+        for row in rows:
+            writer.writerow(["" if value is None else value.isoformat() if isinstance(value, datetime) else value
+                             for value in row])
+        return buffer.getvalue()
+    return "".join(
+        json.dumps(dict(zip(CONTACT_COLUMNS, row)), default=lambda value: value.isoformat(), separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def iter_export(fmt: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                status: Optional[str] = None, gzip: bool = False,
+                fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[bytes]:
+    """
+    Stream matching submissions as CSV or NDJSON chunks.
+
+    Rows come from a named (server-side) cursor, fetch_size at a time, so
+    memory stays flat however large the table is. With gzip=True the chunks
+    are compressed on the fly into a single gzip member. start and end may
+    carry a UTC offset; naive values are taken as UTC.
+
+    PostgreSQL only: other backends have no server-side cursors and would
+    buffer the whole result. The check runs here, before the first chunk.
+    """
+    require_postgresql("Contact export")
+    return _stream_export(fmt, *_export_filters(start, end, status), gzip, fetch_size)
+
+
+def _stream_export(fmt: str, where: str, params: List[Any], gzip: bool, fetch_size: int) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31: gzip container
+    conn = get_connection()
+    try:
+        cursor = conn.cursor(name=f"contact_export_{uuid.uuid4().hex}")
+        cursor.itersize = fetch_size
+        cursor.execute(
+            f"SELECT {', '.join(CONTACT_COLUMNS)} FROM contact_submissions {where} ORDER BY created_at, id",
+            params,
+        )
+        header = fmt == "csv"
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows and not header:
+                break
+            chunk = _encode_rows(fmt, rows, header).encode("utf-8")
+            header = False
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        if compressor is not None:
+            yield compressor.flush()
+        cursor.close()
+    finally:
+        conn.close()
@@ -0,0 +1,468 @@
+"""
+Process-wide PostgreSQL connection pool shared by backend_api and DatabaseManager.
+
+Connections are opened lazily up to DB_POOL_MAX_SIZE, health-checked on
+checkout when they have been idle for a while, and recycled once they sit idle
+past DB_POOL_MAX_IDLE_SECONDS or exceed DB_POOL_MAX_LIFETIME_SECONDS.
+
+Checkouts are timed as the db_connect phase and cursor round trips as
+db_query (see metrics.py).
+
+A ``sqlite:///path`` DATABASE_URL swaps in the embedded SQLite pool from
+sqlite_pool.py behind the same get_connection() interface. Code that needs
+PostgreSQL-only features calls require_postgresql() first.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, quote_plus
+
+import psycopg2
+
+from metrics import record_phase, timed
+from settings import get_settings
+
+settings = get_settings()
+DATABASE_URL = settings.database_url
+DB_POOL_MIN_SIZE = settings.get_int("DB_POOL_MIN_SIZE", 1)
+DB_POOL_MAX_SIZE = settings.get_int("DB_POOL_MAX_SIZE", 10)
+DB_POOL_TIMEOUT = settings.get_float("DB_POOL_TIMEOUT", 10)
+DB_POOL_MAX_IDLE_SECONDS = settings.get_float("DB_POOL_MAX_IDLE_SECONDS", 300)
+DB_POOL_MAX_LIFETIME_SECONDS = settings.get_float("DB_POOL_MAX_LIFETIME_SECONDS", 3600)
+DB_POOL_HEALTHCHECK_AFTER_SECONDS = settings.get_float("DB_POOL_HEALTHCHECK_AFTER_SECONDS", 30)
+
+
+SQLITE_URL_PREFIX = "sqlite:///"
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class UnsupportedByDatabase(Exception):
+    """Raised when a feature that needs PostgreSQL is used on another database."""
+
+    def __init__(self, feature: str):
+        super().__init__(f"{feature} requires PostgreSQL")
+        self.feature = feature
+
+
+def is_sqlite_url(database_url: str) -> bool:
+    return database_url.startswith(SQLITE_URL_PREFIX)
+
+
+def sqlite_path(database_url: str) -> str:
+    """File path of a sqlite:/// URL (sqlite:///relative.db, sqlite:////absolute.db)."""
+    return database_url[len(SQLITE_URL_PREFIX):]
+
+
+def build_dsn(database_url: str) -> str:
+    """Return the connection URL with the password percent-encoded."""
+    parsed_url = urlparse(database_url)
+    if not parsed_url.password:
+        return database_url
+
+    encoded_password = quote_plus(parsed_url.password)
+    netloc = f"{parsed_url.username}:{encoded_password}@{parsed_url.hostname}"
+    if parsed_url.port:
+        netloc = f"{netloc}:{parsed_url.port}"
+    return parsed_url._replace(netloc=netloc).geturl()
+
+
+class _PoolEntry:
+    """A raw connection plus the bookkeeping the pool needs to recycle it."""
+
+    __slots__ = ("conn", "created_at", "last_used_at")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+
+
+class _TimedCursor:
+    """Cursor proxy that charges execute and fetch round trips to the db_query phase."""
+
+    __slots__ = ("_cursor",)
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def _timed(self, method, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record_phase("db_query", time.perf_counter() - started)
+
+    def execute(self, *args, **kwargs):
+        return self._timed(self._cursor.execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._timed(self._cursor.executemany, *args, **kwargs)
+
+    def copy_expert(self, *args, **kwargs):
+        return self._timed(self._cursor.copy_expert, *args, **kwargs)
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed(self._cursor.fetchmany, *args, **kwargs)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall)
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled psycopg2 connection.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to the pool instead of tearing down the socket, so the
+    existing ``try / finally: conn.close()`` call sites keep working unchanged.
+    """
+
+    dialect = "postgresql"
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return getattr(self._entry.conn, name)
+
+    def cursor(self, *args, **kwargs):
+        """A cursor on the pooled connection whose round trips are timed."""
+        if self._entry is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return _TimedCursor(self._entry.conn.cursor(*args, **kwargs))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._entry is not None:
+            if exc_type is None:
+                self._entry.conn.commit()
+            else:
+                self._entry.conn.rollback()
+        self.close()
+
+    @property
+    def closed(self):
+        return self._entry is None or self._entry.conn.closed
+
+    def close(self):
+        """Return the connection to the pool."""
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry)
+
+    def __del__(self):
+        # Safety net for call sites that forget to close: never leak a slot.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of PostgreSQL connections."""
+
+    dialect = "postgresql"
+
+    def __init__(
+        self,
+        database_url: str,
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        timeout: float = DB_POOL_TIMEOUT,
+        max_idle: float = DB_POOL_MAX_IDLE_SECONDS,
+        max_lifetime: float = DB_POOL_MAX_LIFETIME_SECONDS,
+        healthcheck_after: float = DB_POOL_HEALTHCHECK_AFTER_SECONDS,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.dsn = build_dsn(database_url)
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.healthcheck_after = healthcheck_after
+
+        self._idle = deque()
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._opened = 0
+        self._recycled = 0
+        self._failed_healthchecks = 0
+        self._peak_in_use = 0
+
+    def _connect(self) -> _PoolEntry:
+        return _PoolEntry(psycopg2.connect(self.dsn))
+
+    def _discard(self, entry: _PoolEntry):
+        """Close a connection the pool has let go of. Called without the lock: close() can block."""
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _is_expired(self, entry: _PoolEntry, now: float) -> bool:
+        if entry.conn.closed:
+            return True
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            return True
+        return False
+
+    def _is_healthy(self, entry: _PoolEntry, now: float) -> bool:
+        """
+        Ping connections that have been idle long enough to have been dropped server-side.
+
+        Called without the lock: a half-dead connection can take up to the TCP
+        timeout to answer, and other checkouts must not wait behind it.
+        """
+        if entry.conn.closed:
+            return False
+        if now - entry.last_used_at < self.healthcheck_after:
+            return True
+        try:
+            with entry.conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            entry.conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _prune_idle(self, now: float) -> List[_PoolEntry]:
+        """
+        Take connections idle past max_idle off the stack, keeping min_size warm.
+
+        Caller holds the lock and closes the returned entries after releasing it.
+        """
+        if not self.max_idle:
+            return []
+        kept, pruned = deque(), []
+        while self._idle:
+            entry = self._idle.popleft()
+            if self._size > self.min_size and now - entry.last_used_at > self.max_idle:
+                self._size -= 1
+                self._recycled += 1
+                pruned.append(entry)
+            else:
+                kept.append(entry)
+        self._idle = kept
+        return pruned
+
+    def _reserve(self, deadline: float) -> Optional[_PoolEntry]:
+        """
+        Claim an idle connection, or reserve a slot for a new one (returns None).
+
+        Either way the slot already counts as in use when this returns, so
+        the caller can check or open the connection without holding the lock.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.InterfaceError("connection pool is closed")
+                if self._idle:
+                    # LIFO keeps a hot working set and lets the tail age out.
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a database connection "
+                        f"(pool max size {self.max_size})"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def _drop_slot(self, entry: Optional[_PoolEntry] = None, failed_healthcheck: bool = False):
+        """Give up a reserved slot (closing entry, if any, outside the lock) and wake a waiter."""
+        if entry is not None:
+            self._discard(entry)
+        with self._cond:
+            self._size -= 1
+            if entry is not None:
+                self._recycled += 1
+            if failed_healthcheck:
+                self._failed_healthchecks += 1
+            self._cond.notify()
+
+    def getconn(self) -> PooledConnection:
+        """Check a connection out of the pool, opening a new one if there is room."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            pruned = self._prune_idle(time.monotonic())
+        for entry in pruned:
+            self._discard(entry)
+        while True:
+            entry = self._reserve(deadline)
+            if entry is None:
+                try:
+                    entry = self._connect()
+                except Exception:
+                    self._drop_slot()
+                    raise
+                with self._cond:
+                    self._opened += 1
+                break
+            now = time.monotonic()
+            if self._is_expired(entry, now):
+                self._drop_slot(entry)
+            elif not self._is_healthy(entry, now):
+                self._drop_slot(entry, failed_healthcheck=True)
+            else:
+                break
+
+        with self._cond:
+            self._checkouts += 1
+            in_use = self._size - len(self._idle)
+            self._peak_in_use = max(self._peak_in_use, in_use)
+        return PooledConnection(self, entry)
+
+    def _release(self, entry: _PoolEntry):
+        """Reset a returned connection and put it back on the idle stack."""
+        reusable = not entry.conn.closed
+        if reusable:
+            try:
+                # Never hand out a connection with an open or aborted transaction.
+                entry.conn.rollback()
+            except psycopg2.Error:
+                reusable = False
+
+        with self._cond:
+            now = time.monotonic()
+            if reusable and not self._closed and not self._is_expired(entry, now):
+                entry.last_used_at = now
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._drop_slot(entry)
+
+    def warm_up(self):
+        """Open min_size connections ahead of the first request."""
+        conns = [self.getconn() for _ in range(self.min_size)]
+        for conn in conns:
+            conn.close()
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool occupancy and lifetime counters."""
+        with self._cond:
+            idle = len(self._idle)
+            in_use = self._size - idle
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": in_use,
+                "idle": idle,
+                "waiting": self._waiting,
+                "saturation": round(in_use / self.max_size, 3),
+                "peak_in_use": self._peak_in_use,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "connections_opened": self._opened,
+                "connections_recycled": self._recycled,
+                "failed_healthchecks": self._failed_healthchecks,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def create_pool(database_url: str):
+    """A PostgreSQL pool, or the SQLite pool for a sqlite:/// URL."""
+    if is_sqlite_url(database_url):
+        from sqlite_pool import SQLitePool
+        return SQLitePool(sqlite_path(database_url))
+    return ConnectionPool(database_url)
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = create_pool(DATABASE_URL)
+    return _pool
+
+
+def dialect() -> str:
+    """"postgresql" or "sqlite": the database behind the process-wide pool."""
+    return get_pool().dialect
+
+
+def require_postgresql(feature: str):
+    """Raise UnsupportedByDatabase unless the process-wide pool is PostgreSQL."""
+    if dialect() != "postgresql":
+        raise UnsupportedByDatabase(feature)
+
+
+def get_connection() -> PooledConnection:
+    """Check out a connection from the process-wide pool."""
+    with timed("db_connect"):
+        return get_pool().getconn()
+
+
+def set_pool(pool: Optional[ConnectionPool]) -> Optional[ConnectionPool]:
+    """Install pool as the process-wide pool (tests inject one); returns the previous pool."""
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    return previous
+
+
+def close_pool():
+    """Close the process-wide pool (used on shutdown and by tests)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
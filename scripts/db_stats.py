@@ -0,0 +1,209 @@
+"""
+Database statistics without table scans.
+
+Row counts come from the trigger-maintained contact_submission_counts table
+where one exists (exact). Other tables use the statistics collector's
+n_live_tup, falling back to pg_class.reltuples, both of which are estimates.
+Table and index sizes come from the catalog size functions. Everything is
+read from the catalogs over one pooled connection, and the result is cached
+for DB_STATS_TTL_SECONDS.
+
+Each refresh is also kept as a sample, up to DB_STATS_HISTORY of them.
+Growth rates are the change in rows and in the cumulative insert/delete
+counters between the oldest retained sample and the newest one.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from psycopg2.extras import DictCursor
+
+from db_pool import get_connection, require_postgresql
+from settings import get_settings
+
+settings = get_settings()
+DB_STATS_TTL_SECONDS = settings.get_float("DB_STATS_TTL_SECONDS", 60)
+DB_STATS_HISTORY = settings.get_int("DB_STATS_HISTORY", 60)
+
+TRACKED_TABLES = (
+    "users", "user_sessions", "contact_submissions", "user_projects", "user_preferences", "activity_logs",
+)
+
+# Tables whose exact row count is maintained by triggers: table -> query returning it.
+_EXACT_COUNTS = {
+    "contact_submissions": "SELECT COALESCE(SUM(total), 0) FROM contact_submission_counts",
+}
+
+# Partitioned tables (activity_logs) are reported as one table: statistics and
+# sizes are summed over their leaf partitions. pg_partition_tree() returns no
+# rows for a plain table, which then stands for itself.
+_TABLES_QUERY = """
+    SELECT c.relname AS name,
+           SUM(GREATEST(leaf.reltuples, 0))::bigint AS reltuples,
+           SUM(s.n_live_tup) AS n_live_tup, SUM(s.n_dead_tup) AS n_dead_tup,
+           SUM(s.n_tup_ins) AS n_tup_ins, SUM(s.n_tup_del) AS n_tup_del,
+           SUM(pg_table_size(leaf.oid))::bigint AS table_bytes,
+           SUM(pg_indexes_size(leaf.oid))::bigint AS index_bytes,
+           SUM(pg_total_relation_size(leaf.oid))::bigint AS total_bytes,
+           MAX(GREATEST(s.last_analyze, s.last_autoanalyze)) AS last_analyzed
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN LATERAL pg_partition_tree(c.oid) tree ON TRUE
+    JOIN pg_class leaf ON leaf.oid = COALESCE(tree.relid, c.oid)
+    LEFT JOIN pg_stat_user_tables s ON s.relid = leaf.oid
+    WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p') AND c.relname = ANY(%s)
+      AND (tree.relid IS NULL OR tree.isleaf)
+    GROUP BY c.relname
+"""
+
+_INDEXES_QUERY = """
+    SELECT root.relname AS table_name, root_index.relname AS name,
+           SUM(pg_relation_size(s.indexrelid))::bigint AS bytes, SUM(s.idx_scan)::bigint AS scans
+    FROM pg_stat_user_indexes s
+    JOIN pg_class root ON root.oid = COALESCE(pg_partition_root(s.relid), s.relid)
+    JOIN pg_class root_index ON root_index.oid = COALESCE(pg_partition_root(s.indexrelid), s.indexrelid)
+    WHERE s.schemaname = current_schema() AND root.relname = ANY(%s)
+    GROUP BY root.relname, root_index.relname
+    ORDER BY root.relname, root_index.relname
+"""
+
+
+def _estimate_rows(row: Dict[str, Any]) -> Tuple[int, str]:
+    if row["n_live_tup"] is not None:
+        return int(row["n_live_tup"]), "pg_stat_user_tables"
+    # reltuples is -1 until the table is first vacuumed or analyzed (clamped to 0 in the query).
+    return int(row["reltuples"]), "pg_class"
+
+
+class DatabaseStats:
+    """TTL-cached table statistics plus a short history for growth rates."""
+
+    def __init__(self, tables: Sequence[str] = TRACKED_TABLES, ttl: float = DB_STATS_TTL_SECONDS,
+                 history: int = DB_STATS_HISTORY):
+        self.tables = tuple(tables)
+        self.ttl = ttl
+        self._samples: Deque[Tuple[float, Dict[str, Dict[str, int]]]] = deque(maxlen=max(2, history))
+        self._cached: Optional[Dict[str, Any]] = None
+        self._cached_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self.refreshes = 0
+
+    def _collect(self) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        require_postgresql("Database statistics")
+        conn = get_connection()
+        try:
+            cursor = conn.cursor(cursor_factory=DictCursor)
+            cursor.execute(_TABLES_QUERY, (list(self.tables),))
+            tables = {row["name"]: dict(row) for row in cursor.fetchall()}
+            cursor.execute(_INDEXES_QUERY, (list(self.tables),))
+            for row in cursor.fetchall():
+                if row["table_name"] in tables:
+                    tables[row["table_name"]].setdefault("indexes", []).append(
+                        {"name": row["name"], "bytes": row["bytes"], "scans": row["scans"]}
+                    )
+            for table, query in _EXACT_COUNTS.items():
+                if table in tables:
+                    cursor.execute(query)
+                    tables[table]["exact_rows"] = int(cursor.fetchone()[0])
+            cursor.execute("SELECT pg_database_size(current_database())")
+            database_bytes = cursor.fetchone()[0]
+            conn.commit()
+            return tables, database_bytes
+        finally:
+            conn.close()
+
+    def _growth(self, table: str, now: float, current: Dict[str, int]) -> Dict[str, Any]:
+        oldest_at, oldest = self._samples[0]
+        previous = oldest.get(table)
+        window = now - oldest_at
+        if previous is None or window <= 0:
+            return {"window_seconds": 0.0, "rows_per_hour": None, "inserts_per_hour": None, "deletes_per_hour": None}
+        per_hour = 3600.0 / window
+        return {
+            "window_seconds": round(window, 3),
+            "rows_per_hour": round((current["rows"] - previous["rows"]) * per_hour, 2),
+            "inserts_per_hour": round((current["inserts"] - previous["inserts"]) * per_hour, 2),
+            "deletes_per_hour": round((current["deletes"] - previous["deletes"]) * per_hour, 2),
+        }
+
+    def refresh(self) -> Dict[str, Any]:
+        """Read fresh statistics, record a growth sample and replace the cache."""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self) -> Dict[str, Any]:
+        collected, database_bytes = self._collect()
+        now = time.monotonic()
+        sample: Dict[str, Dict[str, int]] = {}
+        tables: List[Dict[str, Any]] = []
+        for name in self.tables:
+            row = collected.get(name)
+            if row is None:
+                continue  # Not created in this schema.
+            if "exact_rows" in row:
+                rows, source = row["exact_rows"], "counter"
+            else:
+                rows, source = _estimate_rows(row)
+            sample[name] = {"rows": rows, "inserts": int(row["n_tup_ins"] or 0), "deletes": int(row["n_tup_del"] or 0)}
+            tables.append({
+                "name": name,
+                "rows": rows,
+                "rows_source": source,
+                "exact": source == "counter",
+                "dead_rows": int(row["n_dead_tup"] or 0),
+                "table_bytes": row["table_bytes"],
+                "index_bytes": row["index_bytes"],
+                "total_bytes": row["total_bytes"],
+                "indexes": row.get("indexes", []),
+                "last_analyzed": row["last_analyzed"].isoformat() if row["last_analyzed"] else None,
+            })
+
+        with self._lock:
+            if not self._samples:
+                self._samples.append((now, sample))
+            for table in tables:
+                table["growth"] = self._growth(table["name"], now, sample[table["name"]])
+            if now > self._samples[-1][0]:
+                self._samples.append((now, sample))
+            result = {
+                "database_bytes": database_bytes,
+                "tables": tables,
+                "collected_at": datetime.now(timezone.utc).isoformat(),
+                "ttl_seconds": self.ttl,
+            }
+            self._cached, self._cached_at = result, now
+            self.refreshes += 1
+            return result
+
+    def get(self, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Cached statistics, refreshed when older than max_age (default: the TTL)."""
+        max_age = self.ttl if max_age is None else max_age
+        cached = self._fresh(max_age)
+        if cached is not None:
+            return cached
+        with self._refresh_lock:
+            # Concurrent callers wait for one refresh instead of each running their own.
+            cached = self._fresh(max_age)
+            return cached if cached is not None else self._refresh()
+
+    def _fresh(self, max_age: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._cached is not None and time.monotonic() - self._cached_at < max_age:
+                return self._cached
+            return None
+
+    def row_counts(self) -> Dict[str, int]:
+        return {table["name"]: table["rows"] for table in self.get()["tables"]}
+
+    def clear(self):
+        with self._lock:
+            self._cached = None
+            self._cached_at = 0.0
+            self._samples.clear()
+
+
+database_stats = DatabaseStats()
@@ -1,6 +1,10 @@
-import os
+import sys
+
 import psycopg2
 
+from migrate import MigrationError, migrate
+from settings import get_settings
+
 def execute_sql_file(database_url, sql_file_path):
     try:
         conn = psycopg2.connect(database_url)
@@ -16,6 +20,10 @@ def execute_sql_file(database_url, sql_file_path):
         print(f"Error executing SQL file: {e}")
 
 if __name__ == "__main__":
-    database_url = "postgresql://TechZolo2025@db.zsojqptmwdmvdlokhzir.supabase.co:5432/postgres"
-    sql_file = "c:\\Users\\vikas\\Downloads\\tech-zolo\\scripts\\database_schema.sql"
-    execute_sql_file(database_url, sql_file)
\ No newline at end of file
+    # The schema is versioned under scripts/migrations; apply whatever is pending.
+    database_url = get_settings().database_url
+    try:
+        migrate(database_url)
+    except MigrationError as e:
+        print(f"Error applying migrations: {e}")
+        sys.exit(1)
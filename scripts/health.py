@@ -0,0 +1,108 @@
+"""
+Liveness, readiness and cached statistics for the health endpoints.
+
+Load balancers poll the probes every second on every worker, so neither
+probe may cost a query per call. /healthz does no I/O at all. /readyz pings
+the database through the pool, caches the outcome for
+READINESS_CACHE_SECONDS and gives up after READINESS_TIMEOUT_SECONDS.
+Expensive numbers such as the user count sit behind CachedValue, which
+recomputes at most once per TTL however many requests ask concurrently.
+"""
+
+import asyncio
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+import async_db
+from db_pool import get_connection
+from settings import get_settings
+
+settings = get_settings()
+READINESS_CACHE_SECONDS = settings.get_float("READINESS_CACHE_SECONDS", 1)
+READINESS_TIMEOUT_SECONDS = settings.get_float("READINESS_TIMEOUT_SECONDS", 2)
+STATS_CACHE_SECONDS = settings.get_float("STATS_CACHE_SECONDS", 60)
+
+T = TypeVar("T")
+
+
+class CachedValue(Generic[T]):
+    """Async value recomputed at most once per TTL; concurrent callers share one computation."""
+
+    def __init__(self, compute: Callable[[], Awaitable[T]], ttl: float):
+        self.compute = compute
+        self.ttl = ttl
+        self._value: Optional[T] = None
+        self._computed_at = 0.0
+        # asyncio locks belong to one event loop; keep one per loop the value is read from.
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+    async def get(self) -> T:
+        if self._value is not None and time.monotonic() - self._computed_at < self.ttl:
+            return self._value
+        lock = self._locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+        async with lock:
+            # Another caller may have refreshed it while we waited for the lock.
+            if self._value is None or time.monotonic() - self._computed_at >= self.ttl:
+                self._value = await self.compute()
+                self._computed_at = time.monotonic()
+            return self._value
+
+    def age(self) -> float:
+        return time.monotonic() - self._computed_at if self._value is not None else 0.0
+
+    def clear(self):
+        self._value = None
+        self._computed_at = 0.0
+
+
+def _ping():
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
+        conn.close()
+
+
+class ReadinessProbe:
+    """Cached database ping that never has more than one ping in flight."""
+
+    def __init__(self, cache_seconds: float = READINESS_CACHE_SECONDS, timeout: float = READINESS_TIMEOUT_SECONDS):
+        self.cache_seconds = cache_seconds
+        self.timeout = timeout
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+
+    async def check(self) -> Dict[str, Any]:
+        """{"ready": bool, ...}; served from cache within cache_seconds of the last ping."""
+        now = time.monotonic()
+        if self._result is not None and now - self._checked_at < self.cache_seconds:
+            return self._result
+
+        # A ping stuck on a dead database keeps its thread busy until the pool
+        # times out; reuse it rather than piling new pings onto the executor.
+        if (self._inflight is None or self._inflight.done()
+                or self._inflight.get_loop() is not asyncio.get_running_loop()):
+            self._inflight = asyncio.ensure_future(async_db.run_sync(_ping))
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._inflight), self.timeout)
+            result = {"ready": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        except asyncio.TimeoutError:
+            result = {"ready": False, "error": f"database ping timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"ready": False, "error": str(e)}
+
+        self._result = result
+        self._checked_at = time.monotonic()
+        return result
+
+    def clear(self):
+        self._result = None
+        self._checked_at = 0.0
+
+
+readiness_probe = ReadinessProbe()
@@ -0,0 +1,241 @@
+"""
+Request tracing and Prometheus metrics.
+
+TracingMiddleware times every HTTP request. While a request runs, a context
+variable holds a RequestTrace, so the layers underneath can charge time to
+named phases without having the request passed to them. The phases are
+db_connect (pool checkout), db_query (cursor round trips), bcrypt,
+jwt_encode and jwt_decode. Per-route latency and per-phase totals are kept
+in in-process histograms. GET /metrics renders them in the Prometheus text
+exposition format.
+
+Instrument a block with ``with timed("bcrypt"): ...``, or call
+record_phase() with a duration you already measured. Outside a request only
+the process-wide per-phase histogram is updated.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from settings import get_settings
+
+settings = get_settings()
+METRICS_BUCKETS = tuple(
+    float(bound) for bound in settings.get(
+        "METRICS_BUCKETS", "0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10"
+    ).split(",")
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class _Series:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Labelled histogram with fixed upper bounds, rendered with cumulative buckets."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = METRICS_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = _Series(len(self.buckets))
+            if index < len(self.buckets):
+                series.counts[index] += 1
+            series.sum += value
+            series.count += 1
+
+    def samples(self, *labelvalues: str) -> Tuple[int, float]:
+        """(count, sum) observed for one label combination."""
+        with self._lock:
+            series = self._series.get(labelvalues)
+            return (series.count, series.sum) if series else (0, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s.counts), s.sum, s.count) for labels, s in sorted(self._series.items())]
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.labelnames + ("le",), labels + ("+Inf",))
+            lines.append(f"{self.name}_bucket{le} {count}")
+            base = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_format_value(total)}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.callback())
+        except Exception:
+            return []  # A failing collector must not break the scrape.
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_format_value(value)}"]
+
+
+_registry: List = []
+_registry_lock = threading.Lock()
+
+
+def register(metric):
+    """Add a metric to the set rendered by render_metrics(); returns it."""
+    with _registry_lock:
+        if all(existing.name != metric.name for existing in _registry):
+            _registry.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    with _registry_lock:
+        metrics = list(_registry)
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+request_duration = register(Histogram(
+    "http_request_duration_seconds", "Time to serve an HTTP request.", ("method", "route", "status"),
+))
+request_phase_duration = register(Histogram(
+    "http_request_phase_duration_seconds", "Time one HTTP request spent in each phase.", ("route", "phase"),
+))
+phase_duration = register(Histogram(
+    "phase_duration_seconds", "Duration of individual instrumented operations.", ("phase",),
+))
+
+
+class RequestTrace:
+    """Seconds spent per phase by one request."""
+
+    __slots__ = ("phases",)
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float):
+        # A request's phases run one after another, even when they hop to a worker thread.
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """The trace of the request being served, or None outside a request."""
+    return _current_trace.get()
+
+
+def record_phase(phase: str, seconds: float):
+    """Charge an already measured duration to a phase."""
+    phase_duration.observe(seconds, phase)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(phase, seconds)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Time the enclosed block as one operation of the given phase."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - started)
+
+
+_route_labels: Dict[Callable, str] = {}
+
+
+def _route_label(scope) -> str:
+    """Path template of the matched route, so label cardinality stays bounded."""
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return "unmatched"
+    label = _route_labels.get(endpoint)
+    if label is None:
+        label = next((route.path for route in app.router.routes
+                      if getattr(route, "endpoint", None) is endpoint), "unmatched")
+        _route_labels[endpoint] = label
+    return label
+
+
+class TracingMiddleware:
+    """ASGI middleware recording request latency and the per-phase breakdown."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_trace.reset(token)
+            route = _route_label(scope)
+            request_duration.observe(elapsed, scope["method"], route, str(status_code))
+            for phase, seconds in trace.phases.items():
+                request_phase_duration.observe(seconds, route, phase)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations.
+
+Migrations live in scripts/migrations as NNNN_description.sql and are applied
+in version order. Each applied migration is recorded in schema_migrations
+with the SHA-256 of its file, and editing a migration after it has been
+applied is an error. A deploy therefore only runs the migrations it has not
+seen yet, and never drops or rewrites existing tables.
+
+By default a migration runs in a single transaction with a short
+lock_timeout, so a blocked DDL statement fails fast instead of queueing every
+query behind it. A file whose first line is ``-- migrate:no-transaction``
+runs statement by statement in autocommit mode instead. This is required for
+CREATE INDEX CONCURRENTLY, which builds an index without blocking writes.
+Such files must be safe to re-run (use IF [NOT] EXISTS), since an
+interruption leaves them partly applied. A session-level advisory lock stops
+two deploys from migrating at once.
+
+    python scripts/migrate.py            # apply pending migrations
+    python scripts/migrate.py status     # list applied and pending migrations
+
+For a sqlite:/// DATABASE_URL the files in migrations/sqlite are applied
+instead, tracked with PRAGMA user_version (see sqlite_pool.py).
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+
+from db_pool import DATABASE_URL, build_dsn, is_sqlite_url, sqlite_path
+from settings import get_settings
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+settings = get_settings()
+MIGRATION_LOCK_TIMEOUT = settings.get("MIGRATION_LOCK_TIMEOUT", "5s")
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+
+# Key for pg_advisory_lock, shared by every process that runs migrations.
+_ADVISORY_LOCK_KEY = 7_141_026_001
+_FILENAME = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+
+# Databases created from the old single schema file have the tables of 0001 but no
+# schema_migrations table; the presence of this table marks them as already at 0001.
+_BASELINE_VERSION = 1
+_BASELINE_TABLE = "users"
+
+
+class MigrationError(Exception):
+    """Raised when migrations are malformed, edited after being applied, or fail."""
+
+
+class Migration:
+    """One numbered SQL file."""
+
+    def __init__(self, version: int, name: str, path: str):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, "r", encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+        self.transactional = not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+    def __repr__(self):
+        return f"Migration({self.version:04d}_{self.name})"
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """All migrations in the directory, ordered by version."""
+    migrations: Dict[int, Migration] = {}
+    for entry in sorted(os.listdir(directory)):
+        if not entry.endswith(".sql"):
+            continue
+        match = _FILENAME.match(entry)
+        if match is None:
+            raise MigrationError(f"Migration file name must look like 0001_description.sql: {entry}")
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f"Duplicate migration version {version:04d}: {entry}")
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, entry))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a script on top-level semicolons, respecting quotes, dollar quotes and comments."""
+    statements, current = [], []
+    i, n = 0, len(sql)
+    while i < n:
+        char = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end + 1
+            current.append("\n")
+            continue
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if char == "'" or char == '"':
+            end = i + 1
+            while end < n:
+                if sql[end] == char:
+                    if end + 1 < n and sql[end + 1] == char:
+                        end += 2  # Escaped quote.
+                        continue
+                    break
+                end += 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        if char == "$":
+            tag = re.match(r"\$[A-Za-z_0-9]*\$", sql[i:])
+            if tag:
+                end = sql.find(tag.group(0), i + len(tag.group(0)))
+                end = n if end == -1 else end + len(tag.group(0))
+                current.append(sql[i:end])
+                i = end
+                continue
+        if char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += 1
+            continue
+        current.append(char)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def _ensure_version_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            execution_ms INTEGER,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def _applied(cursor) -> Dict[int, Tuple[str, str]]:
+    cursor.execute("SELECT version, name, checksum FROM schema_migrations ORDER BY version")
+    return {version: (name, checksum) for version, name, checksum in cursor.fetchall()}
+
+
+def _record(cursor, migration: Migration, execution_ms: Optional[int]):
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum, execution_ms) VALUES (%s, %s, %s, %s)",
+        (migration.version, migration.name, migration.checksum, execution_ms),
+    )
+
+
+def _baseline(cursor, migrations: List[Migration]) -> bool:
+    """Record 0001 as applied on a database created before migrations existed."""
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NULL, to_regclass(%s) IS NOT NULL", (_BASELINE_TABLE,))
+    no_version_table, has_tables = cursor.fetchone()
+    baseline = next((m for m in migrations if m.version == _BASELINE_VERSION), None)
+    if not (no_version_table and has_tables and baseline):
+        return False
+    _ensure_version_table(cursor)
+    _record(cursor, baseline, None)
+    return True
+
+
+def _invalid_indexes(cursor) -> List[str]:
+    cursor.execute(
+        """
+        SELECT c.relname FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE NOT i.indisvalid AND n.nspname = current_schema()
+        """
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _apply(conn, migration: Migration):
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    if migration.transactional:
+        conn.autocommit = False
+        try:
+            cursor.execute("SET LOCAL lock_timeout = %s", (MIGRATION_LOCK_TIMEOUT,))
+            cursor.execute(migration.sql)
+            _record(cursor, migration, int((time.perf_counter() - started) * 1000))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+        return
+
+    cursor.execute("SET lock_timeout = %s", (MIGRATION_LOCK_TIMEOUT,))
+    try:
+        for statement in split_statements(migration.sql):
+            cursor.execute(statement)
+    finally:
+        cursor.execute("RESET lock_timeout")
+    # A failed CREATE INDEX CONCURRENTLY leaves an invalid index that IF NOT EXISTS would skip.
+    invalid = _invalid_indexes(cursor)
+    if invalid:
+        raise MigrationError(
+            f"{migration!r} left invalid indexes {', '.join(invalid)}; drop them and re-run the migration"
+        )
+    _record(cursor, migration, int((time.perf_counter() - started) * 1000))
+
+
+def _connect(database_url: str):
+    conn = psycopg2.connect(build_dsn(database_url))
+    conn.autocommit = True
+    return conn
+
+
+def migrate(database_url: str = DATABASE_URL, target: Optional[int] = None,
+            directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Apply pending migrations up to target (default: all); returns those applied."""
+    if is_sqlite_url(database_url):
+        import sqlite_pool
+        return sqlite_pool.migrate(sqlite_path(database_url), target)
+    migrations = discover(directory)
+    conn = _connect(database_url)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_lock(%s)", (_ADVISORY_LOCK_KEY,))
+        try:
+            if _baseline(cursor, migrations):
+                print(f"Baselined existing schema at migration {_BASELINE_VERSION:04d}")
+            _ensure_version_table(cursor)
+            applied = _applied(cursor)
+            for version, (name, checksum) in applied.items():
+                known = next((m for m in migrations if m.version == version), None)
+                if known is not None and known.checksum != checksum:
+                    raise MigrationError(f"Migration {version:04d}_{name} was modified after it was applied")
+
+            done = []
+            for migration in migrations:
+                if migration.version in applied or (target is not None and migration.version > target):
+                    continue
+                try:
+                    _apply(conn, migration)
+                except MigrationError:
+                    raise
+                except Exception as e:
+                    raise MigrationError(f"{migration!r} failed: {e}") from e
+                print(f"Applied migration {migration.version:04d}_{migration.name}")
+                done.append(migration)
+            return done
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (_ADVISORY_LOCK_KEY,))
+    finally:
+        conn.close()
+
+
+def status(database_url: str = DATABASE_URL, directory: str = MIGRATIONS_DIR) -> List[Tuple[Migration, bool]]:
+    """(migration, applied?) for every migration on disk."""
+    if is_sqlite_url(database_url):
+        import sqlite_pool
+        conn = sqlite_pool.connect(sqlite_path(database_url))
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+        return [(migration, migration.version <= version) for migration in discover(sqlite_pool.SQLITE_MIGRATIONS_DIR)]
+    migrations = discover(directory)
+    conn = _connect(database_url)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        applied = _applied(cursor) if cursor.fetchone()[0] else {}
+        return [(migration, migration.version in applied) for migration in migrations]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", default="up", choices=("up", "status"))
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--target", type=int, help="stop after this migration version")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "status":
+            for migration, applied in status(args.database_url):
+                print(f"{'applied' if applied else 'pending':>8}  {migration.version:04d}_{migration.name}")
+        else:
+            applied = migrate(args.database_url, target=args.target)
+            if not applied:
+                print("Schema is up to date")
+    except MigrationError as e:
+        print(f"Migration failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
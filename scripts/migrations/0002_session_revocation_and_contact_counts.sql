@@ -0,0 +1,65 @@
+-- Session revocation timestamps, contact ingestion ids and trigger-maintained contact counts.
+-- Adding nullable columns without defaults only touches the catalog; the indexes on them are
+-- built without blocking writes in 0003. Written to also apply cleanly to databases created
+-- from the pre-migration schema file, which may already have some of these objects.
+
+ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS revoked_at TIMESTAMP;
+ALTER TABLE contact_submissions ADD COLUMN IF NOT EXISTS ingest_id UUID;
+
+-- status and priority are nullable in the original schema but key the counts below. Only rows
+-- written before the count triggers existed can hold NULLs; give them the column defaults.
+-- 0008 makes both columns NOT NULL.
+UPDATE contact_submissions SET status = 'new' WHERE status IS NULL;
+UPDATE contact_submissions SET priority = 'medium' WHERE priority IS NULL;
+
+-- Per-(status, priority) submission counts, kept current by triggers so listings never COUNT(*) the table
+CREATE TABLE IF NOT EXISTS contact_submission_counts (
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (status, priority)
+);
+
+CREATE OR REPLACE FUNCTION contact_submission_counts_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM contact_submission_counts;
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO contact_submission_counts AS c (status, priority, total)
+        SELECT status, priority, -COUNT(*) FROM old_rows GROUP BY status, priority
+        ON CONFLICT (status, priority) DO UPDATE SET total = c.total + EXCLUDED.total;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'INSERT') THEN
+        INSERT INTO contact_submission_counts AS c (status, priority, total)
+        SELECT status, priority, COUNT(*) FROM new_rows GROUP BY status, priority
+        ON CONFLICT (status, priority) DO UPDATE SET total = c.total + EXCLUDED.total;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level triggers aggregate multi-row inserts into one counter update per (status, priority)
+DROP TRIGGER IF EXISTS contact_submission_counts_insert ON contact_submissions;
+CREATE TRIGGER contact_submission_counts_insert
+    AFTER INSERT ON contact_submissions REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION contact_submission_counts_apply();
+DROP TRIGGER IF EXISTS contact_submission_counts_update ON contact_submissions;
+CREATE TRIGGER contact_submission_counts_update
+    AFTER UPDATE ON contact_submissions REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION contact_submission_counts_apply();
+DROP TRIGGER IF EXISTS contact_submission_counts_delete ON contact_submissions;
+CREATE TRIGGER contact_submission_counts_delete
+    AFTER DELETE ON contact_submissions REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION contact_submission_counts_apply();
+DROP TRIGGER IF EXISTS contact_submission_counts_truncate ON contact_submissions;
+CREATE TRIGGER contact_submission_counts_truncate
+    AFTER TRUNCATE ON contact_submissions
+    FOR EACH STATEMENT EXECUTE FUNCTION contact_submission_counts_apply();
+
+-- CREATE TRIGGER holds off writes to contact_submissions until this migration commits,
+-- so the recount and the triggers see the same rows.
+DELETE FROM contact_submission_counts;
+INSERT INTO contact_submission_counts (status, priority, total)
+SELECT status, priority, COUNT(*) FROM contact_submissions GROUP BY status, priority;
@@ -0,0 +1,14 @@
+-- migrate:no-transaction
+-- Indexes for session revocation, ingestion dedupe and keyset pagination, built without
+-- blocking writes. Each statement is safe to re-run if the migration is interrupted.
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS contact_submissions_ingest_id_key ON contact_submissions (ingest_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_revoked_at ON user_sessions (revoked_at);
+
+-- Keyset pagination: (created_at, id) newest first, optionally narrowed by status
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contact_submissions_status_keyset
+    ON contact_submissions (status, created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contact_submissions_keyset
+    ON contact_submissions (created_at DESC, id DESC);
+DROP INDEX CONCURRENTLY IF EXISTS idx_contact_submissions_status;
+DROP INDEX CONCURRENTLY IF EXISTS idx_contact_submissions_created_at;
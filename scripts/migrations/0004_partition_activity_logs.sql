@@ -0,0 +1,78 @@
+-- Partition activity_logs by month on created_at.
+--
+-- Audit rows are append-only and queried by time range, so monthly range
+-- partitions keep each index small, let queries prune to the months they
+-- touch, and make retention a DROP TABLE instead of a bulk DELETE. Rows with
+-- no matching month land in activity_logs_default; ensure_activity_log_partition()
+-- moves them out when their month's partition is created.
+--
+-- There is no foreign key to users: the audit trail outlives the accounts it
+-- describes, and a batch of events must not fail because one user was deleted
+-- between the event and the flush.
+
+ALTER TABLE activity_logs RENAME TO activity_logs_unpartitioned;
+ALTER INDEX activity_logs_pkey RENAME TO activity_logs_unpartitioned_pkey;
+ALTER SEQUENCE activity_logs_id_seq OWNED BY NONE;
+ALTER SEQUENCE activity_logs_id_seq AS BIGINT;
+
+CREATE TABLE activity_logs (
+    id BIGINT NOT NULL DEFAULT nextval('activity_logs_id_seq'),
+    user_id INTEGER,
+    action TEXT NOT NULL,
+    resource_type TEXT,
+    resource_id INTEGER,
+    details TEXT,
+    ip_address TEXT,
+    user_agent TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE activity_logs_id_seq OWNED BY activity_logs.id;
+
+CREATE TABLE activity_logs_default PARTITION OF activity_logs DEFAULT;
+
+-- Create (or return) the partition holding the month that contains month_start.
+CREATE OR REPLACE FUNCTION ensure_activity_log_partition(month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    lower_bound DATE := date_trunc('month', month_start)::DATE;
+    upper_bound DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := 'activity_logs_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+    -- Attaching next to a default partition that already holds rows for this
+    -- month would fail, so build the partition standalone, move those rows in,
+    -- then attach it.
+    EXECUTE format('CREATE TABLE %I (LIKE activity_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM activity_logs_default WHERE created_at >= %L AND created_at < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        lower_bound, upper_bound, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE activity_logs ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, lower_bound, upper_bound
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions for every month with existing rows, plus this month and the next two.
+SELECT ensure_activity_log_partition(month::DATE)
+FROM generate_series(
+    date_trunc('month', LEAST(COALESCE((SELECT MIN(created_at) FROM activity_logs_unpartitioned), CURRENT_TIMESTAMP), CURRENT_TIMESTAMP)),
+    date_trunc('month', CURRENT_TIMESTAMP) + INTERVAL '2 months',
+    INTERVAL '1 month'
+) AS month;
+
+INSERT INTO activity_logs (id, user_id, action, resource_type, resource_id, details, ip_address, user_agent, created_at)
+SELECT id, user_id, action, resource_type, resource_id, details, ip_address, user_agent, COALESCE(created_at, CURRENT_TIMESTAMP)
+FROM activity_logs_unpartitioned;
+
+DROP TABLE activity_logs_unpartitioned;
+
+CREATE INDEX idx_activity_logs_created_at ON activity_logs (created_at);
+CREATE INDEX idx_activity_logs_user_id ON activity_logs (user_id, created_at DESC);
@@ -0,0 +1,34 @@
+-- Token buckets shared by every API worker when RATE_LIMIT_BACKEND=postgres (see rate_limit.py).
+--
+-- The table is UNLOGGED: buckets are cheap to lose on a crash (everyone simply
+-- starts with a full bucket), and skipping WAL keeps a login flood from turning
+-- into write amplification. Keys are hashes, never raw emails or addresses.
+
+CREATE UNLOGGED TABLE rate_limit_buckets (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL
+);
+
+-- Refill the bucket for the time since it was last touched, then take one token.
+-- Returns 0 when a token was taken, otherwise the seconds until one is available.
+-- The upsert locks the row, so concurrent callers for the same key serialise.
+CREATE OR REPLACE FUNCTION take_rate_limit_token(bucket_key TEXT, burst DOUBLE PRECISION, per_second DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION AS $$
+DECLARE
+    now_ts TIMESTAMPTZ := clock_timestamp();
+    available DOUBLE PRECISION;
+BEGIN
+    INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+    VALUES (bucket_key, burst, now_ts)
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = LEAST(burst, b.tokens + GREATEST(EXTRACT(EPOCH FROM now_ts - b.updated_at), 0) * per_second),
+        updated_at = now_ts
+    RETURNING tokens INTO available;
+    IF available < 1 THEN
+        RETURN (1 - available) / per_second;
+    END IF;
+    UPDATE rate_limit_buckets SET tokens = available - 1 WHERE key = bucket_key;
+    RETURN 0;
+END;
+$$ LANGUAGE plpgsql;
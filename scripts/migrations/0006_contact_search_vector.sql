@@ -0,0 +1,13 @@
+-- Full-text search over contact submissions (see contacts.search_submissions).
+--
+-- The document is kept in a generated column so it can never drift from the
+-- row, and every writer (the API, the ingest flusher, COPY) gets it for free.
+-- Subject matches rank above the sender's name and email, which rank above
+-- the message body. Adding a STORED column rewrites the table once; its GIN
+-- index is built without blocking writes in 0007.
+
+ALTER TABLE contact_submissions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(subject, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(name, '') || ' ' || coalesce(email, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(message, '')), 'C')
+) STORED;
@@ -0,0 +1,12 @@
+-- migrate:no-transaction
+-- Indexes for contact search, built without blocking writes.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contact_submissions_search
+    ON contact_submissions USING GIN (search_vector);
+
+-- Case-insensitive prefix lookups on email and name (lower(x) LIKE 'abc%').
+-- text_pattern_ops makes LIKE prefixes indexable whatever the database collation.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contact_submissions_email_prefix
+    ON contact_submissions (lower(email) text_pattern_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contact_submissions_name_prefix
+    ON contact_submissions (lower(name) text_pattern_ops);
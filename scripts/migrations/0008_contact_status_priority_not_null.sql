@@ -0,0 +1,21 @@
+-- migrate:no-transaction
+-- contact_submission_counts is keyed on (status, priority), so a NULL in either column made
+-- every write that set it fail inside the count triggers. Make the columns NOT NULL, so such a
+-- write fails with a plain not-null violation. 0002 backfilled NULLs before the triggers were created.
+--
+-- SET NOT NULL alone scans the table under an ACCESS EXCLUSIVE lock. Instead, NOT VALID checks
+-- are added without a scan, VALIDATE scans under a lock that still allows writes, and SET NOT
+-- NULL then skips its scan because the validated checks prove there are no NULLs. Each
+-- statement commits on its own and is safe to re-run.
+
+ALTER TABLE contact_submissions
+    DROP CONSTRAINT IF EXISTS contact_submissions_status_not_null,
+    DROP CONSTRAINT IF EXISTS contact_submissions_priority_not_null,
+    ADD CONSTRAINT contact_submissions_status_not_null CHECK (status IS NOT NULL) NOT VALID,
+    ADD CONSTRAINT contact_submissions_priority_not_null CHECK (priority IS NOT NULL) NOT VALID;
+ALTER TABLE contact_submissions VALIDATE CONSTRAINT contact_submissions_status_not_null;
+ALTER TABLE contact_submissions VALIDATE CONSTRAINT contact_submissions_priority_not_null;
+ALTER TABLE contact_submissions ALTER COLUMN status SET NOT NULL, ALTER COLUMN priority SET NOT NULL;
+ALTER TABLE contact_submissions
+    DROP CONSTRAINT IF EXISTS contact_submissions_status_not_null,
+    DROP CONSTRAINT IF EXISTS contact_submissions_priority_not_null;
@@ -0,0 +1,16 @@
+-- Background user imports (see user_import.ImportJobs). POST /admin/users/import queues a
+-- job and answers 202; any worker can then serve its status from this table.
+
+CREATE TABLE user_import_jobs (
+    id UUID PRIMARY KEY,
+    created_by INTEGER,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    update_existing BOOLEAN NOT NULL DEFAULT FALSE,
+    row_count INTEGER NOT NULL,
+    report JSONB,
+    error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    FOREIGN KEY (created_by) REFERENCES users (id) ON DELETE SET NULL
+);
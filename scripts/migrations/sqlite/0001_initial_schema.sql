@@ -0,0 +1,135 @@
+-- SQLite schema for single-node installs; mirrors the PostgreSQL schema after migration 0007.
+--
+-- Differences from PostgreSQL:
+--   * Timestamps are TEXT in the form 'YYYY-MM-DD HH:MM:SS.SSS' (naive UTC) so they sort as they compare.
+--     sqlite_pool rewrites CURRENT_TIMESTAMP in queries to produce the same form.
+--   * AUTOINCREMENT keeps ids from being reused, as SERIAL does; revoked session ids must stay unique.
+--   * activity_logs is a plain table; there are no partitions to manage.
+--   * contact_submission_counts is kept by row-level triggers.
+--   * There is no search_vector column or rate_limit_buckets table: contact search and the postgres
+--     rate-limit backend need PostgreSQL.
+
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    full_name TEXT NOT NULL,
+    company TEXT,
+    phone TEXT,
+    avatar_url TEXT,
+    bio TEXT,
+    website TEXT,
+    location TEXT,
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    updated_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    last_login TIMESTAMP,
+    is_active BOOLEAN DEFAULT TRUE,
+    is_verified BOOLEAN DEFAULT FALSE,
+    is_admin BOOLEAN DEFAULT FALSE
+);
+
+CREATE TABLE user_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    token_hash TEXT UNIQUE NOT NULL,
+    device_info TEXT,
+    ip_address TEXT,
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    expires_at TIMESTAMP NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    revoked_at TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE TABLE contact_submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT,
+    subject TEXT NOT NULL,
+    message TEXT NOT NULL,
+    user_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'new' CHECK (status IN ('new', 'in_progress', 'resolved', 'closed')),
+    priority TEXT NOT NULL DEFAULT 'medium' CHECK (priority IN ('low', 'medium', 'high', 'urgent')),
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    updated_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    ingest_id TEXT UNIQUE,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE SET NULL
+);
+
+CREATE TABLE contact_submission_counts (
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (status, priority)
+) WITHOUT ROWID;
+
+CREATE TRIGGER contact_submission_counts_insert AFTER INSERT ON contact_submissions
+BEGIN
+    INSERT INTO contact_submission_counts (status, priority, total) VALUES (NEW.status, NEW.priority, 1)
+    ON CONFLICT (status, priority) DO UPDATE SET total = total + 1;
+END;
+
+CREATE TRIGGER contact_submission_counts_update AFTER UPDATE OF status, priority ON contact_submissions
+BEGIN
+    UPDATE contact_submission_counts SET total = total - 1 WHERE status = OLD.status AND priority = OLD.priority;
+    INSERT INTO contact_submission_counts (status, priority, total) VALUES (NEW.status, NEW.priority, 1)
+    ON CONFLICT (status, priority) DO UPDATE SET total = total + 1;
+END;
+
+CREATE TRIGGER contact_submission_counts_delete AFTER DELETE ON contact_submissions
+BEGIN
+    UPDATE contact_submission_counts SET total = total - 1 WHERE status = OLD.status AND priority = OLD.priority;
+END;
+
+CREATE TABLE user_projects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    project_type TEXT NOT NULL CHECK (project_type IN ('website', 'app', 'ecommerce', 'blog', 'portfolio', 'other')),
+    status TEXT DEFAULT 'planning' CHECK (status IN ('planning', 'in_progress', 'completed', 'on_hold', 'cancelled')),
+    budget_range TEXT,
+    timeline TEXT,
+    requirements TEXT,
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    updated_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE TABLE user_preferences (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER UNIQUE NOT NULL,
+    theme TEXT DEFAULT 'light' CHECK (theme IN ('light', 'dark', 'auto')),
+    language TEXT DEFAULT 'en',
+    notifications_email BOOLEAN DEFAULT TRUE,
+    notifications_sms BOOLEAN DEFAULT FALSE,
+    marketing_emails BOOLEAN DEFAULT TRUE,
+    two_factor_enabled BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    updated_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE TABLE activity_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    action TEXT NOT NULL,
+    resource_type TEXT,
+    resource_id INTEGER,
+    details TEXT,
+    ip_address TEXT,
+    user_agent TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+
+CREATE INDEX idx_users_created_at ON users (created_at);
+CREATE INDEX idx_user_sessions_user_id ON user_sessions (user_id);
+CREATE INDEX idx_user_sessions_expires_at ON user_sessions (expires_at);
+CREATE INDEX idx_user_sessions_revoked_at ON user_sessions (revoked_at);
+CREATE INDEX idx_contact_submissions_status_keyset ON contact_submissions (status, created_at DESC, id DESC);
+CREATE INDEX idx_contact_submissions_keyset ON contact_submissions (created_at DESC, id DESC);
+CREATE INDEX idx_user_projects_user_id ON user_projects (user_id);
+CREATE INDEX idx_user_projects_status ON user_projects (status);
+CREATE INDEX idx_activity_logs_user_id ON activity_logs (user_id);
+CREATE INDEX idx_activity_logs_created_at ON activity_logs (created_at);
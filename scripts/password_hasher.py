@@ -0,0 +1,211 @@
+"""
+Bounded bcrypt worker pool.
+
+bcrypt is deliberately slow (~250ms of CPU at the default work factor), so
+hashing or verifying inline in an ``async def`` handler freezes the event loop
+for every other request. Work is dispatched to a dedicated process pool
+instead; once BCRYPT_MAX_PENDING jobs are queued or running, new requests are
+rejected with HasherSaturatedError so the API can answer 503 rather than
+building an unbounded backlog.
+
+Bulk work (user imports) goes through hash_many() on the same pool. It keeps
+at most one job per worker process in flight, each holding a pending slot, so
+logins and signups queue behind a handful of import hashes, never the whole
+file, and a full queue makes the import wait instead of shedding requests.
+"""
+
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import bcrypt
+
+from metrics import record_phase
+from settings import get_settings
+
+settings = get_settings()
+BCRYPT_ROUNDS = settings.get_int("BCRYPT_ROUNDS", 12)
+BCRYPT_WORKERS = settings.get_int("BCRYPT_WORKERS", os.cpu_count() or 2)
+BCRYPT_MAX_PENDING = settings.get_int("BCRYPT_MAX_PENDING", 64)
+
+# Milliseconds of bcrypt work attributed to the current request.
+_request_cost_ms = contextvars.ContextVar("bcrypt_request_cost_ms", default=0.0)
+
+
+class HasherSaturatedError(Exception):
+    """Raised when the bcrypt queue is full and the request should be shed."""
+
+
+def hash_password_sync(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """Hash a password in the calling thread (for scripts and CLI tools)."""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _hash_job(password: str, rounds: int) -> Tuple[str, float]:
+    started = time.perf_counter()
+    hashed = hash_password_sync(password, rounds)
+    return hashed, (time.perf_counter() - started) * 1000
+
+
+def _verify_job(password: str, hashed: str) -> Tuple[bool, float]:
+    started = time.perf_counter()
+    try:
+        matches = bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:
+        # Malformed hash in the database: treat as a failed login, not a 500.
+        matches = False
+    return matches, (time.perf_counter() - started) * 1000
+
+
+class PasswordHasher:
+    """Dispatches bcrypt work to a process pool with a queue-depth limit."""
+
+    def __init__(self, workers: int = BCRYPT_WORKERS, max_pending: int = BCRYPT_MAX_PENDING, rounds: int = BCRYPT_ROUNDS):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self._jobs = 0
+        self._rejected = 0
+        self._cpu_ms_total = 0.0
+        self._wait_ms_total = 0.0
+        self._cpu_ms_max = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn rather than fork: the API process runs threads (db pool, executors).
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            return True
+
+    def _finished(self, cpu_ms: Optional[float], elapsed_ms: float):
+        """Free a pending slot; cpu_ms is None for a job that did not complete."""
+        with self._lock:
+            self._pending -= 1
+            if cpu_ms is not None:
+                self._jobs += 1
+                self._cpu_ms_total += cpu_ms
+                self._wait_ms_total += max(0.0, elapsed_ms - cpu_ms)
+                self._cpu_ms_max = max(self._cpu_ms_max, cpu_ms)
+
+    async def _submit(self, func, *args):
+        if not self._reserve():
+            with self._lock:
+                self._rejected += 1
+            raise HasherSaturatedError("Password hashing queue is full")
+
+        submitted = time.perf_counter()
+        cpu_ms = None
+        try:
+            loop = asyncio.get_running_loop()
+            result, cpu_ms = await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            elapsed_ms = (time.perf_counter() - submitted) * 1000
+            self._finished(cpu_ms, elapsed_ms)
+
+        record_phase("bcrypt", elapsed_ms / 1000)
+        _request_cost_ms.set(_request_cost_ms.get() + cpu_ms)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password on the worker pool."""
+        return await self._submit(_hash_job, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against a bcrypt hash on the worker pool."""
+        return await self._submit(_verify_job, password, hashed)
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """Hash passwords from a worker thread, at most one job per worker process at a time."""
+        hashes: List[Optional[str]] = [None] * len(passwords)
+        in_flight: Dict[Future, Tuple[int, float]] = {}
+        next_index = 0
+        try:
+            while next_index < len(passwords) or in_flight:
+                while next_index < len(passwords) and len(in_flight) < self.workers and self._reserve():
+                    future = self._get_executor().submit(_hash_job, passwords[next_index], self.rounds)
+                    in_flight[future] = (next_index, time.perf_counter())
+                    next_index += 1
+                if not in_flight:
+                    time.sleep(0.05)  # the queue is full of requests; let it drain
+                    continue
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, submitted = in_flight.pop(future)
+                    cpu_ms = None
+                    try:
+                        hashes[index], cpu_ms = future.result()
+                    finally:
+                        self._finished(cpu_ms, (time.perf_counter() - submitted) * 1000)
+        finally:
+            for future, (_, submitted) in in_flight.items():
+                future.cancel()
+                self._finished(None, (time.perf_counter() - submitted) * 1000)
+        return hashes
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "jobs": self._jobs,
+                "rejected": self._rejected,
+                "avg_cpu_ms": round(self._cpu_ms_total / self._jobs, 2) if self._jobs else 0.0,
+                "max_cpu_ms": round(self._cpu_ms_max, 2),
+                "avg_queue_wait_ms": round(self._wait_ms_total / self._jobs, 2) if self._jobs else 0.0,
+            }
+
+
+def request_cost_ms() -> float:
+    """bcrypt CPU time spent so far on behalf of the current request."""
+    return _request_cost_ms.get()
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher() -> PasswordHasher:
+    """Return the process-wide hasher, creating it on first use."""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
+
+
+def shutdown():
+    """Stop the bcrypt worker processes (called on application shutdown)."""
+    global _hasher
+    with _hasher_lock:
+        if _hasher is not None:
+            _hasher.shutdown()
+            _hasher = None
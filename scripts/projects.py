@@ -0,0 +1,274 @@
+"""
+Data access for user projects, preferences and the dashboard.
+
+Every query is scoped to the owning user, so one user can never read or
+change another's projects. A project that belongs to someone else looks
+exactly like one that does not exist. Writes use INSERT/UPDATE ... RETURNING,
+so the row sent back to the client comes from the statement that wrote it.
+
+The dashboard reads the profile, preferences, recent projects and
+per-status project counts in one statement. Each part is a CTE rendered to
+JSON on the server, and the project CTEs read through
+idx_user_projects_user_id. SQLite gets the same statement written with its
+JSON1 functions.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from psycopg2 import sql
+from psycopg2.extras import DictCursor
+
+from contacts import decode_cursor, encode_cursor
+from db_pool import get_connection
+
+PROJECT_COLUMNS = (
+    "id", "user_id", "title", "description", "project_type", "status",
+    "budget_range", "timeline", "requirements", "created_at", "updated_at",
+)
+PROJECT_FIELDS = ("title", "description", "project_type", "status", "budget_range", "timeline", "requirements")
+PROJECT_TYPES = ("website", "app", "ecommerce", "blog", "portfolio", "other")
+PROJECT_STATUSES = ("planning", "in_progress", "completed", "on_hold", "cancelled")
+PREFERENCE_FIELDS = (
+    "theme", "language", "notifications_email", "notifications_sms", "marketing_emails", "two_factor_enabled",
+)
+PREFERENCE_DEFAULTS = {
+    "theme": "light",
+    "language": "en",
+    "notifications_email": True,
+    "notifications_sms": False,
+    "marketing_emails": True,
+    "two_factor_enabled": False,
+}
+THEMES = ("light", "dark", "auto")
+MAX_PAGE_SIZE = 100
+DASHBOARD_RECENT_PROJECTS = 5
+PROFILE_COLUMNS = ("id", "email", "full_name", "company", "phone", "created_at", "is_active", "is_admin")
+
+_DASHBOARD_QUERY = f"""
+    WITH profile AS (
+        SELECT {', '.join(PROFILE_COLUMNS)} FROM users WHERE id = %(user_id)s
+    ), preferences AS (
+        SELECT {', '.join(PREFERENCE_FIELDS)} FROM user_preferences WHERE user_id = %(user_id)s
+    ), recent AS (
+        SELECT {', '.join(PROJECT_COLUMNS)} FROM user_projects WHERE user_id = %(user_id)s
+        ORDER BY created_at DESC, id DESC LIMIT %(recent)s
+    ), counts AS (
+        SELECT status, COUNT(*) AS total FROM user_projects WHERE user_id = %(user_id)s GROUP BY status
+    )
+    SELECT
+        (SELECT row_to_json(profile) FROM profile) AS profile,
+        (SELECT row_to_json(preferences) FROM preferences) AS preferences,
+        (SELECT COALESCE(json_agg(recent ORDER BY created_at DESC, id DESC), '[]') FROM recent) AS recent_projects,
+        (SELECT COALESCE(json_object_agg(status, total), '{{}}') FROM counts) AS project_counts
+"""
+
+
+_BOOLEAN_COLUMNS = {"is_active", "is_admin"} | {
+    field for field, default in PREFERENCE_DEFAULTS.items() if isinstance(default, bool)
+}
+
+
+def _sqlite_json_object(columns) -> str:
+    """json_object() over columns, with booleans as JSON booleans and timestamps in ISO form like row_to_json."""
+    pairs = []
+    for column in columns:
+        if column in _BOOLEAN_COLUMNS:
+            value = f"json(iif({column}, 'true', 'false'))"
+        elif column in ("created_at", "updated_at"):
+            value = f"strftime('%%Y-%%m-%%dT%%H:%%M:%%f', {column})"
+        else:
+            value = column
+        pairs.append(f"'{column}', {value}")
+    return f"json_object({', '.join(pairs)})"
+
+
+_SQLITE_DASHBOARD_QUERY = f"""
+    SELECT
+        (SELECT {_sqlite_json_object(PROFILE_COLUMNS)} FROM users WHERE id = %(user_id)s) AS profile,
+        (SELECT {_sqlite_json_object(PREFERENCE_FIELDS)} FROM user_preferences WHERE user_id = %(user_id)s)
+            AS preferences,
+        (SELECT json_group_array(json(project)) FROM (
+            SELECT {_sqlite_json_object(PROJECT_COLUMNS)} AS project FROM user_projects WHERE user_id = %(user_id)s
+            ORDER BY created_at DESC, id DESC LIMIT %(recent)s
+        )) AS recent_projects,
+        (SELECT json_group_object(status, total) FROM (
+            SELECT status, COUNT(*) AS total FROM user_projects WHERE user_id = %(user_id)s GROUP BY status
+        )) AS project_counts
+"""
+
+
+def _execute_returning(query, params: List[Any]) -> Optional[Dict[str, Any]]:
+    """Run one write statement and return the row it produced, if any."""
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(cursor_factory=DictCursor)
+        cursor.execute(query, params)
+        row = cursor.fetchone()
+        conn.commit()
+        return dict(row) if row is not None else None
+    except Exception:
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+
+def list_projects(user_id: int, page_size: int, after: Optional[str] = None,
+                  status: Optional[str] = None) -> Dict[str, Any]:
+    """One page of the user's projects, newest first; pass next_cursor back as ``after``."""
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    clauses, params = ["user_id = %s"], [user_id]
+    if status is not None:
+        clauses.append("status = %s")
+        params.append(status)
+    if after is not None:
+        clauses.append("(created_at, id) < (%s, %s)")
+        params.extend(decode_cursor(after))
+
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(cursor_factory=DictCursor)
+        cursor.execute(
+            f"SELECT {', '.join(PROJECT_COLUMNS)} FROM user_projects WHERE {' AND '.join(clauses)} "
+            "ORDER BY created_at DESC, id DESC LIMIT %s",
+            params + [page_size + 1],
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+    finally:
+        if conn:
+            conn.close()
+
+    projects = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = encode_cursor(projects[-1]["created_at"], projects[-1]["id"])
+    return {"projects": projects, "next_cursor": next_cursor}
+
+
+def get_project(user_id: int, project_id: int) -> Optional[Dict[str, Any]]:
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(cursor_factory=DictCursor)
+        cursor.execute(
+            f"SELECT {', '.join(PROJECT_COLUMNS)} FROM user_projects WHERE id = %s AND user_id = %s",
+            (project_id, user_id),
+        )
+        row = cursor.fetchone()
+        return dict(row) if row is not None else None
+    finally:
+        if conn:
+            conn.close()
+
+
+def create_project(user_id: int, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert a project and return the new row."""
+    columns = ["user_id"] + [field for field in PROJECT_FIELDS if field in fields]
+    return _execute_returning(
+        sql.SQL("INSERT INTO user_projects ({}) VALUES ({}) RETURNING {}").format(
+            sql.SQL(", ").join(map(sql.Identifier, columns)),
+            sql.SQL(", ").join(sql.Placeholder() * len(columns)),
+            sql.SQL(", ").join(map(sql.Identifier, PROJECT_COLUMNS)),
+        ),
+        [user_id] + [fields[field] for field in columns[1:]],
+    )
+
+
+def update_project(user_id: int, project_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Apply the given fields; returns the updated row, or None if the user has no such project."""
+    updated = [field for field in PROJECT_FIELDS if field in fields]
+    if not updated:
+        return get_project(user_id, project_id)
+    return _execute_returning(
+        sql.SQL("UPDATE user_projects SET {}, updated_at = CURRENT_TIMESTAMP WHERE id = %s AND user_id = %s "
+                "RETURNING {}").format(
+            sql.SQL(", ").join(sql.Identifier(field) + sql.SQL(" = %s") for field in updated),
+            sql.SQL(", ").join(map(sql.Identifier, PROJECT_COLUMNS)),
+        ),
+        [fields[field] for field in updated] + [project_id, user_id],
+    )
+
+
+def delete_project(user_id: int, project_id: int) -> bool:
+    """Delete a project; False if the user has no such project."""
+    row = _execute_returning(
+        "DELETE FROM user_projects WHERE id = %s AND user_id = %s RETURNING id", [project_id, user_id]
+    )
+    return row is not None
+
+
+def get_preferences(user_id: int) -> Dict[str, Any]:
+    """The user's preferences, or the defaults if they never saved any."""
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(cursor_factory=DictCursor)
+        cursor.execute(
+            f"SELECT {', '.join(PREFERENCE_FIELDS)} FROM user_preferences WHERE user_id = %s", (user_id,)
+        )
+        row = cursor.fetchone()
+    finally:
+        if conn:
+            conn.close()
+    return dict(row) if row is not None else dict(PREFERENCE_DEFAULTS)
+
+
+def update_preferences(user_id: int, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Upsert the given preference fields and return the full set."""
+    updated = [field for field in PREFERENCE_FIELDS if field in fields]
+    if not updated:
+        return get_preferences(user_id)
+    return _execute_returning(
+        sql.SQL(
+            "INSERT INTO user_preferences AS p (user_id, {columns}) VALUES (%s, {values}) "
+            "ON CONFLICT (user_id) DO UPDATE SET {assignments}, updated_at = CURRENT_TIMESTAMP "
+            "RETURNING {returning}"
+        ).format(
+            columns=sql.SQL(", ").join(map(sql.Identifier, updated)),
+            values=sql.SQL(", ").join(sql.Placeholder() * len(updated)),
+            assignments=sql.SQL(", ").join(
+                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(field)) for field in updated
+            ),
+            returning=sql.SQL(", ").join(map(sql.Identifier, PREFERENCE_FIELDS)),
+        ),
+        [user_id] + [fields[field] for field in updated],
+    )
+
+
+def dashboard(user_id: int, recent: int = DASHBOARD_RECENT_PROJECTS) -> Optional[Dict[str, Any]]:
+    """Profile, preferences, recent projects and per-status counts in one round trip; None if no such user."""
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(cursor_factory=DictCursor)
+        params = {"user_id": user_id, "recent": recent}
+        if conn.dialect == "sqlite":
+            cursor.execute(_SQLITE_DASHBOARD_QUERY, params)
+            # sqlite3 returns JSON as text; psycopg2 decodes it.
+            row = {key: json.loads(value) if value is not None else None for key, value in dict(cursor.fetchone()).items()}
+        else:
+            cursor.execute(_DASHBOARD_QUERY, params)
+            row = dict(cursor.fetchone())
+    finally:
+        if conn:
+            conn.close()
+
+    if row["profile"] is None:
+        return None
+    # row_to_json renders timestamps as ISO strings; give callers the users row they expect.
+    profile = row["profile"]
+    profile["created_at"] = datetime.fromisoformat(profile["created_at"])
+    counts = {status: 0 for status in PROJECT_STATUSES}
+    counts.update(row["project_counts"])
+    return {
+        "profile": profile,
+        "preferences": row["preferences"] or dict(PREFERENCE_DEFAULTS),
+        "recent_projects": row["recent_projects"],
+        "project_counts": counts,
+    }
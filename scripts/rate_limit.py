@@ -0,0 +1,309 @@
+"""
+Token-bucket rate limiting for /auth/login.
+
+Every login attempt costs a user lookup and a full bcrypt verify, even for an
+email that does not exist, so unthrottled attempts are a cheap way to burn
+CPU. LoginRateLimiter takes one token from a per-client-IP bucket and one
+from a per-email bucket before any of that work happens. An empty bucket
+rejects the attempt with the number of seconds until it refills by a token.
+A successful login refills its email bucket, so a user who mistyped their
+password a few times is not locked out once they get it right.
+
+Buckets live in a backend:
+
+- ``memory`` (the default) keeps them in this process. Each entry is an
+  8-byte key hash mapped to a (tokens, updated) pair of floats. Full buckets
+  carry no information and are pruned, and the map is capped at
+  RATE_LIMIT_MAX_KEYS entries by evicting the least recently used. With
+  several workers each one enforces the limits on its own, so the effective
+  limit is multiplied by the worker count.
+- ``postgres`` keeps them in the UNLOGGED rate_limit_buckets table
+  (migrations/0005), shared by every worker. A check is one call to
+  take_rate_limit_token(), still before any user lookup or bcrypt work. If the
+  database cannot be reached, checks fall back to the in-memory buckets rather
+  than rejecting every login.
+
+Keys are hashed, so neither backend holds the emails or addresses it limits.
+
+The client IP is the socket peer, unless the peer is one of TRUSTED_PROXIES
+(a load balancer or reverse proxy). Then it is the rightmost X-Forwarded-For
+hop that is not itself a trusted proxy: the address the outermost trusted
+proxy saw. Hops further left are supplied by the client and can be forged.
+Without TRUSTED_PROXIES every client behind a proxy shares one IP bucket.
+"""
+
+import hashlib
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app_logging import get_logger
+from db_pool import get_connection
+from settings import get_settings
+
+settings = get_settings()
+LOGIN_RATE_LIMIT_ENABLED = settings.get_flag("LOGIN_RATE_LIMIT_ENABLED", True)
+RATE_LIMIT_BACKEND = settings.get("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_KEYS = settings.get_int("RATE_LIMIT_MAX_KEYS", 100000)
+LOGIN_IP_BURST = settings.get_int("LOGIN_IP_BURST", 20)
+LOGIN_IP_PER_MINUTE = settings.get_float("LOGIN_IP_PER_MINUTE", 10)
+LOGIN_EMAIL_BURST = settings.get_int("LOGIN_EMAIL_BURST", 5)
+LOGIN_EMAIL_PER_MINUTE = settings.get_float("LOGIN_EMAIL_PER_MINUTE", 2)
+RATE_LIMIT_PRUNE_SECONDS = settings.get_float("RATE_LIMIT_PRUNE_SECONDS", 60)
+TRUSTED_PROXIES = settings.get("TRUSTED_PROXIES", "")
+
+logger = get_logger("rate_limit")
+
+
+class RateLimited(Exception):
+    """Raised when a bucket is empty; retry_after is in seconds."""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Too many login attempts for this {scope}")
+        self.scope = scope
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class MemoryBackend:
+    """Buckets held by this process; the local stand-in for a shared backend."""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max(1, max_keys)
+        self._buckets: "OrderedDict[bytes, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key: bytes, burst: float, per_second: float) -> float:
+        """Take a token; returns 0, or the seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * per_second)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / per_second
+            self._buckets[key] = (tokens, now)
+            # Least recently used first: those are also the likeliest to be full again.
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+            return wait
+
+    def reset(self, key: bytes):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def prune(self, max_idle: float) -> int:
+        """Forget buckets untouched for max_idle seconds (long enough to have refilled)."""
+        cutoff = time.monotonic() - max_idle
+        removed = 0
+        with self._lock:
+            while self._buckets:
+                key, (_, updated) = next(iter(self._buckets.items()))
+                if updated > cutoff:
+                    break
+                del self._buckets[key]
+                removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class PostgresBackend:
+    """Buckets in the rate_limit_buckets table, shared by every worker."""
+
+    name = "postgres"
+    blocking = True
+
+    def take(self, key: bytes, burst: float, per_second: float) -> float:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT take_rate_limit_token(%s, %s, %s)", (key.hex(), burst, per_second))
+            wait = cursor.fetchone()[0]
+            conn.commit()
+            return wait
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def reset(self, key: bytes):
+        self._execute("DELETE FROM rate_limit_buckets WHERE key = %s", (key.hex(),))
+
+    def prune(self, max_idle: float) -> int:
+        return self._execute(
+            "DELETE FROM rate_limit_buckets WHERE updated_at < clock_timestamp() - make_interval(secs => %s)",
+            (max_idle,)
+        )
+
+    def clear(self):
+        self._execute("DELETE FROM rate_limit_buckets")
+
+    def _execute(self, query: str, params: Tuple[Any, ...] = ()) -> int:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "postgres":
+        return PostgresBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {name}")
+
+
+def _key(scope: str, value: str) -> bytes:
+    return hashlib.blake2b(f"{scope}:{value}".encode("utf-8"), digest_size=8).digest()
+
+
+def parse_networks(spec: str) -> Tuple[Any, ...]:
+    """Comma-separated addresses or CIDR blocks, e.g. "10.0.0.0/8, 192.0.2.10"."""
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip())
+
+
+TRUSTED_PROXY_NETWORKS = parse_networks(TRUSTED_PROXIES)
+
+
+def _is_trusted(address: str, networks: Iterable[Any]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(peer: Optional[str], forwarded_for: Optional[str] = None,
+              trusted: Optional[Iterable[Any]] = None) -> Optional[str]:
+    """The socket peer, or the client a trusted proxy forwarded for (see the module docstring)."""
+    networks = tuple(TRUSTED_PROXY_NETWORKS if trusted is None else trusted)
+    if peer is None or not forwarded_for or not _is_trusted(peer, networks):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, networks):
+            return hop
+    # Every hop is a proxy we trust: the leftmost is the closest thing to a client.
+    return hops[0] if hops else peer
+
+
+class LoginRateLimiter:
+    """Per-IP and per-email token buckets checked before a login does any real work."""
+
+    def __init__(self, backend=None, enabled: bool = LOGIN_RATE_LIMIT_ENABLED,
+                 ip_burst: int = LOGIN_IP_BURST, ip_per_minute: float = LOGIN_IP_PER_MINUTE,
+                 email_burst: int = LOGIN_EMAIL_BURST, email_per_minute: float = LOGIN_EMAIL_PER_MINUTE):
+        self.backend = backend if backend is not None else create_backend()
+        # Used whenever a shared backend cannot be reached.
+        self.fallback = self.backend if isinstance(self.backend, MemoryBackend) else MemoryBackend()
+        self.enabled = enabled
+        self.limits = {
+            "ip": (max(1, ip_burst), max(ip_per_minute, 1e-6) / 60),
+            "email": (max(1, email_burst), max(email_per_minute, 1e-6) / 60),
+        }
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.throttled = {"ip": 0, "email": 0}
+        self.backend_errors = 0
+
+    @property
+    def blocking(self) -> bool:
+        """True when checks do I/O and belong off the event loop."""
+        return self.enabled and self.backend.blocking
+
+    def _take(self, scope: str, value: str) -> float:
+        burst, per_second = self.limits[scope]
+        key = _key(scope, value)
+        try:
+            return self.backend.take(key, burst, per_second)
+        except Exception as e:
+            with self._lock:
+                self.backend_errors += 1
+            logger.error("Rate limit backend %s failed, using local buckets: %s", self.backend.name, e)
+            return self.fallback.take(key, burst, per_second)
+
+    def check(self, ip: Optional[str], email: str):
+        """Take one token from each bucket; raises RateLimited if either is empty."""
+        if not self.enabled:
+            return
+        checks = [("ip", ip)] if ip else []
+        checks.append(("email", email.strip().lower()))
+        for scope, value in checks:
+            wait = self._take(scope, value)
+            if wait > 0:
+                with self._lock:
+                    self.throttled[scope] += 1
+                raise RateLimited(scope, wait)
+        with self._lock:
+            self.allowed += 1
+
+    def succeeded(self, email: str):
+        """Refill the email bucket after a correct password."""
+        if not self.enabled:
+            return
+        key = _key("email", email.strip().lower())
+        try:
+            self.backend.reset(key)
+        except Exception as e:
+            logger.error("Error resetting login rate limit: %s", e)
+        if self.fallback is not self.backend:
+            self.fallback.reset(key)
+
+    def prune(self) -> int:
+        """Drop buckets idle long enough to be full again."""
+        max_idle = max(burst / per_second for burst, per_second in self.limits.values())
+        removed = self.backend.prune(max_idle)
+        if self.fallback is not self.backend:
+            removed += self.fallback.prune(max_idle)
+        return removed
+
+    def clear(self):
+        self.backend.clear()
+        if self.fallback is not self.backend:
+            self.fallback.clear()
+        with self._lock:
+            self.allowed = 0
+            self.throttled = {"ip": 0, "email": 0}
+            self.backend_errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "backend": self.backend.name,
+                "local_buckets": len(self.fallback),
+                "allowed": self.allowed,
+                "throttled_ip": self.throttled["ip"],
+                "throttled_email": self.throttled["email"],
+                "backend_errors": self.backend_errors,
+            }
+
+
+login_limiter = LoginRateLimiter()
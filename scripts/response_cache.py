@@ -0,0 +1,154 @@
+"""
+In-process cache of rendered JSON responses with ETags, for polled read endpoints.
+
+Each entry holds the response body exactly as it is sent plus a strong ETag
+derived from the version of the rows behind it (their ids and updated_at
+values, plus the body itself). A repeat request is answered without a query,
+a Pydantic model or JSON encoding, and a client that sends If-None-Match gets
+a bodyless 304.
+
+Entries are tagged with what they depend on (``user:<id>``, ``contacts``).
+Writers in this process invalidate a tag explicitly after committing. Entries
+also expire after RESPONSE_CACHE_TTL_SECONDS, which bounds how long a change
+made by another worker can go unseen.
+
+A response computed while an invalidation was happening is not stored:
+callers take ``epoch()`` before reading and pass it to put(), which drops the
+entry if any tag was invalidated in between.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, NamedTuple, Optional, Set, Tuple
+
+from settings import get_settings
+
+settings = get_settings()
+RESPONSE_CACHE_MAX_ENTRIES = settings.get_int("RESPONSE_CACHE_MAX_ENTRIES", 10000)
+RESPONSE_CACHE_TTL_SECONDS = settings.get_float("RESPONSE_CACHE_TTL_SECONDS", 30)
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the values that identify one version of a response."""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+class ResponseCache:
+    """Bounded LRU of rendered responses with per-entry expiry and tag invalidation."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, CachedResponse, Tuple[str, ...]]]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[Hashable]] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _drop(self, key: Hashable):
+        """Remove one entry and its tag index. Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def epoch(self) -> int:
+        """Invalidation counter to pass to put() for a response about to be computed."""
+        return self._epoch
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, response, _ = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: Hashable, response: CachedResponse, tags: Iterable[str], epoch: int):
+        """Store a response unless something was invalidated since ``epoch``."""
+        if not self.enabled:
+            return
+        tags = tuple(tags)
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, response, tags)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tag: str):
+        """Forget every response tagged ``tag`` after a write."""
+        with self._lock:
+            self._epoch += 1
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,253 @@
+"""
+Session store backed by the user_sessions table.
+
+Each login or signup opens a session: a row holding the SHA-256 of an opaque
+refresh token. Access tokens carry the session id as their ``sid`` claim.
+Refresh tokens are single-use. Rotating one retires its session and opens a
+new one. Presenting an already-rotated token is treated as theft and revokes
+every session the user has.
+
+Revocation is checked against SessionRevocationIndex, an in-memory map of
+revoked session ids. Workers refresh it incrementally by polling rows whose
+revoked_at moved past the last value they saw, so the request path never
+queries user_sessions. A background sweeper deletes expired rows in batches.
+"""
+
+import hashlib
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from db_pool import get_connection
+from settings import get_settings
+
+settings = get_settings()
+REFRESH_TOKEN_EXPIRE_DAYS = settings.get_int("REFRESH_TOKEN_EXPIRE_DAYS", 30)
+REVOCATION_REFRESH_SECONDS = settings.get_float("REVOCATION_REFRESH_SECONDS", 5)
+SESSION_SWEEP_INTERVAL_SECONDS = settings.get_float("SESSION_SWEEP_INTERVAL_SECONDS", 300)
+SESSION_SWEEP_BATCH_SIZE = settings.get_int("SESSION_SWEEP_BATCH_SIZE", 1000)
+
+# Re-read revocations this far behind the newest one seen, so a transaction that
+# stamped revoked_at earlier but committed later is not skipped.
+_REFRESH_OVERLAP = timedelta(seconds=30)
+
+
+class InvalidRefreshToken(Exception):
+    """Raised when a refresh token is unknown, expired, revoked or reused."""
+
+
+def hash_token(token: str) -> str:
+    """Hash stored in user_sessions.token_hash for a refresh token."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def _utcnow() -> datetime:
+    # user_sessions uses naive TIMESTAMP columns holding UTC.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class SessionRevocationIndex:
+    """Revoked, not-yet-expired session ids mirrored from user_sessions."""
+
+    def __init__(self):
+        self._expires_at: Dict[int, float] = {}
+        self._high_water: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self.last_refreshed_at = 0.0
+
+    def __len__(self):
+        return len(self._expires_at)
+
+    def is_revoked(self, session_id: int) -> bool:
+        """Pure in-memory check; never touches the database."""
+        return session_id in self._expires_at
+
+    def add(self, revoked: Iterable[Tuple[int, datetime]]):
+        """Record (session id, expires_at) pairs revoked by this process."""
+        with self._lock:
+            for session_id, expires_at in revoked:
+                self._expires_at[session_id] = expires_at.replace(tzinfo=timezone.utc).timestamp()
+
+    def refresh(self):
+        """Pull revocations made since the last refresh and forget expired sessions."""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            if self._high_water is None:
+                cursor.execute(
+                    """
+                    SELECT id, expires_at, revoked_at FROM user_sessions
+                    WHERE revoked_at IS NOT NULL AND expires_at > %s
+                    """,
+                    (_utcnow(),),
+                )
+            else:
+                cursor.execute(
+                    """
+                    SELECT id, expires_at, revoked_at FROM user_sessions
+                    WHERE revoked_at >= %s AND expires_at > %s
+                    """,
+                    (self._high_water - _REFRESH_OVERLAP, _utcnow()),
+                )
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        now = time.time()
+        with self._lock:
+            for session_id, expires_at, revoked_at in rows:
+                self._expires_at[session_id] = expires_at.replace(tzinfo=timezone.utc).timestamp()
+                if self._high_water is None or revoked_at > self._high_water:
+                    self._high_water = revoked_at
+            if self._high_water is None:
+                self._high_water = _utcnow()
+            self._expires_at = {sid: exp for sid, exp in self._expires_at.items() if exp > now}
+            self.last_refreshed_at = now
+
+    def clear(self):
+        with self._lock:
+            self._expires_at = {}
+            self._high_water = None
+
+
+revocation_index = SessionRevocationIndex()
+
+
+def new_refresh_token() -> Tuple[str, datetime]:
+    """A fresh refresh token and the expiry of the session it will open."""
+    return secrets.token_urlsafe(32), _utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+def create_session(user_id: int, device_info: Optional[str] = None, ip_address: Optional[str] = None,
+                   conn=None) -> Tuple[int, str, datetime]:
+    """Open a session and return (session id, refresh token, expires_at)."""
+    refresh_token, expires_at = new_refresh_token()
+    owns_conn = conn is None
+    if owns_conn:
+        conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO user_sessions (user_id, token_hash, device_info, ip_address, expires_at)
+            VALUES (%s, %s, %s, %s, %s) RETURNING id
+            """,
+            (user_id, hash_token(refresh_token), device_info, ip_address, expires_at),
+        )
+        session_id = cursor.fetchone()[0]
+        if owns_conn:
+            conn.commit()
+        return session_id, refresh_token, expires_at
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def rotate_session(refresh_token: str, device_info: Optional[str] = None,
+                   ip_address: Optional[str] = None) -> Tuple[int, int, str, datetime]:
+    """
+    Exchange a refresh token for a new one.
+
+    Returns (user id, new session id, new refresh token, expires_at).
+    """
+    token_hash = hash_token(refresh_token)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE user_sessions SET is_active = FALSE, revoked_at = %s
+            WHERE token_hash = %s AND is_active = TRUE AND expires_at > %s
+            RETURNING id, user_id, expires_at
+            """,
+            (_utcnow(), token_hash, _utcnow()),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute("SELECT user_id, is_active FROM user_sessions WHERE token_hash = %s", (token_hash,))
+            existing = cursor.fetchone()
+            conn.rollback()
+            if existing is not None and not existing[1]:
+                # A retired token came back: assume it leaked and end every session for the user.
+                revoke_user_sessions(existing[0])
+            raise InvalidRefreshToken("Invalid or expired refresh token")
+
+        old_session_id, user_id, old_expires_at = row
+        session_id, new_token, expires_at = create_session(user_id, device_info, ip_address, conn=conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    revocation_index.add([(old_session_id, old_expires_at)])
+    return user_id, session_id, new_token, expires_at
+
+
+def revoke_session(session_id: int):
+    """Revoke one session (logout)."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE user_sessions SET is_active = FALSE, revoked_at = %s
+            WHERE id = %s AND revoked_at IS NULL
+            RETURNING id, expires_at
+            """,
+            (_utcnow(), session_id),
+        )
+        revoked = cursor.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+    revocation_index.add(revoked)
+
+
+def revoke_user_sessions(user_id: int) -> int:
+    """Revoke every live session a user has in one statement; returns how many."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE user_sessions SET is_active = FALSE, revoked_at = %s
+            WHERE user_id = %s AND revoked_at IS NULL AND expires_at > %s
+            RETURNING id, expires_at
+            """,
+            (_utcnow(), user_id, _utcnow()),
+        )
+        revoked = cursor.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+    revocation_index.add(revoked)
+    return len(revoked)
+
+
+def sweep_expired_sessions(batch_size: int = SESSION_SWEEP_BATCH_SIZE) -> int:
+    """Delete expired sessions in short batches (uses idx_user_sessions_expires_at)."""
+    deleted = 0
+    while True:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                DELETE FROM user_sessions WHERE id IN (
+                    SELECT id FROM user_sessions WHERE expires_at < %s LIMIT %s
+                )
+                """,
+                (_utcnow(), batch_size),
+            )
+            batch = cursor.rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        deleted += batch
+        # Each batch is its own short transaction so the sweep never holds locks for long.
+        if batch < batch_size:
+            return deleted
@@ -0,0 +1,545 @@
+"""
+Embedded SQLite storage for single-node installs and CI, behind get_connection().
+
+Set DATABASE_URL=sqlite:///path/to/techzolo.sqlite3 and db_pool hands out
+connections from SQLitePool instead of PostgreSQL. The data-access modules keep
+their psycopg2-style code. Queries with %s / %(name)s placeholders and
+psycopg2.sql compositions are translated to SQLite once per distinct text.
+Rows support both row[0] and row["column"]. TIMESTAMP and BOOLEAN columns come
+back as datetime and bool.
+
+SQLite allows one write transaction at a time, so the pool is built around that:
+
+- The database runs in WAL mode, so readers never block the writer or each other.
+- There is a single writer connection, handed out in FIFO order. A checkout takes
+  it at its first write statement (BEGIN IMMEDIATE) and gives it back on
+  commit(), rollback() or close(). Writers queue in-process instead of racing for
+  the file lock and retrying on SQLITE_BUSY. Reads a checkout makes after its
+  first write go to the writer, so they see its uncommitted changes.
+- Up to SQLITE_READERS query_only connections serve reads. Each read sees the
+  last committed state, much like READ COMMITTED on PostgreSQL.
+- Each connection keeps SQLITE_STATEMENT_CACHE_SIZE compiled statements, and
+  translated query text is cached in an LRU of the same size.
+
+The schema comes from migrations/sqlite/NNNN_*.sql. Those files are applied
+when the pool first opens the database and tracked with PRAGMA user_version.
+Features that only exist on PostgreSQL raise db_pool.UnsupportedByDatabase.
+Those are contact search, COPY-based user import, buffered contact ingestion,
+database statistics and the postgres rate-limit backend.
+"""
+
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from psycopg2 import sql
+
+from db_pool import DB_POOL_TIMEOUT, PoolTimeoutError, UnsupportedByDatabase, _TimedCursor
+from migrate import Migration, discover
+from settings import get_settings
+
+settings = get_settings()
+SQLITE_READERS = settings.get_int("SQLITE_READERS", 4)
+SQLITE_STATEMENT_CACHE_SIZE = settings.get_int("SQLITE_STATEMENT_CACHE_SIZE", 256)
+SQLITE_BUSY_TIMEOUT_MS = settings.get_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_SYNCHRONOUS = settings.get("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations", "sqlite")
+
+# Same text form as the schema defaults, so timestamps sort as they compare.
+_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+_CURRENT_TIMESTAMP = re.compile(r"\bCURRENT_TIMESTAMP\b", re.IGNORECASE)
+_FIRST_KEYWORD = re.compile(r"^(?:\s|\(|--[^\n]*\n)*(\w+)")
+_WRITE_KEYWORD = re.compile(r"\b(?:INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+_READ_STATEMENTS = {"SELECT", "VALUES", "EXPLAIN"}
+
+
+def _adapt_datetime(value: datetime) -> str:
+    # Columns hold naive UTC, like the PostgreSQL TIMESTAMP columns.
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(" ", "milliseconds")
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("BOOLEAN", lambda raw: raw not in (b"0", b""))
+
+
+def _render(query) -> str:
+    """Text of a psycopg2.sql composition, with placeholders left in psycopg2 style."""
+    if isinstance(query, str):
+        return query
+    if isinstance(query, sql.Composed):
+        return "".join(_render(part) for part in query.seq)
+    if isinstance(query, sql.SQL):
+        return query.string
+    if isinstance(query, sql.Identifier):
+        return ".".join('"' + part.replace('"', '""') + '"' for part in query.strings)
+    if isinstance(query, sql.Placeholder):
+        return f"%({query.name})s" if query.name else "%s"
+    raise TypeError(f"{type(query).__name__} cannot be sent to SQLite")
+
+
+def _placeholder(match) -> str:
+    if match.group(0) == "%%":
+        return "%"
+    return f":{match.group(1)}" if match.group(1) else "?"
+
+
+@functools.lru_cache(maxsize=SQLITE_STATEMENT_CACHE_SIZE)
+def translate(query: str, has_params: bool) -> Tuple[str, bool]:
+    """SQLite text for a psycopg2-style query, and whether the statement writes."""
+    # Like psycopg2, only interpret % sequences when parameters are passed.
+    if has_params:
+        query = _PLACEHOLDER.sub(_placeholder, query)
+    query = _CURRENT_TIMESTAMP.sub(_NOW, query)
+    match = _FIRST_KEYWORD.match(query)
+    keyword = match.group(1).upper() if match else ""
+    if keyword == "WITH":
+        return query, bool(_WRITE_KEYWORD.search(query))
+    return query, keyword not in _READ_STATEMENTS
+
+
+def split_script(script: str) -> Iterator[str]:
+    """The complete statements of a script (trigger bodies stay whole)."""
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            yield buffer
+            buffer = ""
+
+
+def apply_migrations(conn: sqlite3.Connection, target: Optional[int] = None,
+                     directory: str = SQLITE_MIGRATIONS_DIR) -> List[Migration]:
+    """Apply migrations newer than PRAGMA user_version; safe to race with other processes."""
+    applied = []
+    for migration in discover(directory):
+        if target is not None and migration.version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another worker may have just applied it.
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= migration.version:
+                conn.execute("ROLLBACK")
+                continue
+            for statement in split_script(migration.sql):
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {migration.version:d}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(migration)
+    return applied
+
+
+def connect(path: str, read_only: bool = False,
+            statement_cache_size: int = SQLITE_STATEMENT_CACHE_SIZE) -> sqlite3.Connection:
+    """Open one connection with the pool's settings (autocommit; transactions are explicit)."""
+    conn = sqlite3.connect(
+        path,
+        isolation_level=None,
+        check_same_thread=False,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        cached_statements=statement_cache_size,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS:d}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    return conn
+
+
+def migrate(path: str, target: Optional[int] = None) -> List[Migration]:
+    """Bring the database file at path up to date (creating it if needed)."""
+    conn = connect(path)
+    try:
+        return apply_migrations(conn, target)
+    finally:
+        conn.close()
+
+
+class _WriterQueue:
+    """FIFO hand-off of the single writer connection between checkouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owner: Optional[object] = None
+        self._waiters: Deque[Tuple[object, threading.Event]] = deque()
+
+        self.acquisitions = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.peak_waiting = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def held(self) -> bool:
+        return self._owner is not None
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self, owner: object, timeout: float):
+        with self._lock:
+            if self._owner is None and not self._waiters:
+                self._owner = owner
+                self.acquisitions += 1
+                return
+            granted = threading.Event()
+            self._waiters.append((owner, granted))
+            self.waits += 1
+            self.peak_waiting = max(self.peak_waiting, len(self._waiters))
+
+        started = time.monotonic()
+        granted.wait(timeout)
+        with self._lock:
+            self.wait_seconds += time.monotonic() - started
+            if self._owner is owner:
+                self.acquisitions += 1
+                return
+            self._waiters.remove((owner, granted))
+            self.timeouts += 1
+        raise PoolTimeoutError(f"Timed out after {timeout}s waiting for the SQLite writer")
+
+    def release(self, owner: object):
+        with self._lock:
+            if self._owner is not owner:
+                return
+            if self._waiters:
+                self._owner, granted = self._waiters.popleft()
+                granted.set()
+            else:
+                self._owner = None
+
+
+class _SQLiteCursor:
+    """DB-API cursor that routes each statement to a reader or the writer."""
+
+    def __init__(self, owner: "SQLiteConnection"):
+        self._owner = owner
+        self._cursor: Optional[sqlite3.Cursor] = None
+        self.arraysize = 1
+
+    def _prepare(self, query, has_params: bool) -> Tuple[str, sqlite3.Cursor]:
+        text, writes = translate(_render(query), has_params)
+        self._cursor = self._owner._cursor_for(writes)
+        return text, self._cursor
+
+    def execute(self, query, params=None):
+        text, cursor = self._prepare(query, params is not None)
+        cursor.execute(text, params if params is not None else ())
+
+    def executemany(self, query, params_seq):
+        text, cursor = self._prepare(query, True)
+        cursor.executemany(text, params_seq)
+
+    def copy_expert(self, *args, **kwargs):
+        raise UnsupportedByDatabase("COPY")
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: Optional[int] = None):
+        return self._cursor.fetchmany(size or self.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount if self._cursor is not None else -1
+
+    @property
+    def description(self):
+        return self._cursor.description if self._cursor is not None else None
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    One checkout of SQLitePool, used like a PooledConnection.
+
+    It borrows a reader at its first read and the writer at its first write.
+    commit() and rollback() end the write transaction and hand the writer to
+    the next checkout in line. close() returns the reader.
+    """
+
+    dialect = "sqlite"
+
+    def __init__(self, pool: "SQLitePool"):
+        self._pool = pool
+        self._reader: Optional[sqlite3.Connection] = None
+        self._writing = False
+        self._cursors: List[sqlite3.Cursor] = []
+        self._closed = False
+
+    def _cursor_for(self, writes: bool) -> sqlite3.Cursor:
+        if self._closed:
+            raise sqlite3.ProgrammingError("connection already returned to the pool")
+        if self._writing:
+            conn = self._pool._writer
+        elif writes:
+            conn = self._pool._acquire_writer(self)
+            self._writing = True
+        else:
+            if self._reader is None:
+                self._reader = self._pool._acquire_reader()
+            conn = self._reader
+        cursor = conn.cursor()
+        self._cursors.append(cursor)
+        return cursor
+
+    def cursor(self, *args, **kwargs):
+        """A timed cursor; cursor_factory is ignored because rows already allow access by name."""
+        return _TimedCursor(_SQLiteCursor(self))
+
+    def _close_cursors(self, conn: Optional[sqlite3.Connection] = None):
+        """Close this checkout's cursors (only those on conn, if given)."""
+        kept = []
+        for cursor in self._cursors:
+            if conn is None or cursor.connection is conn:
+                cursor.close()
+            else:
+                kept.append(cursor)
+        self._cursors = kept
+
+    def _end_write(self, statement: str):
+        if not self._writing:
+            return
+        writer = self._pool._writer
+        self._close_cursors(writer)
+        try:
+            writer.execute(statement)
+        except Exception:
+            if writer.in_transaction:
+                writer.execute("ROLLBACK")
+            raise
+        finally:
+            self._writing = False
+            self._pool._release_writer(self)
+
+    def commit(self):
+        self._end_write("COMMIT")
+
+    def rollback(self):
+        self._end_write("ROLLBACK")
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        """Discard uncommitted work and return the reader to the pool."""
+        if self._closed:
+            return
+        try:
+            self.rollback()
+        finally:
+            self._close_cursors()
+            self._closed = True
+            if self._reader is not None:
+                reader, self._reader = self._reader, None
+                self._pool._release_reader(reader)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        self.close()
+
+    def __del__(self):
+        # Safety net for call sites that forget to close: never strand the writer.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class SQLitePool:
+    """One writer connection behind a FIFO queue plus a bounded pool of readers, on one database file."""
+
+    dialect = "sqlite"
+
+    def __init__(self, path: str, readers: int = SQLITE_READERS, timeout: float = DB_POOL_TIMEOUT,
+                 statement_cache_size: int = SQLITE_STATEMENT_CACHE_SIZE):
+        if path in ("", ":memory:"):
+            raise ValueError("SQLitePool needs a database file; readers cannot share an in-memory database")
+        self.path = path
+        self.max_readers = max(1, readers)
+        self.timeout = timeout
+        self.statement_cache_size = statement_cache_size
+
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._writer_queue = _WriterQueue()
+        self._open_lock = threading.Lock()
+        self._idle: Deque[sqlite3.Connection] = deque()
+        self._readers_open = 0
+        self._reader_waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._reader_timeouts = 0
+        self._peak_readers_in_use = 0
+
+    @property
+    def _writer(self) -> sqlite3.Connection:
+        """The writer connection, opened (and the schema migrated) on first use."""
+        if self._writer_conn is None:
+            with self._open_lock:
+                if self._writer_conn is None:
+                    conn = connect(self.path, statement_cache_size=self.statement_cache_size)
+                    try:
+                        apply_migrations(conn)
+                    except Exception:
+                        conn.close()
+                        raise
+                    self._writer_conn = conn
+        return self._writer_conn
+
+    def getconn(self) -> SQLiteConnection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("connection pool is closed")
+        self._writer  # Readers must not open the file before the schema exists.
+        with self._cond:
+            self._checkouts += 1
+        return SQLiteConnection(self)
+
+    def _acquire_writer(self, owner: SQLiteConnection) -> sqlite3.Connection:
+        writer = self._writer
+        self._writer_queue.acquire(owner, self.timeout)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self._writer_queue.release(owner)
+            raise
+        return writer
+
+    def _release_writer(self, owner: SQLiteConnection):
+        self._writer_queue.release(owner)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._readers_open < self.max_readers:
+                    self._readers_open += 1
+                    self._cond.release()
+                    try:
+                        conn = connect(self.path, read_only=True, statement_cache_size=self.statement_cache_size)
+                    except Exception:
+                        self._cond.acquire()
+                        self._readers_open -= 1
+                        self._cond.notify()
+                        raise
+                    self._cond.acquire()
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._reader_timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a SQLite reader "
+                        f"(max readers {self.max_readers})"
+                    )
+                self._reader_waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._reader_waiting -= 1
+            in_use = self._readers_open - len(self._idle)
+            self._peak_readers_in_use = max(self._peak_readers_in_use, in_use)
+        return conn
+
+    def _release_reader(self, conn: sqlite3.Connection):
+        with self._cond:
+            if self._closed:
+                self._readers_open -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def warm_up(self):
+        """Open the database (applying the schema) and one reader ahead of the first request."""
+        self._writer
+        self._release_reader(self._acquire_reader())
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._readers_open -= 1
+            self._cond.notify_all()
+        with self._open_lock:
+            if self._writer_conn is not None and not self._writer_queue.held:
+                self._writer_conn.close()
+                self._writer_conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Occupancy in the same terms as ConnectionPool.stats(), plus writer queue and statement cache figures."""
+        queue = self._writer_queue
+        translations = translate.cache_info()
+        with self._cond:
+            readers_in_use = self._readers_open - len(self._idle)
+            in_use = readers_in_use + (1 if queue.held else 0)
+            max_size = self.max_readers + 1
+            return {
+                "dialect": self.dialect,
+                "path": self.path,
+                "max_size": max_size,
+                "size": self._readers_open + (1 if self._writer_conn is not None else 0),
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "waiting": self._reader_waiting + queue.waiting,
+                "saturation": round(in_use / max_size, 3),
+                "checkouts": self._checkouts,
+                "timeouts": self._reader_timeouts + queue.timeouts,
+                "readers": {
+                    "max": self.max_readers,
+                    "open": self._readers_open,
+                    "in_use": readers_in_use,
+                    "peak_in_use": self._peak_readers_in_use,
+                },
+                "writer": {
+                    "held": queue.held,
+                    "waiting": queue.waiting,
+                    "peak_waiting": queue.peak_waiting,
+                    "transactions": queue.acquisitions,
+                    "waits": queue.waits,
+                    "wait_seconds": round(queue.wait_seconds, 3),
+                },
+                "statement_cache": {
+                    "size": self.statement_cache_size,
+                    "translations_cached": translations.currsize,
+                    "translation_hits": translations.hits,
+                    "translation_misses": translations.misses,
+                },
+            }
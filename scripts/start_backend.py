@@ -1,56 +1,333 @@
 #!/usr/bin/env python3
 """
-Simple script to start the FastAPI backend server
-Run this script to start the backend on http://localhost:8000
+Start the FastAPI backend server.
+
+By default this runs a production server: a supervisor process starts one
+uvicorn worker per CPU. Every worker binds the same port with SO_REUSEPORT,
+so the kernel spreads incoming connections across them. A worker only
+starts listening after the app's startup hooks have run. It counts as ready
+once READY_PATH (/readyz), sent to it alone over a private unix socket,
+succeeds.
+SIGHUP restarts the workers one at a time, and an old worker is only
+drained after its replacement is ready. SIGTERM/SIGINT drain every worker
+and exit. Workers that exit, or fail HEALTH_FAILURE_THRESHOLD liveness probes
+(HEALTH_PATH, /healthz) in a row, are replaced. Readiness is not used for
+that: during a database outage every worker fails /readyz, and restarting
+them all would also take down the endpoints that do not need the database.
+
+Each worker gets an even share of DB_MAX_CONNECTIONS as its pool size and
+of the CPUs as bcrypt processes, unless DB_POOL_MAX_SIZE or BCRYPT_WORKERS
+are set explicitly.
+
+    python scripts/start_backend.py                  # production, one worker per CPU
+    python scripts/start_backend.py --workers 4
+    python scripts/start_backend.py --reload         # development: single process, auto-reload
 """
 
+import argparse
+import os
+import shutil
+import signal
+import socket
 import subprocess
 import sys
-import os
+import tempfile
+import time
 from pathlib import Path
+from typing import Dict, List, Optional
 
-def main():
-    # Get the directory where this script is located
-    script_dir = Path(__file__).parent
-    backend_file = script_dir / "backend_api.py"
-    
-    if not backend_file.exists():
-        print("❌ Error: backend_api.py not found!")
-        print(f"Expected location: {backend_file}")
-        return 1
-    
-    print("🚀 Starting Tech Zolo Backend Server...")
-    print("📍 Server will be available at: http://localhost:8000")
-    print("📊 API Documentation: http://localhost:8000/docs")
+import httpx
+
+from settings import get_settings
+
+SCRIPT_DIR = Path(__file__).parent
+
+settings = get_settings()
+WEB_CONCURRENCY = settings.get_int("WEB_CONCURRENCY", os.cpu_count() or 1)
+DB_MAX_CONNECTIONS = settings.get_int("DB_MAX_CONNECTIONS", 50)
+GRACEFUL_TIMEOUT_SECONDS = settings.get_float("GRACEFUL_TIMEOUT_SECONDS", 30)
+HEALTH_PATH = settings.get("HEALTH_PATH", "/healthz")
+READY_PATH = settings.get("READY_PATH", "/readyz")
+HEALTH_INTERVAL_SECONDS = settings.get_float("HEALTH_INTERVAL_SECONDS", 5)
+HEALTH_TIMEOUT_SECONDS = settings.get_float("HEALTH_TIMEOUT_SECONDS", 2)
+HEALTH_FAILURE_THRESHOLD = settings.get_int("HEALTH_FAILURE_THRESHOLD", 3)
+READY_TIMEOUT_SECONDS = settings.get_float("READY_TIMEOUT_SECONDS", 60)
+
+
+def worker_env(workers: int, base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Environment for one worker: split the connection and CPU budgets evenly."""
+    env = dict(os.environ if base is None else base)
+    if "DB_POOL_MAX_SIZE" not in env:
+        env["DB_POOL_MAX_SIZE"] = str(max(2, DB_MAX_CONNECTIONS // workers))
+    pool_max = int(env["DB_POOL_MAX_SIZE"])
+    env["DB_POOL_MIN_SIZE"] = str(min(int(env.get("DB_POOL_MIN_SIZE", "1")), pool_max))
+    if "BCRYPT_WORKERS" not in env:
+        env["BCRYPT_WORKERS"] = str(max(1, (os.cpu_count() or 1) // workers))
+    return env
+
+
+def _listen_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def run_worker(args) -> int:
+    """One server process: bind, run startup hooks, then accept connections."""
+    import uvicorn
+
+    if args.fd is not None:
+        sock = socket.socket(fileno=args.fd)
+    else:
+        # Bound but not listening: the kernel routes no connections here until
+        # uvicorn calls listen(), which it does after the startup hooks finish.
+        sock = _listen_socket(args.host, args.port, reuse_port=True)
+    health = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    health.bind(args.health_socket)
+
+    config = uvicorn.Config(
+        "backend_api:create_app",
+        factory=True,
+        log_level="info",
+        timeout_graceful_shutdown=int(GRACEFUL_TIMEOUT_SECONDS),
+    )
+    uvicorn.Server(config).run(sockets=[sock, health])
+    return 0
+
+
+class Worker:
+    def __init__(self, number: int, process: subprocess.Popen, health_socket: str):
+        self.number = number
+        self.process = process
+        self.health_socket = health_socket
+        self.ready = False
+        self.failures = 0
+        self.last_probe = 0.0
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+
+class Supervisor:
+    """Starts, health-checks, restarts and drains the worker processes."""
+
+    def __init__(self, host: str, port: int, workers: int):
+        self.host = host
+        self.port = port
+        self.size = max(1, workers)
+        self.workers: List[Worker] = []
+        self.runtime_dir = tempfile.mkdtemp(prefix="techzolo-")
+        self._spawned = 0
+        self._stopping = False
+        self._restart_requested = False
+        self._env = worker_env(self.size)
+        # Without SO_REUSEPORT, fall back to one socket bound here and inherited by every worker.
+        self._shared_socket: Optional[socket.socket] = None
+        if not hasattr(socket, "SO_REUSEPORT"):
+            self._shared_socket = _listen_socket(host, port, reuse_port=False)
+            self._shared_socket.listen(2048)
+            self._shared_socket.set_inheritable(True)
+
+    def spawn(self) -> Worker:
+        self._spawned += 1
+        health_socket = os.path.join(self.runtime_dir, f"worker-{self._spawned}.sock")
+        command = [sys.executable, os.path.abspath(__file__), "--worker",
+                   "--host", self.host, "--port", str(self.port), "--health-socket", health_socket]
+        pass_fds = ()
+        if self._shared_socket is not None:
+            command += ["--fd", str(self._shared_socket.fileno())]
+            pass_fds = (self._shared_socket.fileno(),)
+        process = subprocess.Popen(command, cwd=SCRIPT_DIR, env=self._env, pass_fds=pass_fds)
+        worker = Worker(self._spawned, process, health_socket)
+        self.workers.append(worker)
+        print(f"Started worker {worker.number} (pid {worker.pid})", flush=True)
+        return worker
+
+    def start_worker(self) -> bool:
+        worker = self.spawn()
+        if self.wait_ready(worker):
+            return True
+        self.stop(worker)
+        time.sleep(1)  # Back off so a crash loop does not spin.
+        return False
+
+    def probe(self, worker: Worker, path: str = HEALTH_PATH) -> bool:
+        """GET path from this specific worker over its unix socket."""
+        try:
+            transport = httpx.HTTPTransport(uds=worker.health_socket)
+            with httpx.Client(transport=transport, timeout=HEALTH_TIMEOUT_SECONDS) as client:
+                response = client.get(f"http://worker{path}")
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def check_alive(self, worker: Worker) -> bool:
+        """Liveness probe; counts consecutive failures toward HEALTH_FAILURE_THRESHOLD."""
+        worker.last_probe = time.monotonic()
+        alive = self.probe(worker, HEALTH_PATH)
+        worker.failures = 0 if alive else worker.failures + 1
+        return alive
+
+    def wait_ready(self, worker: Worker, timeout: float = READY_TIMEOUT_SECONDS) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not self._stopping:
+            if worker.process.poll() is not None:
+                return False
+            if os.path.exists(worker.health_socket) and self.probe(worker, READY_PATH):
+                worker.ready = True
+                worker.last_probe = time.monotonic()
+                print(f"Worker {worker.number} (pid {worker.pid}) is ready", flush=True)
+                return True
+            time.sleep(0.2)
+        return False
+
+    def stop(self, worker: Worker, timeout: float = GRACEFUL_TIMEOUT_SECONDS):
+        """SIGTERM lets uvicorn finish in-flight requests; SIGKILL after the timeout."""
+        if worker in self.workers:
+            self.workers.remove(worker)
+        if worker.process.poll() is None:
+            worker.process.send_signal(signal.SIGTERM)
+            try:
+                worker.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+                worker.process.wait()
+        if os.path.exists(worker.health_socket):
+            os.unlink(worker.health_socket)
+
+    def replace(self, worker: Worker):
+        """Start a successor, wait until it is healthy, then drain the old worker."""
+        successor = self.spawn()
+        if not self.wait_ready(successor):
+            print(f"Replacement for worker {worker.number} did not become ready", flush=True)
+            self.stop(successor)
+            return
+        self.stop(worker)
+
+    def rolling_restart(self):
+        print("Rolling restart", flush=True)
+        for worker in list(self.workers):
+            if self._stopping:
+                return
+            self.replace(worker)
+        print("Rolling restart complete", flush=True)
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for worker in list(self.workers):
+            if worker.process.poll() is not None:
+                print(f"Worker {worker.number} (pid {worker.pid}) exited with {worker.process.returncode}", flush=True)
+                self.stop(worker)
+                continue
+            if worker.ready and now - worker.last_probe >= HEALTH_INTERVAL_SECONDS:
+                if not self.check_alive(worker) and worker.failures >= HEALTH_FAILURE_THRESHOLD:
+                    print(f"Worker {worker.number} (pid {worker.pid}) failed {worker.failures} liveness probes",
+                          flush=True)
+                    self.replace(worker)
+        while len(self.workers) < self.size and not self._stopping:
+            self.start_worker()
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_restart(self, signum, frame):
+        self._restart_requested = True
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+        print(f"Starting {self.size} workers on http://{self.host}:{self.port}", flush=True)
+        try:
+            starting = [self.spawn() for _ in range(self.size)]
+            for worker in starting:
+                if not self.wait_ready(worker):
+                    self.stop(worker)
+            while not self._stopping:
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self.rolling_restart()
+                self._check_workers()
+                time.sleep(0.5)
+        finally:
+            print("Stopping workers", flush=True)
+            for worker in list(self.workers):
+                if worker.process.poll() is None:
+                    worker.process.send_signal(signal.SIGTERM)
+            for worker in list(self.workers):
+                self.stop(worker)
+            shutil.rmtree(self.runtime_dir, ignore_errors=True)
+        return 0
+
+
+def run_dev_server(host: str, port: int) -> int:
+    """Single auto-reloading process, logging to backend_log.txt."""
+    print("🚀 Starting Tech Zolo Backend Server (development, --reload)...")
+    print(f"📍 Server will be available at: http://localhost:{port}")
+    print(f"📊 API Documentation: http://localhost:{port}/docs")
     print("🛑 Press Ctrl+C to stop the server")
     print("-" * 50)
-    
+
     # Define the log file path
-    log_file_path = script_dir / "backend_log.txt"
-    
+    log_file_path = SCRIPT_DIR / "backend_log.txt"
+
     try:
         with open(log_file_path, "w") as log_file:
             # Start the FastAPI server using uvicorn
             subprocess.run([
-                sys.executable, "-m", "uvicorn", 
-                "backend_api:app", 
-                "--host", "0.0.0.0", 
-                "--port", "8000", 
+                sys.executable, "-m", "uvicorn",
+                "backend_api:create_app",
+                "--factory",
+                "--host", host,
+                "--port", str(port),
                 "--reload",
                 "--log-level", "info"
-            ], cwd=script_dir, check=True, stdout=log_file, stderr=subprocess.STDOUT)
+            ], cwd=SCRIPT_DIR, check=True, stdout=log_file, stderr=subprocess.STDOUT)
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
         return 0
     except subprocess.CalledProcessError as e:
         print(f"❌ Error starting server: {e}")
         print("\n💡 Make sure you have installed the required dependencies:")
-        print("   pip install fastapi uvicorn python-multipart bcrypt python-jose[cryptography] sqlite3")
+        print("   pip install -r scripts/requirements.txt")
         return 1
     except FileNotFoundError:
         print("❌ Error: uvicorn not found!")
         print("\n💡 Install uvicorn with: pip install uvicorn")
         return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY, help="worker processes (default: CPU count)")
+    parser.add_argument("--reload", action="store_true", help="development mode: one process that reloads on code changes")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--health-socket", help=argparse.SUPPRESS)
+    parser.add_argument("--fd", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    backend_file = SCRIPT_DIR / "backend_api.py"
+    if not backend_file.exists():
+        print("❌ Error: backend_api.py not found!")
+        print(f"Expected location: {backend_file}")
+        return 1
+
+    if args.worker:
+        return run_worker(args)
+    if args.reload:
+        return run_dev_server(args.host, args.port)
+    if not hasattr(socket, "AF_UNIX"):
+        print("❌ Multi-worker mode needs a POSIX system; use --reload on Windows")
+        return 1
+    return Supervisor(args.host, args.port, args.workers).run()
 
 if __name__ == "__main__":
     sys.exit(main())
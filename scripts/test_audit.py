@@ -0,0 +1,122 @@
+from datetime import datetime, timezone
+
+import psycopg2
+
+from audit import AuditLog, audit_log
+from db_stats import DatabaseStats
+from test_backend_api import client
+
+
+def logged_actions(db_connection):
+    cursor = db_connection.cursor()
+    cursor.execute("SELECT action, user_id, details FROM activity_logs ORDER BY id")
+    return cursor.fetchall()
+
+def test_flush_writes_batches_into_monthly_partitions(db_connection):
+    log = AuditLog(batch_size=2)
+    for i in range(5):
+        log.record("test_event", details={"n": i}, ip_address="127.0.0.1")
+    assert log.flush() == 5
+    assert log.stats()["batches"] == 3
+
+    cursor = db_connection.cursor()
+    cursor.execute("SELECT tableoid::regclass::text, details FROM activity_logs WHERE action = 'test_event' ORDER BY id")
+    rows = cursor.fetchall()
+    assert [details for _, details in rows] == [f'{{"n":{i}}}' for i in range(5)]
+    assert {partition for partition, _ in rows} == {f"activity_logs_{datetime.now(timezone.utc):%Y_%m}"}
+
+def test_months_without_a_partition_get_one(db_connection):
+    log = AuditLog()
+    log._write_batch([(None, "future_event", None, None, None, None, None, datetime(2031, 1, 5))])
+    cursor = db_connection.cursor()
+    cursor.execute("SELECT tableoid::regclass::text FROM activity_logs WHERE action = 'future_event'")
+    assert cursor.fetchone()[0] == "activity_logs_2031_01"
+
+def test_full_buffer_drops_oldest_events():
+    log = AuditLog(capacity=3)
+    for i in range(5):
+        log.record(f"event_{i}")
+    stats = log.stats()
+    assert stats["queued"] == 3
+    assert stats["dropped"] == 2
+    assert [event[1] for event in log._buffer] == ["event_2", "event_3", "event_4"]
+
+def test_failed_flush_keeps_events_for_the_next_cycle(monkeypatch):
+    log = AuditLog(capacity=4)
+    for i in range(3):
+        log.record(f"event_{i}")
+
+    def broken(events):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(log, "_write_batch", broken)
+    assert log.flush() == 0
+    log.record("event_3")
+    log.record("event_4")
+
+    stats = log.stats()
+    assert stats["failed_flushes"] == 1
+    assert stats["queued"] == 4 and stats["dropped"] == 1
+    assert [event[1] for event in log._buffer] == ["event_1", "event_2", "event_3", "event_4"]
+
+def test_rejected_event_is_isolated_and_dropped(monkeypatch):
+    log = AuditLog(batch_size=4, max_attempts=2)
+    for action in ["a", "b", "poison", "c", "d", "e", "f"]:
+        log.record(action)
+    written = []
+
+    def write(events):
+        if any(event[1] == "poison" for event in events):
+            raise ValueError("no partition of relation found for row")
+        written.extend(event[1] for event in events)
+    monkeypatch.setattr(log, "_write_batch", write)
+
+    cycles = 0
+    while log.stats()["queued"]:
+        log.flush()
+        cycles += 1
+    assert written == ["a", "b", "c", "d", "e", "f"]
+    assert cycles == 3  # two failures of the full batch, then one of the event alone
+    stats = log.stats()
+    assert stats["rejected"] == 1 and stats["dropped"] == 1 and stats["written"] == 6
+
+    log.record("g")
+    assert log.flush() == 1 and log._take == 4
+
+def test_outage_does_not_count_toward_max_attempts(monkeypatch):
+    log = AuditLog(max_attempts=1)
+    log.record("kept")
+
+    def unreachable(events):
+        raise psycopg2.OperationalError("could not connect to server")
+    monkeypatch.setattr(log, "_write_batch", unreachable)
+    for _ in range(5):
+        assert log.flush() == 0
+    assert log.stats()["queued"] == 1 and log.stats()["dropped"] == 0
+
+    monkeypatch.undo()
+    monkeypatch.setattr(log, "_write_batch", lambda events: None)
+    assert log.flush() == 1
+
+def test_api_events_are_audited(db_connection):
+    signup_data = {"email": "audited@example.com", "password": "password123", "full_name": "Audited User"}
+    user_id = client.post("/auth/signup", json=signup_data).json()["user"]["id"]
+    client.post("/auth/login", data={"username": "audited@example.com", "password": "wrong"})
+    token = client.post("/auth/login", data={"username": "audited@example.com", "password": "password123"}).json()["access_token"]
+    client.put("/auth/profile", json={"company": "AuditCo"}, headers={"Authorization": f"Bearer {token}"})
+    client.post("/contact", json={"name": "A", "email": "audited@example.com", "subject": "S", "message": "M"})
+
+    # Nothing reaches the table until the flusher runs.
+    assert logged_actions(db_connection) == []
+    audit_log.flush()
+    assert logged_actions(db_connection) == [
+        ("signup", user_id, None),
+        ("login_failed", user_id, '{"email":"audited@example.com","reason":"bad_password"}'),
+        ("login", user_id, None),
+        ("profile_update", user_id, '{"fields":["company"]}'),
+        ("contact_submit", None, '{"email":"audited@example.com"}'),
+    ]
+
+def test_database_stats_roll_up_partitions():
+    tables = {table["name"]: table for table in DatabaseStats().get()["tables"]}
+    index_names = {index["name"] for index in tables["activity_logs"]["indexes"]}
+    assert {"activity_logs_pkey", "idx_activity_logs_user_id", "idx_activity_logs_created_at"} == index_names
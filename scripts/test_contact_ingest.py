@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+import backend_api
+from contact_ingest import ContactIngestor, IngestBacklogFull
+from test_backend_api import client
+
+
+def count_contacts(db_connection, email):
+    cursor = db_connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM contact_submissions WHERE email = %s", (email,))
+    return cursor.fetchone()[0]
+
+def test_flush_writes_queued_submissions_in_one_batch(tmp_path, db_connection):
+    ingestor = ContactIngestor(spool_dir=str(tmp_path), batch_size=100)
+    for i in range(3):
+        ingestor.submit(f"User {i}", "batch@example.com", "Subject", "Message")
+    assert len(os.listdir(tmp_path)) == 1
+
+    assert ingestor.flush() == 3
+    assert ingestor.stats()["batches"] == 1
+    assert count_contacts(db_connection, "batch@example.com") == 3
+    assert os.listdir(tmp_path) == []
+
+def test_replay_is_deduplicated_by_ingest_id(tmp_path, db_connection):
+    ingestor = ContactIngestor(spool_dir=str(tmp_path), batch_size=100)
+    ingest_id = ingestor.submit("Once", "once@example.com", "Subject", "Message")
+    ingestor.flush()
+
+    # A segment left behind by a crash that already delivered one of its records.
+    orphan = tmp_path / "segment-1-1.ndjson"
+    records = [
+        {"ingest_id": ingest_id, "name": "Once", "email": "once@example.com", "subject": "Subject", "message": "Message", "phone": None},
+        {"ingest_id": "7f6f1b8e-0d0c-4a55-9d65-4d6c5b9d0c11", "name": "Late", "email": "late@example.com", "subject": "Subject", "message": "Message", "phone": None},
+    ]
+    orphan.write_text("".join(json.dumps(record) + "\n" for record in records) + '{"torn')
+
+    assert ingestor.replay_spool()
+    assert count_contacts(db_connection, "once@example.com") == 1
+    assert count_contacts(db_connection, "late@example.com") == 1
+    assert not orphan.exists()
+
+def test_buffered_mode_acknowledges_before_insert(tmp_path, monkeypatch, db_connection):
+    ingestor = ContactIngestor(spool_dir=str(tmp_path), batch_size=100)
+    monkeypatch.setattr(backend_api, "CONTACT_INGEST_MODE", "buffered")
+    monkeypatch.setattr(backend_api, "contact_ingestor", ingestor)
+
+    contact_data = {"name": "Queued", "email": "queued@example.com", "subject": "Subject", "message": "Message"}
+    response = client.post("/contact", json=contact_data)
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    assert count_contacts(db_connection, "queued@example.com") == 0
+
+    ingestor.flush()
+    assert count_contacts(db_connection, "queued@example.com") == 1
+
+def test_buffered_mode_sheds_load_when_backlog_full(tmp_path, monkeypatch):
+    ingestor = ContactIngestor(spool_dir=str(tmp_path), max_buffer=1)
+    monkeypatch.setattr(backend_api, "CONTACT_INGEST_MODE", "buffered")
+    monkeypatch.setattr(backend_api, "contact_ingestor", ingestor)
+
+    contact_data = {"name": "Busy", "email": "busy@example.com", "subject": "Subject", "message": "Message"}
+    assert client.post("/contact", json=contact_data).status_code == 202
+    response = client.post("/contact", json=contact_data)
+    assert response.status_code == 503
+
+def test_failed_flushes_count_toward_the_backlog(tmp_path, monkeypatch, db_connection):
+    ingestor = ContactIngestor(spool_dir=str(tmp_path), max_buffer=3)
+    ingestor.submit("Down", "down@example.com", "Subject", "Message")
+    ingestor.submit("Down", "down@example.com", "Subject", "Message")
+
+    def database_down(records):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(ingestor, "_write_batch", database_down)
+    assert ingestor.flush() == 0
+    assert ingestor.stats()["queued"] == 0 and ingestor.stats()["awaiting_replay"] == 2
+    ingestor.submit("Down", "down@example.com", "Subject", "Message")
+    with pytest.raises(IngestBacklogFull):
+        ingestor.submit("Down", "down@example.com", "Subject", "Message")
+    assert not ingestor.replay_spool()
+
+    monkeypatch.undo()
+    assert ingestor.replay_spool()
+    assert ingestor.stats()["awaiting_replay"] == 0
+    ingestor.submit("Up", "up@example.com", "Subject", "Message")
+    assert ingestor.flush() == 2
+    assert count_contacts(db_connection, "down@example.com") == 3
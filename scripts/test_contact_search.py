@@ -0,0 +1,78 @@
+import contacts
+from test_backend_api import client, signup_admin_headers
+
+
+def submit(name, email, subject, message):
+    response = client.post("/contact", json={"name": name, "email": email, "subject": subject, "message": message})
+    assert response.status_code == 200
+
+def search(headers, **params):
+    return client.get("/admin/contacts/search", params=params, headers=headers)
+
+def test_results_are_ranked_and_highlighted():
+    submit("Ada", "ada@example.com", "Invoice is wrong", "The invoice total does not match the quote.")
+    submit("Bob", "bob@example.com", "Question", "Where do I find my invoice?")
+    submit("Cy", "cy@example.com", "Hello", "Nothing to see here.")
+    headers = signup_admin_headers("search-admin@example.com")
+
+    response = search(headers, q="invoice")
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["email"] for result in results] == ["ada@example.com", "bob@example.com"]
+    assert results[0]["rank"] > results[1]["rank"]
+    assert results[0]["subject_highlight"] == "<mark>Invoice</mark> is wrong"
+    assert "<mark>invoice</mark>" in results[1]["message_highlight"]
+
+def test_highlights_escape_submitted_html():
+    submit("Mallory", "mallory@example.com", "Returns & exchanges <3 refund", "<script>alert(1)</script> refund please")
+    headers = signup_admin_headers("search-admin@example.com")
+    result = search(headers, q="refund").json()["results"][0]
+    assert result["subject_highlight"] == "Returns &amp; exchanges &lt;3 <mark>refund</mark>"
+    assert "<script>" not in result["message_highlight"]
+
+def test_email_and_name_prefixes_match():
+    submit("Grace Hopper", "grace.hopper@navy.example", "Compilers", "About COBOL.")
+    submit("Alan", "alan@example.com", "Machines", "Grace period question.")
+    headers = signup_admin_headers("search-admin@example.com")
+
+    results = search(headers, q="GRACE.HOP").json()["results"]
+    assert [result["name"] for result in results] == ["Grace Hopper"]
+    # The prefix match on the name outranks the text-only match in Alan's message.
+    results = search(headers, q="grace").json()["results"]
+    assert [result["name"] for result in results] == ["Grace Hopper", "Alan"]
+    # LIKE wildcards in the query are literal.
+    assert search(headers, q="%").json()["results"] == []
+
+def test_keyset_pagination_walks_every_match():
+    for i in range(7):
+        submit(f"User {i}", f"user{i}@example.com", f"Shipping delay {i}", "My shipping is late. " * (i + 1))
+    headers = signup_admin_headers("search-admin@example.com")
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "shipping", "page_size": 3}
+        if cursor:
+            params["cursor"] = cursor
+        page = search(headers, **params).json()
+        seen.extend(result["id"] for result in page["results"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 7 and len(set(seen)) == 7
+
+def test_search_filters_and_validation(db_connection):
+    submit("Dee", "dee@example.com", "Outage", "Site outage report")
+    submit("Eve", "eve@example.com", "Outage", "Another outage report")
+    db_connection.cursor().execute("UPDATE contact_submissions SET status = 'resolved' WHERE email = 'eve@example.com'")
+    db_connection.commit()
+    headers = signup_admin_headers("search-admin@example.com")
+
+    results = search(headers, q="outage", status="resolved").json()["results"]
+    assert [result["email"] for result in results] == ["eve@example.com"]
+    assert search(headers, q="   ").status_code == 400
+    assert search(headers, q="x" * (contacts.SEARCH_MAX_QUERY_LENGTH + 1)).status_code == 400
+    assert search(headers, q="outage", cursor="garbage").status_code == 400
+    assert search(headers, q="outage", status="bogus").status_code == 400
+
+    token = client.post("/auth/signup", json={"email": "nosearch@example.com", "password": "pw", "full_name": "N"}).json()["access_token"]
+    assert search({"Authorization": f"Bearer {token}"}, q="outage").status_code == 403
@@ -0,0 +1,45 @@
+from db_stats import DatabaseStats, TRACKED_TABLES
+from test_backend_api import client, signup_admin_headers
+
+
+def test_stats_cover_tracked_tables_without_scans(db_connection):
+    stats = DatabaseStats().get()
+    tables = {table["name"]: table for table in stats["tables"]}
+    assert set(tables) == set(TRACKED_TABLES)
+    assert stats["database_bytes"] > 0
+
+    contacts = tables["contact_submissions"]
+    cursor = db_connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM contact_submissions")
+    assert contacts["exact"] and contacts["rows"] == cursor.fetchone()[0]
+    assert contacts["total_bytes"] >= contacts["table_bytes"]
+    assert {index["name"] for index in contacts["indexes"]} >= {"idx_contact_submissions_status_keyset"}
+    assert tables["users"]["rows_source"] in ("pg_stat_user_tables", "pg_class")
+
+def test_stats_are_cached_until_the_ttl_expires():
+    stats = DatabaseStats(ttl=60)
+    first = stats.get()
+    assert stats.get() is first
+    assert stats.refreshes == 1
+    assert stats.get(max_age=0) is not first
+    assert stats.refreshes == 2
+
+def test_growth_rates_follow_inserts():
+    stats = DatabaseStats(ttl=0)
+    stats.get()
+    for i in range(5):
+        client.post("/contact", json={"name": f"Growth {i}", "email": "growth@example.com", "subject": "S", "message": "M"})
+    contacts = next(table for table in stats.get()["tables"] if table["name"] == "contact_submissions")
+    assert contacts["growth"]["window_seconds"] > 0
+    assert contacts["growth"]["rows_per_hour"] > 0
+
+def test_admin_database_stats_endpoint():
+    signup_data = {"email": "not-admin@example.com", "password": "password123", "full_name": "User"}
+    token = client.post("/auth/signup", json=signup_data).json()["access_token"]
+    response = client.get("/admin/database/stats", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+
+    headers = signup_admin_headers("stats-admin@example.com")
+    response = client.get("/admin/database/stats", params={"refresh": "true"}, headers=headers)
+    assert response.status_code == 200
+    assert {table["name"] for table in response.json()["tables"]} == set(TRACKED_TABLES)
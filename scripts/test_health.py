@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+import backend_api
+import health
+from health import readiness_probe
+from test_backend_api import client
+
+
+@pytest.fixture(autouse=True)
+def reset_probe():
+    readiness_probe.clear()
+    backend_api.user_count.clear()
+    yield
+    readiness_probe.clear()
+    backend_api.user_count.clear()
+
+def test_healthz_does_no_io(monkeypatch):
+    monkeypatch.setattr(health, "_ping", lambda: pytest.fail("liveness must not touch the database"))
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+def test_readyz_caches_the_ping(monkeypatch):
+    calls = []
+    real_ping = health._ping
+    monkeypatch.setattr(health, "_ping", lambda: calls.append(1) or real_ping())
+
+    for _ in range(3):
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+    assert len(calls) == 1
+
+def test_readyz_reports_database_errors(monkeypatch):
+    def failing_ping():
+        raise RuntimeError("connection refused")
+    monkeypatch.setattr(health, "_ping", failing_ping)
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json() == {"status": "unavailable", "ready": False, "error": "connection refused"}
+
+def test_readyz_times_out(monkeypatch):
+    monkeypatch.setattr(health, "_ping", lambda: time.sleep(0.5))
+    monkeypatch.setattr(readiness_probe, "timeout", 0.05)
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert "timed out" in response.json()["error"]
+
+def test_stats_serves_a_cached_user_count():
+    before = client.get("/stats").json()["database"]["users"]
+
+    client.post("/auth/signup", json={"email": "stats@example.com", "password": "password123", "full_name": "Stats"})
+    assert client.get("/stats").json()["database"]["users"] == before
+
+    backend_api.user_count.clear()
+    assert client.get("/stats").json()["database"]["users"] == before + 1
@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+
+import metrics
+from app_logging import get_logger
+from metrics import Histogram, RequestTrace, timed
+from test_backend_api import client
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test histogram.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/a"} 3' in lines
+    count, total = histogram.samples("/a")
+    assert count == 3 and total == pytest.approx(5.55)
+
+def test_timed_charges_the_current_trace():
+    trace = RequestTrace()
+    token = metrics._current_trace.set(trace)
+    try:
+        with timed("db_query"):
+            pass
+        with timed("db_query"):
+            pass
+    finally:
+        metrics._current_trace.reset(token)
+    assert set(trace.phases) == {"db_query"}
+
+    # Outside a request only the process-wide histogram is updated.
+    before = metrics.phase_duration.samples("db_query")[0]
+    with timed("db_query"):
+        pass
+    assert metrics.phase_duration.samples("db_query")[0] == before + 1
+
+def test_metrics_endpoint_reports_routes_and_phases():
+    signup_data = {"email": "metrics@example.com", "password": "password123", "full_name": "Metrics User"}
+    token = client.post("/auth/signup", json=signup_data).json()["access_token"]
+    client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/auth/signup",status="200"}' in body
+    for phase in ("db_connect", "db_query", "bcrypt", "jwt_encode"):
+        assert f'http_request_phase_duration_seconds_count{{route="/auth/signup",phase="{phase}"}}' in body
+    assert 'http_request_phase_duration_seconds_count{route="/auth/me",phase="jwt_decode"}' in body
+    assert "db_pool_connections_in_use" in body
+
+def test_unknown_paths_do_not_create_route_labels():
+    client.get("/no-such-page-1")
+    client.get("/no-such-page-2")
+    body = client.get("/metrics").text
+    assert "no-such-page" not in body
+
+def test_logger_filters_by_level():
+    logger = get_logger("test")
+    assert not logger.isEnabledFor(logging.DEBUG)
+    assert logger.isEnabledFor(logging.INFO)
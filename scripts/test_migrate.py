@@ -0,0 +1,113 @@
+import shutil
+
+import psycopg2
+import pytest
+
+import migrate
+from migrate import MigrationError, discover, split_statements
+from db_pool import build_dsn
+
+
+@pytest.fixture(name="scratch")
+def fixture_scratch(scratch_database_url):
+    conn = psycopg2.connect(build_dsn(scratch_database_url))
+    conn.autocommit = True
+    yield conn
+    conn.close()
+
+def _versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+    return [row[0] for row in cursor.fetchall()]
+
+def test_discover_orders_migrations_and_reads_markers():
+    migrations = discover()
+    assert [m.version for m in migrations] == sorted(m.version for m in migrations)
+    assert migrations[0].name == "initial_schema"
+    assert all(len(m.checksum) == 64 for m in migrations)
+    concurrent = next(m for m in migrations if m.name == "concurrent_indexes")
+    assert not concurrent.transactional
+
+def test_discover_rejects_bad_names_and_duplicates(tmp_path):
+    (tmp_path / "0001_first.sql").write_text("SELECT 1;")
+    (tmp_path / "0001_again.sql").write_text("SELECT 1;")
+    with pytest.raises(MigrationError, match="Duplicate"):
+        discover(str(tmp_path))
+
+    (tmp_path / "0001_again.sql").unlink()
+    (tmp_path / "second.sql").write_text("SELECT 1;")
+    with pytest.raises(MigrationError, match="file name"):
+        discover(str(tmp_path))
+
+def test_split_statements_respects_quotes_and_function_bodies():
+    sql = """
+        -- comment; not a statement
+        INSERT INTO t VALUES ('a;b', 'it''s');
+        CREATE FUNCTION f() RETURNS trigger AS $$ BEGIN RETURN NEW; END; $$ LANGUAGE plpgsql;
+        /* block; comment */ SELECT 1
+    """
+    statements = split_statements(sql)
+    assert len(statements) == 3
+    assert statements[0] == "INSERT INTO t VALUES ('a;b', 'it''s')"
+    assert "RETURN NEW; END;" in statements[1]
+    assert statements[2] == "SELECT 1"
+
+def test_rerun_applies_nothing(scratch, scratch_database_url):
+    assert migrate.migrate(scratch_database_url) == []
+    assert _versions(scratch.cursor()) == [m.version for m in discover()]
+
+def test_modified_migration_is_rejected(scratch, scratch_database_url):
+    scratch.cursor().execute("UPDATE schema_migrations SET checksum = 'edited' WHERE version = 2")
+    with pytest.raises(MigrationError, match="modified"):
+        migrate.migrate(scratch_database_url)
+
+def test_existing_schema_is_baselined(scratch, scratch_database_url):
+    # A database built from the single schema file that predates migrations.
+    cursor = scratch.cursor()
+    cursor.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+    cursor.execute(discover()[0].sql)
+    cursor.execute("INSERT INTO users (email, password_hash, full_name) VALUES ('old@example.com', 'x', 'Old User')")
+
+    applied = migrate.migrate(scratch_database_url)
+    # 0001 is recorded without being run; everything after it is applied on top of the existing data.
+    assert [m.version for m in applied] == [m.version for m in discover()][1:]
+    assert _versions(cursor) == [m.version for m in discover()]
+    cursor.execute("SELECT full_name FROM users WHERE email = 'old@example.com'")
+    assert cursor.fetchone()[0] == "Old User"
+
+def test_null_contact_status_is_backfilled_then_rejected(scratch, scratch_database_url):
+    # Pre-migration databases could hold NULL status/priority, which key contact_submission_counts.
+    cursor = scratch.cursor()
+    cursor.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+    cursor.execute(discover()[0].sql)
+    cursor.execute(
+        "INSERT INTO contact_submissions (name, email, subject, message, status, priority) "
+        "VALUES ('Old', 'old@example.com', 'S', 'M', NULL, NULL), ('Old', 'old@example.com', 'S', 'M', 'new', NULL)"
+    )
+
+    migrate.migrate(scratch_database_url)
+    cursor.execute("SELECT status, priority, total FROM contact_submission_counts")
+    assert cursor.fetchall() == [("new", "medium", 2)]
+    with pytest.raises(psycopg2.errors.NotNullViolation):
+        cursor.execute("UPDATE contact_submissions SET status = NULL")
+
+def test_failed_migration_rolls_back(scratch, scratch_database_url, tmp_path):
+    for migration in discover():
+        shutil.copy(migration.path, tmp_path)
+    (tmp_path / "9999_broken.sql").write_text("CREATE TABLE half_applied (id INT);\nSELECT 1 / 0;\n")
+
+    with pytest.raises(MigrationError, match="9999_broken"):
+        migrate.migrate(scratch_database_url, directory=str(tmp_path))
+    cursor = scratch.cursor()
+    cursor.execute("SELECT to_regclass('half_applied')")
+    assert cursor.fetchone()[0] is None
+    assert 9999 not in _versions(cursor)
+
+def test_concurrent_indexes_are_valid(db_connection):
+    cursor = db_connection.cursor()
+    cursor.execute(
+        """
+        SELECT c.relname, i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname IN ('idx_contact_submissions_keyset', 'contact_submissions_ingest_id_key')
+        """
+    )
+    assert dict(cursor.fetchall()) == {"idx_contact_submissions_keyset": True, "contact_submissions_ingest_id_key": True}
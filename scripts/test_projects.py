@@ -0,0 +1,91 @@
+from test_backend_api import client, count_statements
+
+
+def signup_headers(email):
+    signup = {"email": email, "password": "password123", "full_name": "Project Owner"}
+    token = client.post("/auth/signup", json=signup).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def create(headers, title, **fields):
+    response = client.post("/projects", json={"title": title, "project_type": "website", **fields}, headers=headers)
+    assert response.status_code == 201
+    return response.json()
+
+def test_project_crud():
+    headers = signup_headers("projects@example.com")
+    project = create(headers, "Shop", budget_range="5k-10k")
+    assert project["status"] == "planning" and project["budget_range"] == "5k-10k"
+
+    path = f"/projects/{project['id']}"
+    assert client.get(path, headers=headers).json()["title"] == "Shop"
+    updated = client.put(path, json={"status": "in_progress", "timeline": "Q3"}, headers=headers).json()
+    assert updated["status"] == "in_progress" and updated["timeline"] == "Q3"
+    assert updated["budget_range"] == "5k-10k"
+
+    assert client.put(path, json={"title": None}, headers=headers).status_code == 400
+    assert client.put(path, json={"status": "bogus"}, headers=headers).status_code == 422
+    assert client.delete(path, headers=headers).status_code == 200
+    assert client.get(path, headers=headers).status_code == 404
+    assert client.delete(path, headers=headers).status_code == 404
+
+def test_projects_are_private_to_their_owner():
+    owner = signup_headers("owner@example.com")
+    other = signup_headers("other@example.com")
+    path = f"/projects/{create(owner, 'Private')['id']}"
+
+    assert client.get(path, headers=other).status_code == 404
+    assert client.put(path, json={"title": "Mine now"}, headers=other).status_code == 404
+    assert client.delete(path, headers=other).status_code == 404
+    assert client.get("/projects", headers=other).json()["projects"] == []
+    assert client.get(path, headers=owner).json()["title"] == "Private"
+
+def test_project_list_pages_newest_first():
+    headers = signup_headers("pages@example.com")
+    ids = [create(headers, f"Project {i}")["id"] for i in range(5)]
+
+    seen, cursor = [], None
+    while True:
+        params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/projects", params=params, headers=headers).json()
+        seen.extend(project["id"] for project in page["projects"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ids[::-1]
+    assert client.get("/projects", params={"status": "bogus"}, headers=headers).status_code == 400
+    assert client.get("/projects", params={"cursor": "garbage"}, headers=headers).status_code == 400
+
+def test_preferences_default_then_upsert():
+    headers = signup_headers("prefs@example.com")
+    assert client.get("/preferences", headers=headers).json()["theme"] == "light"
+
+    saved = client.put("/preferences", json={"theme": "dark"}, headers=headers).json()
+    assert saved["theme"] == "dark" and saved["language"] == "en"
+    saved = client.put("/preferences", json={"notifications_sms": True}, headers=headers).json()
+    assert saved["theme"] == "dark" and saved["notifications_sms"] is True
+    assert client.get("/preferences", headers=headers).json() == saved
+    assert client.put("/preferences", json={"theme": "neon"}, headers=headers).status_code == 422
+
+def test_dashboard_is_one_statement(monkeypatch):
+    headers = signup_headers("dashboard@example.com")
+    client.put("/preferences", json={"theme": "auto"}, headers=headers)
+    titles = [create(headers, f"Project {i}")["title"] for i in range(7)]
+    project_id = create(headers, "Done")["id"]
+    client.put(f"/projects/{project_id}", json={"status": "completed"}, headers=headers)
+
+    statements = count_statements(monkeypatch)
+    dashboard = client.get("/dashboard", headers=headers).json()
+    assert len(statements) == 1
+
+    assert dashboard["profile"]["email"] == "dashboard@example.com"
+    assert dashboard["preferences"]["theme"] == "auto"
+    assert [project["title"] for project in dashboard["recent_projects"]] == ["Done"] + titles[::-1][:4]
+    assert dashboard["project_counts"] == {
+        "planning": 7, "in_progress": 0, "completed": 1, "on_hold": 0, "cancelled": 0
+    }
+
+def test_dashboard_for_a_new_user():
+    dashboard = client.get("/dashboard", headers=signup_headers("fresh@example.com")).json()
+    assert dashboard["recent_projects"] == []
+    assert dashboard["preferences"]["theme"] == "light"
+    assert set(dashboard["project_counts"].values()) == {0}
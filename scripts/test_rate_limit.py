@@ -0,0 +1,126 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import async_db
+import backend_api
+import rate_limit
+from rate_limit import (
+    LoginRateLimiter, MemoryBackend, PostgresBackend, RateLimited, client_ip, login_limiter, parse_networks,
+)
+from test_backend_api import client
+
+
+def login(email, password="password123"):
+    return client.post("/auth/login", data={"username": email, "password": password})
+
+@pytest.fixture(name="limits")
+def fixture_limits(monkeypatch):
+    """Small bursts that do not refill during the test."""
+    monkeypatch.setattr(login_limiter, "enabled", True)
+    monkeypatch.setitem(login_limiter.limits, "ip", (6, 1 / 3600))
+    monkeypatch.setitem(login_limiter.limits, "email", (3, 1 / 3600))
+
+def test_token_bucket_refills_over_time(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("rate_limit.time.monotonic", lambda: now[0])
+    backend = MemoryBackend()
+    assert [backend.take(b"k", 2, 0.5) for _ in range(3)] == [0, 0, 2.0]
+    now[0] += 1
+    assert backend.take(b"k", 2, 0.5) == 1.0
+    now[0] += 1
+    assert backend.take(b"k", 2, 0.5) == 0
+    # Idle long enough to refill: the bucket is forgotten.
+    now[0] += 10
+    assert backend.prune(4) == 1 and len(backend) == 0
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_keys=2)
+    for key in (b"a", b"b", b"a", b"c"):
+        backend.take(key, 5, 1)
+    assert list(backend._buckets) == [b"a", b"c"]
+    assert backend.evicted == 1
+
+def test_postgres_backend_shares_buckets_across_limiters():
+    first = LoginRateLimiter(backend=PostgresBackend(), enabled=True, email_burst=2, email_per_minute=1)
+    second = LoginRateLimiter(backend=PostgresBackend(), enabled=True, email_burst=2, email_per_minute=1)
+    first.check(None, "shared@example.com")
+    second.check(None, "Shared@Example.com ")
+    with pytest.raises(RateLimited) as exc:
+        first.check(None, "shared@example.com")
+    assert exc.value.scope == "email"
+    assert 55 < exc.value.retry_after <= 60
+
+    second.succeeded("shared@example.com")
+    first.check(None, "shared@example.com")
+
+def test_unreachable_backend_falls_back_to_local_buckets():
+    class Broken(PostgresBackend):
+        def take(self, key, burst, per_second):
+            raise RuntimeError("database unavailable")
+
+    limiter = LoginRateLimiter(backend=Broken(), enabled=True, email_burst=1)
+    limiter.check(None, "fallback@example.com")
+    with pytest.raises(RateLimited):
+        limiter.check(None, "fallback@example.com")
+    assert limiter.stats()["backend_errors"] == 2
+
+def test_login_is_throttled_before_any_lookup(monkeypatch, limits):
+    for _ in range(3):
+        assert login("nobody@example.com", "guess").status_code == 401
+
+    def no_lookup(email):
+        raise AssertionError("throttled logins must not reach the database")
+    monkeypatch.setattr(async_db, "get_user_by_email", no_lookup)
+    response = login("nobody@example.com", "guess")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert login_limiter.stats()["throttled_email"] == 1
+
+def test_successful_login_refills_email_bucket(limits):
+    signup = {"email": "typo@example.com", "password": "password123", "full_name": "Typo User"}
+    client.post("/auth/signup", json=signup)
+    for _ in range(2):
+        assert login("typo@example.com", "wrong").status_code == 401
+    assert login("typo@example.com").status_code == 200
+    for _ in range(3):
+        assert login("typo@example.com", "wrong").status_code == 401
+    assert login("typo@example.com").status_code == 429
+
+def test_ip_bucket_spans_emails():
+    limiter = LoginRateLimiter(backend=MemoryBackend(), enabled=True, ip_burst=3, ip_per_minute=1)
+    for i in range(3):
+        limiter.check("203.0.113.7", f"spray{i}@example.com")
+    with pytest.raises(RateLimited) as exc:
+        limiter.check("203.0.113.7", "another@example.com")
+    assert exc.value.scope == "ip"
+    limiter.check("198.51.100.1", "another@example.com")
+    assert limiter.stats()["throttled_ip"] == 1
+
+def test_client_ip_trusts_forwarded_for_only_from_trusted_proxies():
+    proxies = parse_networks("10.0.0.0/8, 192.0.2.10")
+    assert client_ip("203.0.113.7", "198.51.100.1", proxies) == "203.0.113.7"
+    assert client_ip("10.0.0.2", None, proxies) == "10.0.0.2"
+    assert client_ip("10.0.0.2", "198.51.100.1", proxies) == "198.51.100.1"
+    # A forged leftmost hop is ignored; trusted hops on the right are skipped.
+    assert client_ip("10.0.0.2", "1.2.3.4, 198.51.100.1, 192.0.2.10", proxies) == "198.51.100.1"
+    assert client_ip("10.0.0.2", "10.0.0.9, 10.0.0.3", proxies) == "10.0.0.9"
+    assert client_ip("testclient", "198.51.100.1", proxies) == "testclient"
+    assert client_ip("10.0.0.2", "198.51.100.1", ()) == "10.0.0.2"
+
+def test_login_ip_bucket_is_per_client_behind_a_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXY_NETWORKS", parse_networks("10.0.0.0/8"))
+    monkeypatch.setattr(login_limiter, "enabled", True)
+    monkeypatch.setitem(login_limiter.limits, "ip", (2, 1 / 3600))
+
+    async def behind_load_balancer(scope, receive, send):
+        await backend_api.app({**scope, "client": ("10.0.0.2", 50000)}, receive, send)
+    balanced = TestClient(behind_load_balancer)
+
+    def login_from(address, n):
+        return balanced.post("/auth/login", data={"username": f"lb{n}@example.com", "password": "guess"},
+                             headers={"X-Forwarded-For": address})
+
+    assert [login_from("203.0.113.7", n).status_code for n in range(3)] == [401, 401, 429]
+    assert login_from("1.2.3.4, 203.0.113.7", 3).status_code == 429
+    assert login_from("198.51.100.1", 4).status_code == 401
+    assert login_limiter.stats()["throttled_ip"] == 2
@@ -0,0 +1,90 @@
+import contacts
+from contact_ingest import ContactIngestor
+from response_cache import CachedResponse, ResponseCache, etag_matches, make_etag, response_cache
+from test_backend_api import client, signup_admin_headers
+
+
+def test_invalidating_a_tag_drops_its_entries():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.put("a", CachedResponse('"1"', b"a"), ["user:1"], cache.epoch())
+    cache.put("b", CachedResponse('"2"', b"b"), ["user:2"], cache.epoch())
+    cache.invalidate("user:1")
+    assert cache.get("a") is None
+    assert cache.get("b").body == b"b"
+    assert cache.stats()["invalidations"] == 1
+
+def test_response_computed_across_an_invalidation_is_not_stored():
+    cache = ResponseCache(max_entries=10, ttl=60)
+    epoch = cache.epoch()
+    cache.invalidate("contacts")
+    cache.put("page", CachedResponse('"1"', b"stale"), ["contacts"], epoch)
+    assert cache.get("page") is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    for key in ("a", "b"):
+        cache.put(key, CachedResponse(make_etag(key), b""), [], cache.epoch())
+    cache.get("a")
+    cache.put("c", CachedResponse(make_etag("c"), b""), [], cache.epoch())
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_if_none_match_parsing():
+    etag = make_etag(1, "2024-01-01")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+def test_me_answers_304_until_the_profile_changes():
+    signup = {"email": "etag@example.com", "password": "password123", "full_name": "ETag User"}
+    token = client.post("/auth/signup", json=signup).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/auth/me", headers=headers)
+    etag = response.headers["ETag"]
+    assert response.json()["full_name"] == "ETag User"
+    response = client.get("/auth/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+
+    client.put("/auth/profile", json={"full_name": "Renamed"}, headers=headers)
+    response = client.get("/auth/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Renamed"
+    assert response.headers["ETag"] != etag
+
+def test_revoked_token_is_rejected_even_when_cached():
+    signup = {"email": "revoked-etag@example.com", "password": "password123", "full_name": "Revoked"}
+    token = client.post("/auth/signup", json=signup).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    client.post("/auth/logout", headers=headers)
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+def test_admin_contacts_cached_until_a_submission_arrives(monkeypatch):
+    headers = signup_admin_headers("etag-admin@example.com")
+    first = client.get("/admin/contacts", headers=headers)
+    etag = first.headers["ETag"]
+
+    def no_query(*args, **kwargs):
+        raise AssertionError("a cached page must not be re-queried")
+    with monkeypatch.context() as patch:
+        patch.setattr(contacts, "fetch_page", no_query)
+        assert client.get("/admin/contacts", headers={**headers, "If-None-Match": etag}).status_code == 304
+        assert client.get("/admin/contacts", headers=headers).json() == first.json()
+
+    client.post("/contact", json={"name": "N", "email": "n@example.com", "subject": "S", "message": "M"})
+    response = client.get("/admin/contacts", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total"] == first.json()["total"] + 1
+
+def test_buffered_ingest_invalidates_contact_pages(tmp_path):
+    headers = signup_admin_headers("ingest-etag-admin@example.com")
+    total = client.get("/admin/contacts", headers=headers).json()["total"]
+
+    ingestor = ContactIngestor(spool_dir=str(tmp_path))
+    ingestor.submit("Queued", "queued@example.com", "S", "M")
+    ingestor.flush()
+    assert response_cache.stats()["invalidations"] >= 1
+    assert client.get("/admin/contacts", headers=headers).json()["total"] == total + 1
@@ -0,0 +1,151 @@
+import threading
+
+import pytest
+from psycopg2 import sql
+
+import db_pool
+from db_pool import PoolTimeoutError
+from sqlite_pool import SQLitePool, translate
+from test_backend_api import client, count_statements, signup_admin_headers
+
+
+@pytest.fixture(name="sqlite_pool")
+def fixture_sqlite_pool(tmp_path):
+    """Point the app at a fresh SQLite database for the duration of the test."""
+    pool = SQLitePool(str(tmp_path / "techzolo.sqlite3"), readers=2, timeout=0.5)
+    previous = db_pool.set_pool(pool)
+    yield pool
+    db_pool.set_pool(previous)
+    pool.close()
+
+def execute(conn, query, params=None):
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return cursor
+
+def test_queries_are_translated_once():
+    assert translate("SELECT * FROM users WHERE id = %s AND email LIKE 'a%%'", True) == (
+        "SELECT * FROM users WHERE id = ? AND email LIKE 'a%'", False
+    )
+    assert translate("SELECT %(user_id)s", True)[0] == "SELECT :user_id"
+    # Without parameters psycopg2 leaves % alone, and so do we.
+    assert translate("SELECT '100%'", False)[0] == "SELECT '100%'"
+    assert "strftime" in translate("UPDATE users SET updated_at = CURRENT_TIMESTAMP", False)[0]
+    assert translate("WITH x AS (SELECT 1) SELECT * FROM x", False)[1] is False
+    assert translate("\n  INSERT INTO users DEFAULT VALUES", False)[1] is True
+
+    hits = translate.cache_info().hits
+    translate("SELECT %(user_id)s", True)
+    assert translate.cache_info().hits == hits + 1
+
+def test_schema_is_created_in_wal_mode(sqlite_pool):
+    conn = sqlite_pool.getconn()
+    try:
+        assert execute(conn, "PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert execute(conn, "PRAGMA user_version").fetchone()[0] >= 1
+    finally:
+        conn.close()
+
+def test_composed_queries_and_typed_rows(sqlite_pool):
+    conn = sqlite_pool.getconn()
+    try:
+        cursor = execute(conn, sql.SQL("INSERT INTO users ({}) VALUES ({}) RETURNING *").format(
+            sql.SQL(", ").join(map(sql.Identifier, ("email", "password_hash", "full_name"))),
+            sql.SQL(", ").join(sql.Placeholder() * 3),
+        ), ("typed@example.com", "hash", "Typed"))
+        user = cursor.fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    assert user[0] == user["id"]
+    assert user["is_active"] is True and user["is_admin"] is False
+    assert user["created_at"].year >= 2024
+
+def test_readers_do_not_wait_for_the_writer(sqlite_pool):
+    writer, reader = sqlite_pool.getconn(), sqlite_pool.getconn()
+    try:
+        execute(writer, "INSERT INTO contact_submissions (name, email, subject, message) VALUES (%s, %s, %s, %s)",
+                ("N", "n@example.com", "S", "M"))
+        # The open write transaction blocks neither reads nor the reader's view of committed data.
+        assert execute(reader, "SELECT COUNT(*) FROM contact_submissions").fetchone()[0] == 0
+        # The writer sees its own uncommitted row.
+        assert execute(writer, "SELECT COUNT(*) FROM contact_submissions").fetchone()[0] == 1
+        with pytest.raises(PoolTimeoutError):
+            execute(reader, "DELETE FROM contact_submissions")
+        writer.commit()
+        assert execute(reader, "SELECT total FROM contact_submission_counts").fetchone()[0] == 1
+    finally:
+        writer.close()
+        reader.close()
+    assert sqlite_pool.stats()["writer"]["held"] is False
+
+def test_concurrent_writers_queue_instead_of_failing(sqlite_pool):
+    errors = []
+
+    def write(i):
+        conn = sqlite_pool.getconn()
+        try:
+            for j in range(20):
+                execute(conn, "INSERT INTO contact_submissions (name, email, subject, message) VALUES (%s, %s, %s, %s)",
+                        (f"T{i}", f"t{i}-{j}@example.com", "S", "M"))
+                conn.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    conn = sqlite_pool.getconn()
+    try:
+        assert execute(conn, "SELECT COUNT(*) FROM contact_submissions").fetchone()[0] == 160
+    finally:
+        conn.close()
+    assert sqlite_pool.stats()["writer"]["transactions"] >= 160
+
+def test_api_runs_on_sqlite(sqlite_pool, monkeypatch):
+    signup = {"email": "sqlite@example.com", "password": "password123", "full_name": "SQLite User"}
+    tokens = client.post("/auth/signup", json=signup).json()
+    assert client.post("/auth/signup", json=signup).status_code == 400
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.put("/auth/profile", json={"company": "LiteCo"}, headers=headers).json()["company"] == "LiteCo"
+    login = client.post("/auth/login", data={"username": signup["email"], "password": signup["password"]})
+    assert login.status_code == 200
+
+    refreshed = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert refreshed.status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    # Replaying the rotated token revoked every session; sign in again.
+    login = client.post("/auth/login", data={"username": signup["email"], "password": signup["password"]})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    for title in ("One", "Two"):
+        client.post("/projects", json={"title": title, "project_type": "blog"}, headers=headers)
+    client.put("/preferences", json={"theme": "dark"}, headers=headers)
+    statements = count_statements(monkeypatch)
+    dashboard = client.get("/dashboard", headers=headers).json()
+    assert len(statements) == 1
+    assert dashboard["profile"]["company"] == "LiteCo"
+    assert dashboard["preferences"]["theme"] == "dark"
+    assert dashboard["preferences"]["notifications_email"] is True
+    assert [project["title"] for project in dashboard["recent_projects"]] == ["Two", "One"]
+    assert dashboard["project_counts"]["planning"] == 2
+
+    for i in range(3):
+        client.post("/contact", json={"name": f"N{i}", "email": f"n{i}@example.com", "subject": "S", "message": "M"})
+    admin = signup_admin_headers("sqlite-admin@example.com")
+    page = client.get("/admin/contacts", params={"page_size": 2}, headers=admin).json()
+    assert page["total"] == 3 and len(page["submissions"]) == 2
+    rest = client.get("/admin/contacts", params={"page_size": 2, "cursor": page["next_cursor"]}, headers=admin).json()
+    assert [s["name"] for s in page["submissions"] + rest["submissions"]] == ["N2", "N1", "N0"]
+
+    response = client.get("/admin/contacts/search", params={"q": "N1"}, headers=admin)
+    assert response.status_code == 501
+    assert response.json()["detail"] == "Contact search requires PostgreSQL"
+    response = client.get("/admin/contacts/export", headers=admin)
+    assert response.status_code == 501
+    assert response.json()["detail"] == "Contact export requires PostgreSQL"
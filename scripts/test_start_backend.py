@@ -0,0 +1,84 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import httpx
+
+import start_backend
+from start_backend import Supervisor, Worker, worker_env
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "start_backend.py")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_line(process, text, timeout=60):
+    deadline = time.monotonic() + timeout
+    lines = []
+    while time.monotonic() < deadline:
+        line = process.stdout.readline()
+        lines.append(line)
+        if text in line:
+            return lines
+    raise AssertionError(f"{text!r} not seen in output: {''.join(lines)}")
+
+def test_worker_env_splits_connection_budget():
+    env = worker_env(4, base={})
+    assert int(env["DB_POOL_MAX_SIZE"]) >= 2
+    assert int(env["DB_POOL_MIN_SIZE"]) <= int(env["DB_POOL_MAX_SIZE"])
+    assert int(env["BCRYPT_WORKERS"]) >= 1
+
+    explicit = worker_env(4, base={"DB_POOL_MAX_SIZE": "3", "DB_POOL_MIN_SIZE": "5", "BCRYPT_WORKERS": "2"})
+    assert explicit["DB_POOL_MAX_SIZE"] == "3"
+    assert explicit["DB_POOL_MIN_SIZE"] == "3"
+    assert explicit["BCRYPT_WORKERS"] == "2"
+
+def test_failing_readiness_does_not_restart_live_workers(monkeypatch):
+    supervisor = Supervisor("127.0.0.1", free_port(), workers=1)
+    worker = Worker(1, process=SimpleNamespace(poll=lambda: None, pid=1), health_socket="")
+    worker.ready = True
+    supervisor.workers.append(worker)
+    probed, replaced = [], []
+    # The database is down: /readyz fails everywhere, /healthz still answers.
+    monkeypatch.setattr(supervisor, "probe", lambda w, path: probed.append(path) or path != start_backend.READY_PATH)
+    monkeypatch.setattr(supervisor, "replace", replaced.append)
+
+    for _ in range(start_backend.HEALTH_FAILURE_THRESHOLD + 1):
+        worker.last_probe = 0.0
+        supervisor._check_workers()
+    assert set(probed) == {start_backend.HEALTH_PATH}
+    assert replaced == [] and worker.failures == 0
+
+    monkeypatch.setattr(supervisor, "probe", lambda w, path: False)
+    for _ in range(start_backend.HEALTH_FAILURE_THRESHOLD):
+        worker.last_probe = 0.0
+        supervisor._check_workers()
+    assert replaced == [worker]
+    os.rmdir(supervisor.runtime_dir)
+
+def test_rolling_restart_keeps_serving():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, SCRIPT, "--workers", "2", "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        env={**os.environ, "DB_POOL_MAX_SIZE": "2"},
+    )
+    try:
+        wait_for_line(process, "Worker 2")
+        url = f"http://127.0.0.1:{port}/"
+        assert httpx.get(url).status_code == 200
+
+        process.send_signal(signal.SIGHUP)
+        lines = wait_for_line(process, "Rolling restart complete")
+        assert any("Worker 4" in line and "ready" in line for line in lines)
+        assert httpx.get(url).status_code == 200
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=60) == 0
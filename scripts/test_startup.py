@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+import backend_api
+from settings import DEFAULT_CORS_ORIGINS, Settings
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+from bench_startup import SCRIPTS_DIR, measure  # noqa: E402
+
+# Generous, since CI machines vary; deferred imports are checked exactly below.
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+
+def test_import_stays_within_budget():
+    result = measure("backend_api", runs=3)
+    assert result["eager_deferred_modules"] == []
+    assert result["min_ms"] <= STARTUP_IMPORT_BUDGET_MS, result
+
+def test_create_app_builds_independent_apps():
+    first, second = backend_api.create_app(), backend_api.create_app()
+    assert first is not second
+    paths = {route.path for route in first.routes}
+    assert {"/auth/login", "/dashboard", "/readyz"} <= paths
+    assert paths == {route.path for route in second.routes}
+    assert backend_api.app is backend_api.app
+
+def test_import_starts_no_logging_thread():
+    code = (
+        "import threading, app_logging, backend_api\n"
+        "assert app_logging._listener is None and threading.active_count() == 1\n"
+        "backend_api.create_app()\n"
+        "assert app_logging._listener is not None\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS_DIR, check=True)
+
+def test_settings_from_env():
+    assert Settings.from_env({}) == Settings()
+    settings = Settings.from_env({
+        "DATABASE_URL": "sqlite:////tmp/app.db",
+        "JWT_STATELESS": "yes",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "10",
+        "CORS_ORIGINS": "https://a.example, https://b.example,",
+    })
+    assert settings.database_url == "sqlite:////tmp/app.db"
+    assert settings.jwt_stateless is True
+    assert settings.access_token_expire_minutes == 10
+    assert settings.cors_origins == ("https://a.example", "https://b.example")
+    assert Settings.from_env({"CORS_ORIGINS": ""}).cors_origins == DEFAULT_CORS_ORIGINS
+
+def test_module_tunables_come_from_settings():
+    settings = Settings.from_env({"DB_POOL_MAX_SIZE": "3", "METRICS_BUCKETS": "0.5,1", "LOGIN_RATE_LIMIT_ENABLED": "no"})
+    assert settings.get_int("DB_POOL_MAX_SIZE", 10) == 3
+    assert settings.get_float("DB_POOL_TIMEOUT", 10) == 10.0
+    assert settings.get("METRICS_BUCKETS", "") == "0.5,1"
+    assert settings.get_flag("LOGIN_RATE_LIMIT_ENABLED", True) is False
+    assert settings.get_flag("CONTACT_INGEST_FSYNC", True) is True
+
+def test_env_file_reaches_the_first_module_imported(tmp_path):
+    env_file = tmp_path / ".env.local"
+    env_file.write_text("METRICS_BUCKETS=0.5,1\nUSER_CACHE_TTL_SECONDS=7\n")
+    code = (
+        "import settings\n"
+        f"settings.ENV_FILE = {str(env_file)!r}\n"
+        "import metrics, user_cache\n"
+        "assert metrics.METRICS_BUCKETS == (0.5, 1.0), metrics.METRICS_BUCKETS\n"
+        "assert user_cache.USER_CACHE_TTL_SECONDS == 7.0\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k not in ("METRICS_BUCKETS", "USER_CACHE_TTL_SECONDS")}
+    subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS_DIR, env=env, check=True)
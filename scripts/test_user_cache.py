@@ -0,0 +1,60 @@
+import time
+
+from user_cache import UserCache
+
+
+def make_user(user_id, email):
+    return {"id": user_id, "email": email, "full_name": f"User {user_id}"}
+
+def test_lookup_by_id_and_email():
+    cache = UserCache(max_entries=10, ttl=60)
+    cache.put(make_user(1, "One@Example.com"))
+
+    assert cache.get_by_id(1)["email"] == "One@Example.com"
+    assert cache.get_by_email("One@Example.com")["id"] == 1
+    assert cache.get_by_id(2) is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+def test_emails_are_matched_exactly_like_the_database():
+    cache = UserCache(max_entries=10, ttl=60)
+    cache.put(make_user(1, "admin@example.com"))
+    cache.put(make_user(2, "ADMIN@example.com"))
+
+    assert cache.get_by_email("admin@example.com")["id"] == 1
+    assert cache.get_by_email("ADMIN@example.com")["id"] == 2
+    assert cache.get_by_email("Admin@example.com") is None
+    cache.invalidate(email="ADMIN@example.com")
+    assert cache.get_by_email("admin@example.com")["id"] == 1
+
+def test_returned_records_are_copies():
+    cache = UserCache(max_entries=10, ttl=60)
+    cache.put(make_user(1, "one@example.com"))
+    cache.get_by_id(1)["full_name"] = "Mutated"
+    assert cache.get_by_id(1)["full_name"] == "User 1"
+
+def test_least_recently_used_entry_is_evicted():
+    cache = UserCache(max_entries=2, ttl=60)
+    cache.put(make_user(1, "one@example.com"))
+    cache.put(make_user(2, "two@example.com"))
+    cache.get_by_id(1)
+    cache.put(make_user(3, "three@example.com"))
+
+    assert cache.get_by_id(2) is None
+    assert cache.get_by_email("two@example.com") is None
+    assert cache.get_by_id(1) is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire_after_ttl():
+    cache = UserCache(max_entries=10, ttl=0.01)
+    cache.put(make_user(1, "one@example.com"))
+    time.sleep(0.02)
+    assert cache.get_by_id(1) is None
+    assert cache.stats()["expirations"] == 1
+
+def test_invalidate_by_email_drops_both_keys():
+    cache = UserCache(max_entries=10, ttl=60)
+    cache.put(make_user(1, "one@example.com"))
+    cache.invalidate(email="one@example.com")
+    assert cache.get_by_id(1) is None
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+
+import bcrypt
+
+import db_pool
+import user_import
+from db_pool import ConnectionPool
+from password_hasher import PasswordHasher
+from user_import import import_jobs, import_users, parse_rows, read_rows
+from test_backend_api import client, signup_admin_headers
+
+FAST_ROUNDS = 4
+
+
+def test_csv_import_reports_bad_rows_without_aborting(db_connection):
+    data = "\n".join([
+        "email,full_name,password,company",
+        "ada@example.com,Ada Lovelace,secret-1,Analytical",
+        "not-an-email,Bad Email,secret-2,",
+        "grace@example.com,,secret-3,",
+        "ada@example.com,Ada Again,secret-4,",
+        "admin@techzolo.com,Existing Admin,secret-5,",
+        "alan@example.com,Alan Turing,secret-6,",
+    ])
+    report = import_users(parse_rows(data, "csv"), workers=2, rounds=FAST_ROUNDS)
+
+    assert report["received"] == 6
+    assert report["created"] == 2
+    assert report["skipped"] == 1
+    assert report["failed"] == 3
+    errors = {error["line"]: error["error"] for error in report["errors"]}
+    assert errors[3].startswith("Invalid email")
+    assert errors[4] == "full_name is required"
+    assert errors[5] == "Duplicate email in this import"
+    assert errors[6] == "Email already registered"
+
+    cursor = db_connection.cursor()
+    cursor.execute("SELECT full_name, company, is_admin FROM users WHERE email = 'ada@example.com'")
+    assert cursor.fetchone() == ("Ada Lovelace", "Analytical", False)
+
+    response = client.post("/auth/login", data={"username": "alan@example.com", "password": "secret-6"})
+    assert response.status_code == 200
+
+def test_update_existing_overwrites_and_invalidates_cache():
+    import_users(parse_rows('{"email": "linus@example.com", "full_name": "Linus", "password": "pw"}', "ndjson"),
+                 workers=1, rounds=FAST_ROUNDS)
+    token = client.post("/auth/login", data={"username": "linus@example.com", "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).json()["full_name"] == "Linus"
+
+    rows = '{"email": "linus@example.com", "full_name": "Linus T", "password": "pw2"}'
+    report = import_users(parse_rows(rows, "ndjson"), update_existing=True, workers=1, rounds=FAST_ROUNDS)
+    assert report["updated"] == 1 and report["created"] == 0
+    assert client.get("/auth/me", headers=headers).json()["full_name"] == "Linus T"
+
+def test_ndjson_accepts_existing_hashes_and_reports_unreadable_lines():
+    existing_hash = "$2b$04$" + "a" * 53
+    lines = [
+        json.dumps({"email": "hash@example.com", "full_name": "Hashed", "password_hash": existing_hash}),
+        "{not json",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"email": "x@example.com", "full_name": "X", "password": "pw", "is_admin": True}),
+    ]
+    report = import_users(parse_rows("\n".join(lines), "ndjson"), workers=1, rounds=FAST_ROUNDS)
+    assert report["created"] == 1
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4]
+    assert report["errors"][2]["error"] == "Unknown field(s): is_admin"
+
+def test_import_endpoint(monkeypatch):
+    body = "email,full_name,password_hash\nbulk@example.com,Bulk User,$2b$04$" + "b" * 53 + "\n"
+    signup = {"email": "plain@example.com", "password": "password123", "full_name": "Plain User"}
+    token = client.post("/auth/signup", json=signup).json()["access_token"]
+    response = client.post("/admin/users/import", content=body, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+
+    headers = signup_admin_headers("import-admin@example.com")
+    response = client.post("/admin/users/import", content=body, headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued" and job["rows"] == 1
+    assert response.headers["Location"] == job["status_url"]
+    import_jobs.wait()
+    status = client.get(job["status_url"], headers=headers).json()
+    assert status["status"] == "done"
+    assert status["report"]["created"] == 1
+    assert client.get("/admin/users/import/not-a-job", headers=headers).status_code == 404
+
+    response = client.post("/admin/users/import", content="name\nx\n", headers=headers)
+    assert response.status_code == 400
+
+    monkeypatch.setattr(user_import, "USER_IMPORT_MAX_ROWS", 1)
+    ndjson = '{"email": "a@example.com"}\n{"email": "b@example.com"}\n'
+    response = client.post("/admin/users/import", content=ndjson, headers={**headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 413
+
+def test_import_hashes_on_the_shared_pool(monkeypatch):
+    def no_private_pool(*args, **kwargs):
+        raise AssertionError("imports on the shared hasher must not start processes of their own")
+    monkeypatch.setattr(user_import, "ProcessPoolExecutor", no_private_pool)
+    hasher = PasswordHasher(workers=2, max_pending=1, rounds=FAST_ROUNDS)
+    try:
+        rows = "\n".join(json.dumps({"email": f"pooled{i}@example.com", "full_name": "Pooled", "password": f"pw{i}"})
+                         for i in range(3))
+        report = import_users(parse_rows(rows, "ndjson"), workers=8, hasher=hasher)
+        assert report["created"] == 3
+        stats = hasher.stats()
+        assert stats["jobs"] == 3 and stats["pending"] == 0 and stats["rejected"] == 0
+    finally:
+        hasher.shutdown()
+
+def test_hash_many_waits_for_a_full_queue():
+    hasher = PasswordHasher(workers=2, max_pending=2, rounds=FAST_ROUNDS)
+    try:
+        hasher._pending = 2  # two login hashes already queued
+        result = []
+        worker = threading.Thread(target=lambda: result.extend(hasher.hash_many(["a", "b"])))
+        worker.start()
+        worker.join(0.2)
+        assert worker.is_alive() and hasher.stats()["rejected"] == 0
+        with hasher._lock:
+            hasher._pending = 0
+        worker.join(10)
+        assert [bcrypt.checkpw(pw.encode(), hashed.encode()) for pw, hashed in zip("ab", result)] == [True, True]
+    finally:
+        hasher.shutdown()
+
+def test_import_jobs_run_one_at_a_time(scratch_database_url, monkeypatch):
+    running, overlapped = [], []
+
+    def import_users_slowly(rows, **kwargs):
+        overlapped.append(bool(running))
+        running.append(1)
+        time.sleep(0.05)
+        running.pop()
+        return {"received": len(rows)}
+    monkeypatch.setattr(user_import, "import_users", import_users_slowly)
+
+    # Jobs and requests overlap here, so use real connections rather than the test's shared one.
+    pool = ConnectionPool(scratch_database_url)
+    previous = db_pool.set_pool(pool)
+    try:
+        job_ids = [import_jobs.submit(read_rows(f"email\nuser{n}@example.com\n", "csv")) for n in range(3)]
+        import_jobs.wait()
+        assert [import_jobs.get(job_id)["status"] for job_id in job_ids] == ["done"] * 3
+    finally:
+        db_pool.set_pool(previous)
+        pool.close()
+    assert overlapped == [False, False, False]
+    assert import_jobs.stats()["completed"] == 3
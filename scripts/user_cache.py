@@ -0,0 +1,124 @@
+"""
+In-process LRU + TTL cache of user records, keyed by id and by email.
+
+Every authenticated request resolves its user through get_user_by_id, so
+caching the row saves a pooled round trip per request. Entries expire after
+USER_CACHE_TTL_SECONDS so changes made by other workers are picked up, and
+writers in this process invalidate explicitly. Emails are keyed exactly as
+stored: users.email lookups and its unique constraint are case-sensitive, and
+the cache must not answer differently from the database.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from settings import get_settings
+
+settings = get_settings()
+USER_CACHE_MAX_ENTRIES = settings.get_int("USER_CACHE_MAX_ENTRIES", 10000)
+USER_CACHE_TTL_SECONDS = settings.get_float("USER_CACHE_TTL_SECONDS", 60)
+
+
+class UserCache:
+    """Bounded LRU of user rows with per-entry expiry and a secondary email index."""
+
+    def __init__(self, max_entries: int = USER_CACHE_MAX_ENTRIES, ttl: float = USER_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._by_id: "OrderedDict[int, tuple]" = OrderedDict()
+        self._id_by_email: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _drop(self, user_id: int):
+        """Remove one entry and its email index. Caller holds the lock."""
+        entry = self._by_id.pop(user_id, None)
+        if entry is not None:
+            email = entry[1].get("email")
+            if email is not None and self._id_by_email.get(email) == user_id:
+                del self._id_by_email[email]
+
+    def _lookup(self, user_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Return a copy of a live entry, counting the hit or miss. Caller holds the lock."""
+        entry = self._by_id.get(user_id) if user_id is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, record = entry
+        if expires_at <= time.monotonic():
+            self._drop(user_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._by_id.move_to_end(user_id)
+        self.hits += 1
+        return dict(record)
+
+    def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._lookup(user_id)
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._lookup(self._id_by_email.get(email))
+
+    def put(self, record: Dict[str, Any]):
+        """Cache a user row (must include id and email)."""
+        if not self.enabled or record is None:
+            return
+        user_id = record["id"]
+        with self._lock:
+            self._drop(user_id)
+            self._by_id[user_id] = (time.monotonic() + self.ttl, dict(record))
+            self._id_by_email[record["email"]] = user_id
+            while len(self._by_id) > self.max_entries:
+                oldest_id = next(iter(self._by_id))
+                self._drop(oldest_id)
+                self.evictions += 1
+
+    def invalidate(self, user_id: Optional[int] = None, email: Optional[str] = None):
+        """Forget a user by id and/or email after a write."""
+        with self._lock:
+            if user_id is None and email is not None:
+                user_id = self._id_by_email.get(email)
+            if user_id is not None and user_id in self._by_id:
+                self._drop(user_id)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self._id_by_email.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._by_id),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+user_cache = UserCache()
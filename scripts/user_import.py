@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Bulk user provisioning from CSV or NDJSON.
+
+Rows are validated in Python. Passwords are hashed across a process pool
+(bcrypt is CPU-bound, so threads would serialise on it), and each batch is
+loaded with COPY into a temporary staging table. One INSERT ... SELECT then
+merges the batch into users with ON CONFLICT (email). A bad row is reported
+with its line number and skipped; it never aborts the rest of the import.
+Each batch commits on its own, so a large import makes steady progress
+instead of holding one long transaction.
+
+Accepted columns: email, full_name, password or password_hash (an existing
+bcrypt hash, for migrating accounts), company and phone. Admin rights are
+never granted by an import.
+
+The command line starts a pool of its own (--workers). The API does not:
+import_jobs runs uploads one at a time on a background thread, hashing on
+the shared password_hasher pool, and records each job in user_import_jobs so
+any worker can report its status.
+
+    python scripts/user_import.py users.csv
+    python scripts/user_import.py users.ndjson --update-existing --workers 8
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic_core import PydanticCustomError
+from pydantic.networks import validate_email
+from psycopg2.extras import DictCursor, Json
+
+from app_logging import get_logger
+from db_pool import get_connection, require_postgresql
+from password_hasher import BCRYPT_ROUNDS, PasswordHasher, get_hasher, hash_password_sync
+from response_cache import response_cache
+from user_cache import user_cache
+from settings import get_settings
+
+settings = get_settings()
+USER_IMPORT_BATCH_SIZE = settings.get_int("USER_IMPORT_BATCH_SIZE", 1000)
+USER_IMPORT_WORKERS = settings.get_int("USER_IMPORT_WORKERS", os.cpu_count() or 2)
+USER_IMPORT_MAX_ROWS = settings.get_int("USER_IMPORT_MAX_ROWS", 10000)
+
+logger = get_logger("user_import")
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_COLUMNS = ("email", "full_name", "password", "password_hash", "company", "phone")
+MAX_FIELD_LENGTH = 255
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+_STAGED_COLUMNS = ("line", "email", "password_hash", "full_name", "company", "phone")
+
+_MERGE_SKIP = """
+    INSERT INTO users (email, password_hash, full_name, company, phone)
+    SELECT email, password_hash, full_name, company, phone FROM user_import_staging ORDER BY line
+    ON CONFLICT (email) DO NOTHING
+    RETURNING id, email, TRUE AS inserted
+"""
+
+# xmax = 0 only on freshly inserted rows, which tells inserts and updates apart.
+_MERGE_UPDATE = """
+    INSERT INTO users (email, password_hash, full_name, company, phone)
+    SELECT email, password_hash, full_name, company, phone FROM user_import_staging ORDER BY line
+    ON CONFLICT (email) DO UPDATE SET
+        password_hash = EXCLUDED.password_hash,
+        full_name = EXCLUDED.full_name,
+        company = COALESCE(EXCLUDED.company, users.company),
+        phone = COALESCE(EXCLUDED.phone, users.phone),
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING id, email, (xmax = 0) AS inserted
+"""
+
+
+class ImportFormatError(ValueError):
+    """Raised when the input as a whole cannot be read."""
+
+
+class ImportTooLarge(ImportFormatError):
+    """Raised when an import has more rows than allowed; nothing is written."""
+
+
+def parse_rows(data: str, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, row) pairs; a row is a dict, or an error string for unreadable lines."""
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(data))
+        if reader.fieldnames is None:
+            return
+        unknown = set(reader.fieldnames) - set(IMPORT_COLUMNS)
+        if "email" not in reader.fieldnames or unknown:
+            raise ImportFormatError(
+                f"CSV header must contain email and only {', '.join(IMPORT_COLUMNS)}; got {', '.join(reader.fieldnames)}"
+            )
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(data.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, f"Invalid JSON: {e}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Each line must be a JSON object"
+    else:
+        raise ImportFormatError(f"Invalid format: {fmt}")
+
+
+def read_rows(data: str, fmt: str, max_rows: int = USER_IMPORT_MAX_ROWS) -> List[Tuple[int, Any]]:
+    """parse_rows() into a list, so format and size errors surface before an import is queued."""
+    rows = []
+    for row in parse_rows(data, fmt):
+        if len(rows) == max_rows:
+            raise ImportTooLarge(f"Imports are limited to {max_rows} rows")
+        rows.append(row)
+    return rows
+
+
+def _text(row: Dict[str, Any], field: str) -> Optional[str]:
+    value = row.get(field)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def validate_row(row: Any) -> Dict[str, Optional[str]]:
+    """Normalised user fields; raises ValueError describing the first problem."""
+    if isinstance(row, str):
+        raise ValueError(row)
+    unknown = set(row) - set(IMPORT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+
+    user = {field: _text(row, field) for field in IMPORT_COLUMNS}
+    if not user["email"]:
+        raise ValueError("email is required")
+    try:
+        user["email"] = validate_email(user["email"])[1]
+    except PydanticCustomError as e:
+        raise ValueError(f"Invalid email: {e.message()}")
+    if not user["full_name"]:
+        raise ValueError("full_name is required")
+    if bool(user["password"]) == bool(user["password_hash"]):
+        raise ValueError("Exactly one of password or password_hash is required")
+    if user["password_hash"] and not user["password_hash"].startswith(_BCRYPT_PREFIXES):
+        raise ValueError("password_hash must be a bcrypt hash")
+    for field in ("email", "full_name", "company", "phone"):
+        if user[field] and len(user[field]) > MAX_FIELD_LENGTH:
+            raise ValueError(f"{field} is longer than {MAX_FIELD_LENGTH} characters")
+    return user
+
+
+def _hash_passwords(executor: Optional[ProcessPoolExecutor], workers: int, passwords: List[str],
+                    rounds: int) -> List[str]:
+    if executor is None:
+        return [hash_password_sync(password, rounds) for password in passwords]
+    # Large chunks keep inter-process overhead negligible next to ~250ms per hash.
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(executor.map(hash_password_sync, passwords, [rounds] * len(passwords), chunksize=chunksize))
+
+
+def _load_batch(batch: List[Tuple[int, Dict[str, Optional[str]]]], update_existing: bool) -> Dict[str, Tuple[int, bool]]:
+    """COPY one batch into staging and merge it; returns {email: (user id, inserted?)} for rows written."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line, user in batch:
+        writer.writerow([line] + [user[column] if user[column] is not None else r"\N" for column in _STAGED_COLUMNS[1:]])
+    buffer.seek(0)
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            CREATE TEMP TABLE user_import_staging (
+                line INTEGER NOT NULL,
+                email TEXT NOT NULL,
+                password_hash TEXT NOT NULL,
+                full_name TEXT NOT NULL,
+                company TEXT,
+                phone TEXT
+            ) ON COMMIT DROP
+            """
+        )
+        cursor.copy_expert(
+            f"COPY user_import_staging ({', '.join(_STAGED_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+        cursor.execute(_MERGE_UPDATE if update_existing else _MERGE_SKIP)
+        written = {email: (user_id, inserted) for user_id, email, inserted in cursor.fetchall()}
+        # ON COMMIT DROP is only a safety net; free the name for the next batch right away.
+        cursor.execute("DROP TABLE user_import_staging")
+        conn.commit()
+        return written
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def import_users(rows: Iterable[Tuple[int, Any]], update_existing: bool = False,
+                 batch_size: int = USER_IMPORT_BATCH_SIZE, workers: int = USER_IMPORT_WORKERS,
+                 rounds: int = BCRYPT_ROUNDS, max_rows: Optional[int] = None,
+                 hasher: Optional[PasswordHasher] = None) -> Dict[str, Any]:
+    """
+    Validate, hash and merge rows from parse_rows().
+
+    Existing emails are left alone unless update_existing is set. Returns
+    counts plus an ``errors`` list of {line, email, error}, one per row that
+    was not written. With a hasher, passwords are hashed on its pool (at its
+    rounds) and workers is ignored; otherwise up to workers processes are
+    started for this import.
+    """
+    require_postgresql("User import")
+    report: Dict[str, Any] = {"received": 0, "created": 0, "updated": 0, "skipped": 0, "failed": 0, "errors": []}
+    valid: List[Tuple[int, Dict[str, Optional[str]]]] = []
+    seen = set()
+    for line, row in rows:
+        report["received"] += 1
+        if max_rows is not None and report["received"] > max_rows:
+            raise ImportTooLarge(f"Imports are limited to {max_rows} rows")
+        email = row.get("email") if isinstance(row, dict) else None
+        try:
+            user = validate_row(row)
+            if user["email"] in seen:
+                raise ValueError("Duplicate email in this import")
+        except ValueError as e:
+            report["failed"] += 1
+            report["errors"].append({"line": line, "email": email, "error": str(e)})
+            continue
+        seen.add(user["email"])
+        valid.append((line, user))
+
+    executor = None
+    if hasher is None and workers > 1 and sum(1 for _, user in valid if user["password"]) > 1:
+        # spawn rather than fork: the API process runs threads (db pool, executors).
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            to_hash = [user for _, user in batch if user["password"]]
+            passwords = [user["password"] for user in to_hash]
+            hashes = hasher.hash_many(passwords) if hasher is not None else _hash_passwords(executor, workers, passwords, rounds)
+            for user, hashed in zip(to_hash, hashes):
+                user["password_hash"] = hashed
+
+            try:
+                written = _load_batch(batch, update_existing)
+            except Exception as e:
+                report["failed"] += len(batch)
+                report["errors"].extend({"line": line, "email": user["email"], "error": f"Batch failed: {e}"}
+                                        for line, user in batch)
+                continue
+            for line, user in batch:
+                if user["email"] not in written:
+                    report["skipped"] += 1
+                    report["errors"].append({"line": line, "email": user["email"], "error": "Email already registered"})
+                elif written[user["email"]][1]:
+                    report["created"] += 1
+                else:
+                    report["updated"] += 1
+                    user_cache.invalidate(email=user["email"])
+                    response_cache.invalidate(f"user:{written[user['email']][0]}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    report["errors"].sort(key=lambda error: error["line"])
+    return report
+
+
+_JOB_COLUMNS = ("id", "status", "update_existing", "row_count", "report", "error",
+                "created_by", "created_at", "started_at", "finished_at")
+
+
+class ImportJobs:
+    """
+    API imports, run one at a time on a background thread of this process.
+
+    submit() records a queued job and returns its id straight away; get()
+    reads a job back, from any worker. Running imports one after another
+    means a burst of uploads waits in line rather than multiplying bcrypt
+    work. A job whose process dies mid-import stays ``running``; the batches
+    it committed are kept, and importing the file again completes it.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _execute(self, query: str, params: Tuple[Any, ...]):
+        conn = get_connection()
+        try:
+            conn.cursor().execute(query, params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def submit(self, rows: List[Tuple[int, Any]], update_existing: bool = False,
+               created_by: Optional[int] = None) -> str:
+        """Queue rows from read_rows() for import; returns the job id."""
+        require_postgresql("User import")
+        job_id = str(uuid.uuid4())
+        self._execute(
+            "INSERT INTO user_import_jobs (id, created_by, update_existing, row_count) VALUES (%s, %s, %s, %s)",
+            (job_id, created_by, update_existing, len(rows)),
+        )
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-import")
+            self._futures[job_id] = self._executor.submit(self._run, job_id, rows, update_existing)
+            self.submitted += 1
+        return job_id
+
+    def _finish(self, job_id: str, report: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self._execute(
+            "UPDATE user_import_jobs SET status = %s, report = %s, error = %s, finished_at = CURRENT_TIMESTAMP "
+            "WHERE id = %s",
+            ("failed" if error is not None else "done", Json(report) if report is not None else None, error, job_id),
+        )
+        with self._lock:
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def _run(self, job_id: str, rows: List[Tuple[int, Any]], update_existing: bool):
+        try:
+            self._execute("UPDATE user_import_jobs SET status = 'running', started_at = CURRENT_TIMESTAMP WHERE id = %s",
+                          (job_id,))
+            try:
+                report = import_users(rows, update_existing=update_existing, hasher=get_hasher())
+            except Exception as e:
+                logger.error("User import %s failed: %s", job_id, e)
+                self._finish(job_id, error=str(e))
+            else:
+                self._finish(job_id, report=report)
+        except Exception as e:
+            logger.error("Could not record the state of user import %s: %s", job_id, e)
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job's status and, once done, its report; None for an unknown id."""
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        conn = get_connection()
+        try:
+            cursor = conn.cursor(cursor_factory=DictCursor)
+            cursor.execute(f"SELECT {', '.join(_JOB_COLUMNS)} FROM user_import_jobs WHERE id = %s", (job_id,))
+            row = cursor.fetchone()
+            return {column: row[column] for column in _JOB_COLUMNS} if row else None
+        finally:
+            conn.close()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the jobs queued so far in this process have finished."""
+        with self._lock:
+            futures = list(self._futures.values())
+        wait(futures, timeout=timeout)
+
+    def shutdown(self):
+        """Mark queued jobs failed and wait for the running one to finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            cancelled = [job_id for job_id, future in self._futures.items() if future.cancel()]
+            for job_id in cancelled:
+                del self._futures[job_id]
+        for job_id in cancelled:
+            try:
+                self._finish(job_id, error="Interrupted by shutdown")
+            except Exception as e:
+                logger.error("Could not record the state of user import %s: %s", job_id, e)
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def clear(self):
+        with self._lock:
+            self.submitted = self.completed = self.failed = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_progress": len(self._futures),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+
+import_jobs = ImportJobs()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV or NDJSON file ('-' for stdin)")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="default: from the file extension")
+    parser.add_argument("--update-existing", action="store_true", help="overwrite users whose email already exists")
+    parser.add_argument("--workers", type=int, default=USER_IMPORT_WORKERS, help="bcrypt worker processes")
+    parser.add_argument("--batch-size", type=int, default=USER_IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    if args.path == "-":
+        data = sys.stdin.read()
+    else:
+        with open(args.path, "r", encoding="utf-8-sig") as f:
+            data = f.read()
+
+    try:
+        report = import_users(parse_rows(data, fmt), update_existing=args.update_existing,
+                              batch_size=args.batch_size, workers=args.workers)
+    except ImportFormatError as e:
+        print(f"Import failed: {e}")
+        return 1
+    print(json.dumps(report, indent=2))
+    return 0 if not report["failed"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())